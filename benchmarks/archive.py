@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Cardiff University (2024)
+#
+# This file is part of GWTrigFind.
+#
+# GWTrigFind is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWTrigFind is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWTrigFind.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Generate synthetic LDG trigger archives on local disk
+
+Each ``make_*`` function builds one kind of archive under ``root``, with
+empty files named following LIGO-T050017, and returns an `Archive`
+describing it, including the keyword arguments needed to point the
+matching finder at it.
+
+Run as a script to build an archive tree for inspection::
+
+    python benchmarks/archive.py /tmp/archive [--num-files N]
+"""
+
+import argparse
+import datetime
+import os
+import sys
+from collections import namedtuple
+
+# run from a source checkout without installing
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from gwtrigfind.gps import (date_to_gps, gps_to_date, utc_days)  # noqa: E402
+
+#: default GPS start time of all archives (2019-04-01 00:00:00 UTC)
+EPOCH = 1238112018
+
+#: description of a generated archive, ``kwargs`` are the keyword
+#: arguments to pass to the finder to search ``base``
+Archive = namedtuple(
+    'Archive', ('kind', 'start', 'end', 'nfiles', 'base', 'kwargs'))
+
+
+def _touch(path):
+    os.close(os.open(path, os.O_CREAT | os.O_WRONLY, 0o644))
+
+
+def _times(start, nfiles, duration):
+    return range(start, start + nfiles * duration, duration)
+
+
+def _days(times, format):
+    """Yield ``(gps, day)`` for each time, with the UTC day formatted
+
+    The GPS to UTC conversion is only done once per day.
+    """
+    day = None
+    dayend = -1
+    for t in times:
+        if t >= dayend:
+            day, = utc_days([(t, t)], format)
+            dayend = date_to_gps(*gps_to_date(t)) + 86400
+        yield t, day
+
+
+def _make_gps_dirs(template, name, start, nfiles, duration):
+    """Write files into GPS5 directories
+
+    ``template`` is the directory path, with ``{0}`` in place of the GPS5
+    directory name, ``name`` is the file name, with ``%d`` in place of
+    the start time and duration of each file.
+    """
+    made = set()
+    for t in _times(start, nfiles, duration):
+        directory = template.format(t // 100000)
+        if directory not in made:
+            os.makedirs(directory, exist_ok=True)
+            made.add(directory)
+        _touch(os.path.join(directory, name % (t, duration)))
+
+
+def make_gps_archive(root, nfiles, start=EPOCH, duration=64,
+                     tag='L-KW_TRIGGERS', ext='xml'):
+    """Build a GPS5-directory archive, as written by KleineWelle
+
+    Files are named ``<tag>-<start>-<duration>.<ext>`` in directories
+    named ``<tag>-<gps5>``.
+    """
+    base = os.path.join(root, 'kw', tag, '{0}-{{0}}'.format(tag))
+    _make_gps_dirs(base, '%s-%%d-%%d.%s' % (tag, ext), start, nfiles,
+                   duration)
+    return Archive('kleinewelle', start, start + nfiles * duration, nfiles,
+                   base, {'base': base, 'ext': ext})
+
+
+def make_detchar_archive(root, nfiles, start=EPOCH, duration=60,
+                         ifo='L1', name='GDS_CALIB_STRAIN', etg='omicron',
+                         ext='h5'):
+    """Build a detchar archive, as written by Omicron (after O2)
+
+    The finder has no ``base`` keyword, so the archive is built under
+    ``<root>/home/detchar/triggers``, and the finder's paths must be
+    re-rooted at ``Archive.base`` to search it.
+    """
+    filetag = '%s_%s' % (name, etg.upper())
+    directory = os.path.join(root, 'home', 'detchar', 'triggers', ifo,
+                             filetag, '{0}')
+    _make_gps_dirs(directory, '%s-%s-%%d-%%d.%s' % (ifo, filetag, ext),
+                   start, nfiles, duration)
+    return Archive('detchar', start, start + nfiles * duration, nfiles,
+                   root, {'etg': etg, 'ext': ext})
+
+
+def make_dmt_omega_archive(root, nfiles, start=EPOCH, duration=64,
+                           ifo='L1', name='GDS_CALIB_STRAIN', ext='xml'):
+    """Build a DMT-Omega archive, with ``<gps5>`` directories
+    """
+    base = os.path.join(root, 'dmt', 'triggers',
+                        '%s-HOFT_Omega' % ifo[0], '{0}')
+    _make_gps_dirs(base, '%s-%s_OmegaC-%%d-%%d.%s' % (ifo, name, ext),
+                   start, nfiles, duration)
+    return Archive('dmt-omega', start, start + nfiles * duration, nfiles,
+                   base, {'base': base, 'ext': ext})
+
+
+def make_snax_archive(root, nfiles, start=EPOCH, duration=20, ifo='L1',
+                      ext='h5'):
+    """Build a SNAX archive, with ``<gps5>`` directories
+    """
+    base = os.path.join(root, 'snax', 'features')
+    _make_gps_dirs(os.path.join(base, '{0}'),
+                   '%s-SNAX_FEATURES-%%d-%%d.%s' % (ifo, ext),
+                   start, nfiles, duration)
+    return Archive('snax', start, start + nfiles * duration, nfiles,
+                   base, {'base': base, 'ext': ext})
+
+
+def make_omega_online_archive(root, nfiles, start=EPOCH, duration=64,
+                              ifo='G1', name='DER_DATA_H',
+                              filetag='DOWNSELECT', ext='txt'):
+    """Build an Omega online archive, as written for GEO600
+
+    Each ``<gps5>`` directory holds one segment directory, named
+    ``<start>-<end>``.  As for :func:`make_detchar_archive`, the archive
+    is built under ``<root>/home/omega/online``, and the finder's paths
+    must be re-rooted at ``Archive.base`` to search it.
+    """
+    directory = os.path.join(
+        root, 'home', 'omega', 'online', '%s_%s' % (ifo, name), 'segments',
+        '{0}', '{0}00000-{0}99999')
+    _make_gps_dirs(directory,
+                   '%s-OMEGA_TRIGGERS_%s-%%d-%%d.%s' % (ifo, filetag, ext),
+                   start, nfiles, duration)
+    return Archive('omega-online', start, start + nfiles * duration, nfiles,
+                   root, {'filetag': filetag, 'ext': ext})
+
+
+def make_pycbc_live_archive(root, nfiles, start=EPOCH, duration=8,
+                            ifos='H1L1'):
+    """Build a pycbc-live archive, with one ``%Y_%m_%d`` folder per day
+    """
+    base = os.path.join(root, 'pycbc.live')
+    made = set()
+    for t, day in _days(_times(start, nfiles, duration), '%Y_%m_%d'):
+        directory = os.path.join(base, day)
+        if directory not in made:
+            os.makedirs(directory, exist_ok=True)
+            made.add(directory)
+        _touch(os.path.join(
+            directory, '%s-Live-%d-%d.hdf' % (ifos, t, duration)))
+    return Archive('pycbc-live', start, start + nfiles * duration, nfiles,
+                   base, {'base': base})
+
+
+def make_daily_cbc_archive(root, nfiles, start=EPOCH, duration=2048,
+                           ifo='L1', run='bns_gds',
+                           filetag='30MILLISEC_CLUSTERED'):
+    """Build a daily-CBC archive, with one LAL cache file per UTC day
+
+    Only the cache files are written, the trigger files they list do not
+    exist (the finder never looks at them).  The finder has no ``base``
+    keyword, so ``Archive.base`` must be set as
+    ``gwtrigfind.core.DEFAULT_DAILY_CBC_BASE``.
+    """
+    base = os.path.join(root, 'daily_cbc_offline')
+    caches = {}
+    try:
+        for t, day in _days(_times(start, nfiles, duration), '%Y%m%d'):
+            try:
+                f = caches[day]
+            except KeyError:
+                directory = os.path.join(base, run, day[:6], day, 'cache')
+                os.makedirs(directory, exist_ok=True)
+                f = caches[day] = open(os.path.join(
+                    directory, '%s-INSPIRAL_%s.cache' % (ifo, filetag)), 'w')
+            name = '%s-INSPIRAL_%s-%d-%d.xml.gz' % (ifo, filetag, t, duration)
+            f.write('%s INSPIRAL_%s %d %d %s\n' % (
+                ifo[0], filetag, t, duration,
+                os.path.join(os.path.dirname(f.name), name)))
+    finally:
+        for f in caches.values():
+            f.close()
+    return Archive('daily-cbc', start, start + nfiles * duration, nfiles,
+                   base, {'run': run, 'filetag': filetag})
+
+
+#: all archive generators, keyed by kind
+GENERATORS = {
+    'kleinewelle': make_gps_archive,
+    'detchar': make_detchar_archive,
+    'dmt-omega': make_dmt_omega_archive,
+    'snax': make_snax_archive,
+    'omega-online': make_omega_online_archive,
+    'pycbc-live': make_pycbc_live_archive,
+    'daily-cbc': make_daily_cbc_archive,
+}
+
+
+def make_archives(root, nfiles, kinds=None):
+    """Build one archive of each kind under ``root``
+
+    Returns a `dict` of `Archive`, keyed by kind.
+    """
+    return {
+        kind: GENERATORS[kind](root, nfiles) for
+        kind in (kinds or GENERATORS)
+    }
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('root', help='directory in which to build archives')
+    parser.add_argument('-n', '--num-files', type=int, default=10000)
+    parser.add_argument('-k', '--kind', action='append',
+                        choices=sorted(GENERATORS))
+    opts = parser.parse_args(args=args)
+    for archive in make_archives(opts.root, opts.num_files,
+                                 kinds=opts.kind).values():
+        print('%-12s %9d files  [%d, %d) %s' % (
+            archive.kind, archive.nfiles, archive.start, archive.end,
+            datetime.timedelta(seconds=archive.end - archive.start)))
+
+
+if __name__ == '__main__':
+    main()
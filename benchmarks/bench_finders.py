@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Cardiff University (2024)
+#
+# This file is part of GWTrigFind.
+#
+# GWTrigFind is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWTrigFind is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWTrigFind.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark each finder against a synthetic archive on local disk
+
+An archive of each kind is built by :mod:`archive` under a temporary
+directory (or ``--root``), then each finder is timed for a short span
+(one hour in the middle of the archive) and a long span (the whole
+archive), with cold and warm caches:
+
+- *cold*: all in-process caches in `gwtrigfind` are cleared before each
+  run; with ``--drop-caches`` (requires root) the kernel page cache is
+  dropped too,
+- *warm*: the same query is run once before timing, and caches are kept.
+
+Run as::
+
+    python benchmarks/bench_finders.py [--num-files N] [--kind KIND]
+"""
+
+import argparse
+import contextlib
+import os
+import statistics
+import sys
+import tempfile
+import time
+from unittest import mock
+
+# run from a source checkout without installing
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from archive import (GENERATORS, make_archives)  # noqa: E402
+
+from gwtrigfind import core  # noqa: E402
+
+#: name of channel used to query each kind of archive
+CHANNELS = {
+    'kleinewelle': 'L1:TEST-CHANNEL',
+    'detchar': 'L1:GDS-CALIB_STRAIN',
+    'dmt-omega': 'L1:GDS-CALIB_STRAIN',
+    'snax': 'L1:TEST-CHANNEL',
+    'omega-online': 'G1:DER_DATA_H',
+    'pycbc-live': 'H1:GDS-CALIB_STRAIN',
+    'daily-cbc': 'L1:GDS-CALIB_STRAIN',
+}
+
+FINDERS = {
+    'kleinewelle': core.find_kleinewelle_files,
+    'detchar': core.find_detchar_files,
+    'dmt-omega': core.find_dmt_omega_files,
+    'snax': core.find_snax_files,
+    'omega-online': core.find_omega_online_files,
+    'pycbc-live': core.find_pycbc_live_files,
+    'daily-cbc': core.find_daily_cbc_files,
+}
+
+#: kinds of archive whose finder has a fixed base directory, and so
+#: must be re-rooted to search the synthetic archive
+REROOTED = {'detchar', 'omega-online'}
+
+
+def clear_caches(drop_page_cache=False):
+    """Clear all in-process (and optionally kernel) caches
+    """
+    core._compile_filename_pattern.cache_clear()
+    core._daily_cbc_caches.clear()
+    core._bases.clear()
+    core._missing.clear()
+    if drop_page_cache:
+        os.sync()
+        with open('/proc/sys/vm/drop_caches', 'w') as f:
+            f.write('3\n')
+
+
+@contextlib.contextmanager
+def rerooted(root):
+    """Re-root all base directories of GPS-directory searches at ``root``
+    """
+    plan = core._plan_gps_dirs
+    resolve = core._resolve_base
+
+    def _reroot(path):
+        if path.startswith(root):
+            return path
+        return root + path
+
+    with mock.patch.object(
+        core, '_plan_gps_dirs',
+        lambda globpath, *args, **kwargs: plan(
+            _reroot(globpath), *args, **kwargs),
+    ), mock.patch.object(
+        core, '_resolve_base',
+        lambda pattern: resolve(_reroot(pattern)),
+    ):
+        yield
+
+
+def spans(archive):
+    mid = (archive.start + archive.end) // 2
+    return (
+        ('short', max(archive.start, mid - 1800),
+         min(archive.end, mid + 1800)),
+        ('long', archive.start, archive.end),
+    )
+
+
+def run(archive, start, end, warm, repeat, drop_page_cache=False):
+    """Time one query, returning the number of files and each run time
+    """
+    finder = FINDERS[archive.kind]
+    channel = CHANNELS[archive.kind]
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(mock.patch.object(
+            core, 'DEFAULT_DAILY_CBC_BASE', archive.base))
+        if archive.kind in REROOTED:
+            stack.enter_context(rerooted(archive.base))
+
+        def query():
+            return finder(channel, start, end, **archive.kwargs)
+
+        if warm:
+            query()
+        times = []
+        for _ in range(repeat):
+            if not warm:
+                clear_caches(drop_page_cache=drop_page_cache)
+            t0 = time.perf_counter()
+            nfiles = len(query())
+            times.append(time.perf_counter() - t0)
+    return nfiles, times
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--num-files', type=int, default=10000,
+                        help='number of files in each archive')
+    parser.add_argument('-r', '--repeat', type=int, default=5)
+    parser.add_argument('-k', '--kind', action='append',
+                        choices=sorted(GENERATORS),
+                        help='kind of archive to benchmark, default: all')
+    parser.add_argument('--root', default=None,
+                        help='directory in which to build the archives, '
+                             'kept after the run, default: a temporary '
+                             'directory')
+    parser.add_argument('--drop-caches', action='store_true', default=False,
+                        help='drop the kernel page cache for cold runs')
+    opts = parser.parse_args(args=args)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = opts.root or tmpdir
+        t0 = time.perf_counter()
+        archives = make_archives(root, opts.num_files, kinds=opts.kind)
+        print('built archives of %d files in %.1f s' % (
+            opts.num_files, time.perf_counter() - t0))
+
+        print('%-12s %-6s %-5s %9s %10s %10s' % (
+            'finder', 'span', 'cache', 'files', 'best/ms', 'median/ms'))
+        for archive in archives.values():
+            for name, start, end in spans(archive):
+                for warm in (False, True):
+                    nfiles, times = run(
+                        archive, start, end, warm, opts.repeat,
+                        drop_page_cache=opts.drop_caches)
+                    print('%-12s %-6s %-5s %9d %10.3f %10.3f' % (
+                        archive.kind, name, 'warm' if warm else 'cold',
+                        nfiles, min(times) * 1e3,
+                        statistics.median(times) * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Cardiff University (2024)
+#
+# This file is part of GWTrigFind.
+#
+# GWTrigFind is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWTrigFind is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWTrigFind.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark the gap computation used by ``gwtrigfind --gaps``
+
+Compares the original `ligo.segments` path (one ``segment`` per file,
+then a generic coalesce) with the linear sweep of
+:class:`gwtrigfind.coverage.Coverage`.
+
+Run as::
+
+    python benchmarks/bench_gaps.py [--num-files N]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+import tracemalloc
+
+from ligo.segments import (segment as Segment, segmentlist as SegmentList)
+
+# run from a source checkout without installing
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from gwtrigfind.core import _file_segment  # noqa: E402
+from gwtrigfind.coverage import Coverage  # noqa: E402
+from gwtrigfind.filelist import _split_url  # noqa: E402
+
+
+def make_urls(nfiles, duration=64, every=1000):
+    start = 1238166018
+    # drop one file in every `every` to create some gaps
+    return start, start + nfiles * duration, [
+        'file:///home/detchar/triggers/L1/GDS_CALIB_STRAIN_OMICRON/'
+        '%d/L1-GDS_CALIB_STRAIN_OMICRON-%d-%d.h5' % (
+            t // 100000, t, duration)
+        for i, t in enumerate(range(start, start + nfiles * duration,
+                                    duration))
+        if i % every
+    ]
+
+
+def segments_gaps(urls, start, end):
+    """The original implementation from `gwtrigfind.cli.main`
+    """
+    segs = SegmentList([Segment(start, end)])
+    known = SegmentList(map(_file_segment, urls)) & segs
+    return segs - known
+
+
+def sweep_gaps(urls, start, end):
+    coverage = Coverage()
+    add = coverage.add
+    for url in urls:
+        _, _, _, fstart, duration, _ = _split_url(url)
+        t0 = float(fstart)
+        add(t0, t0 + float(duration))
+    return coverage.gaps(start, end)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--num-files', type=int, default=200000)
+    parser.add_argument('-r', '--repeat', type=int, default=3)
+    opts = parser.parse_args(args=args)
+
+    start, end, urls = make_urls(opts.num_files)
+    expected = segments_gaps(urls, start, end)
+    assert SegmentList(map(Segment, sweep_gaps(urls, start, end))) == (
+        expected)
+    print('%d files, %d gaps' % (len(urls), len(expected)))
+    for name, func in (('segments', segments_gaps), ('sweep', sweep_gaps)):
+        best = min(timeit.repeat(
+            lambda: func(urls, start, end),
+            number=1,
+            repeat=opts.repeat,
+        ))
+        tracemalloc.start()
+        func(urls, start, end)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print('%-9s %9.1f ms %8.3f us/file %9.1f MiB peak' % (
+            name, best * 1e3, best / len(urls) * 1e6, peak / 2**20))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Cardiff University (2024)
+#
+# This file is part of GWTrigFind.
+#
+# GWTrigFind is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWTrigFind is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWTrigFind.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark the start-up time of `gwtrigfind` and its command-line tool
+
+Each command is run in a fresh interpreter ``--repeat`` times, and the
+wall-clock time of each run is recorded; the time to start a bare
+interpreter is shown for reference. With ``--modules`` the slowest
+imports of each command (from ``python -X importtime``) are listed too.
+
+Run as::
+
+    python benchmarks/bench_import.py [--repeat N] [--modules]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+#: the root of the source checkout, in which to run each command
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#: the commands to time, as arguments to the python interpreter
+COMMANDS = {
+    'python': ['-c', 'pass'],
+    'import': ['-c', 'import gwtrigfind'],
+    'version': ['-m', 'gwtrigfind', '--version'],
+    'query': ['-m', 'gwtrigfind', 'X1:TEST-CHANNEL', 'kw', '1135641617',
+              '1135648017'],
+}
+
+
+def run(args, repeat):
+    """Time one command, returning the wall-clock time of each run
+    """
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable] + args, check=True, cwd=ROOT,
+                       stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def slowest_imports(args, count=5):
+    """Return the ``count`` slowest top-level imports of a command
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime'] + args, check=True, cwd=ROOT,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        try:
+            _, total, name = line.split('|')
+            total = int(total)
+        except ValueError:  # header
+            continue
+        if not name.startswith('  '):  # only top-level imports
+            rows.append((total, name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-r', '--repeat', type=int, default=20)
+    parser.add_argument('-m', '--modules', action='store_true',
+                        default=False,
+                        help='list the slowest imports of each command')
+    opts = parser.parse_args(args=args)
+
+    # make sure the gwtrigfind being benchmarked is the one in this tree
+    env = os.environ.get('PYTHONPATH')
+    os.environ['PYTHONPATH'] = os.pathsep.join(filter(None, (
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), env)))
+
+    print('%-8s %10s %10s' % ('command', 'best/ms', 'median/ms'))
+    for name, cmd in COMMANDS.items():
+        times = run(cmd, opts.repeat)
+        print('%-8s %10.1f %10.1f' % (
+            name, min(times) * 1e3, statistics.median(times) * 1e3))
+        if opts.modules and name != 'python':
+            for total, module in slowest_imports(cmd):
+                print('    %-30s %8.1f' % (module, total / 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Cardiff University (2024)
+#
+# This file is part of GWTrigFind.
+#
+# GWTrigFind is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWTrigFind is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWTrigFind.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark the per-file cost of scanning a GPS directory
+
+Compares the original ``glob.iglob`` + ``_file_segment`` + ``_as_url``
+loop with the compiled-regex ``os.scandir`` scanner used by
+:func:`gwtrigfind.core._search_gps_dir`.
+
+Run as::
+
+    python benchmarks/bench_scan.py [--num-files N]
+"""
+
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import timeit
+
+from ligo.segments import segment as Segment
+
+# run from a source checkout without installing
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from gwtrigfind import core  # noqa: E402
+
+PATTERN = 'L1-GDS_CALIB_STRAIN_OMICRON-%s-*.h5' % ('[0-9]' * 10)
+
+
+def make_directory(root, nfiles, duration=10):
+    start = 1135600000
+    for i in range(nfiles):
+        name = 'L1-GDS_CALIB_STRAIN_OMICRON-%d-%d.h5' % (
+            start + i * duration, duration)
+        open(os.path.join(root, name), 'w').close()
+    return start, start + nfiles * duration
+
+
+def glob_scan(directory, start, end):
+    """The original implementation of the directory scan
+    """
+    span = Segment(start, end)
+    out = []
+    for f in glob.iglob(os.path.join(directory, PATTERN)):
+        seg = Segment(*core._file_segment(f))
+        if seg.intersects(span):
+            out.append(core._as_url(f))
+    return out
+
+
+def regex_scan(directory, start, end):
+    return core._scan_dir(directory, PATTERN, start, end)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--num-files', type=int, default=10000)
+    parser.add_argument('-r', '--repeat', type=int, default=5)
+    opts = parser.parse_args(args=args)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        start, end = make_directory(tmpdir, opts.num_files)
+        assert len(glob_scan(tmpdir, start, end)) == opts.num_files
+        assert len(regex_scan(tmpdir, start, end)) == opts.num_files
+        for name, func in (('glob', glob_scan), ('scandir', regex_scan)):
+            best = min(timeit.repeat(
+                lambda: func(tmpdir, start, end),
+                number=1,
+                repeat=opts.repeat,
+            ))
+            print('%-8s %8.3f ms total %8.3f us/file' % (
+                name, best * 1e3, best / opts.num_files * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -22,7 +22,104 @@
 automated processing of data from gravitational-wave detectors.
 """
 
-from .core import *
+import importlib
+import importlib.util
+
+#: the public names provided by :mod:`gwtrigfind.core`
+_CORE = (
+    'BASE_CACHE_TTL',
+    'CADENCE_CACHE_SIZE',
+    'DAILY_CBC_CACHE_SIZE',
+    'DEFAULT_DAILY_CBC_BASE',
+    'DEFAULT_PYCBC_LIVE_BASE',
+    'DMT_OMEGA_V1_O4_EPOCH',
+    'HISTORICAL_LATENCY',
+    'MAX_FILE_DURATION',
+    'NEGATIVE_CACHE_SIZE',
+    'NEGATIVE_CACHE_TTL',
+    'OMICRON_O2_EPOCH',
+    'PROCESS_CHUNK',
+    'RESULT_CACHE_SIZE',
+    'TriggerFileList',
+    'channel_delim',
+    'daily_cbc',
+    'disable_result_cache',
+    'dmt_omega',
+    'enable_result_cache',
+    'explain_trigger_files',
+    'find_daily_cbc_files',
+    'find_detchar_files',
+    'find_dmt_omega_files',
+    'find_kleinewelle_files',
+    'find_omega_online_files',
+    'find_pycbc_live_files',
+    'find_snax_files',
+    'find_trigger_file_at',
+    'find_trigger_files',
+    'find_trigger_files_many',
+    'find_trigger_urls',
+    'iter_daily_cbc_files',
+    'iter_detchar_files',
+    'iter_dmt_omega_files',
+    'iter_kleinewelle_files',
+    'iter_omega_online_files',
+    'iter_pycbc_live_files',
+    'iter_snax_files',
+    'iter_trigger_files',
+    'kleinewelle',
+    'omega',
+    'pycbc_live',
+    'snax',
+)
+
+#: the submodule that provides each public name, names not listed here
+#: come from :mod:`gwtrigfind.core`; modules are only imported when one
+#: of their names is first used, to keep ``import gwtrigfind`` (and so
+#: the command-line tool) fast
+_LAZY = {
+    'Catalog': 'catalog',
+    'enable_catalog': 'catalog',
+    'disable_catalog': 'catalog',
+    'enable_manifests': 'manifest',
+    'disable_manifests': 'manifest',
+    'follow_trigger_files': 'follow',
+    'afind_trigger_files': 'aio',
+    'afind_daily_cbc_files': 'aio',
+    'afind_detchar_files': 'aio',
+    'afind_dmt_omega_files': 'aio',
+    'afind_kleinewelle_files': 'aio',
+    'afind_omega_online_files': 'aio',
+    'afind_pycbc_live_files': 'aio',
+    'afind_snax_files': 'aio',
+}
+
+
+def __getattr__(name):
+    if name.startswith('_'):
+        raise AttributeError(
+            "module {0!r} has no attribute {1!r}".format(__name__, name))
+    if name not in _LAZY and importlib.util.find_spec(
+            '{0}.{1}'.format(__name__, name)) is not None:
+        # a submodule, e.g. gwtrigfind.core
+        return importlib.import_module('.' + name, __name__)
+    module = importlib.import_module(
+        '.' + _LAZY.get(name, 'core'), __name__)
+    try:
+        value = getattr(module, name)
+    except AttributeError:
+        raise AttributeError(
+            "module {0!r} has no attribute {1!r}".format(__name__, name),
+        ) from None
+    globals()[name] = value
+    return value
+
+
+__all__ = list(_CORE) + list(_LAZY)
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
 
 try:
     from ._version import version as __version__
@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Cardiff University (2024)
+#
+# This file is part of GWTrigFind.
+#
+# GWTrigFind is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWTrigFind is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWTrigFind.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Asynchronous (`asyncio`) versions of the trigger file finders
+
+Each coroutine plans the same search as its synchronous counterpart in
+:mod:`gwtrigfind.core`, then runs the filesystem access for each
+directory (or day) in the event loop's executor, with at most
+``concurrency`` operations in flight at once, so that the event loop
+is never blocked by a slow filesystem.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from . import (core, instrument)
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+#: default number of concurrent filesystem operations per search
+DEFAULT_CONCURRENCY = 8
+
+
+def _run_abandonable(loop, func, item):
+    """Call ``func(item)`` on a daemon thread that can be abandoned
+
+    Returns a future that the thread resolves (via the event loop) when
+    the call returns; a thread that never returns (e.g. on a hung NFS
+    mount) doesn't hold up the loop, or any executor.
+    """
+    future = loop.create_future()
+
+    def _settle(method, value):
+        def _set():
+            if not future.done():  # e.g. cancelled by a timeout
+                method(value)
+        try:
+            loop.call_soon_threadsafe(_set)
+        except RuntimeError:  # the loop has closed, nobody is waiting
+            pass
+
+    def _call(item):
+        try:
+            result = func(item)
+        except Exception as exc:
+            _settle(future.set_exception, exc)
+        else:
+            _settle(future.set_result, result)
+
+    core._Task(_call, item)
+    return future
+
+
+async def _run_plan(planner, channel, start, end, concurrency, timeout=None,
+                    query_timeout=None, timedout=None, **kwargs):
+    """Plan and execute a search in the background
+
+    The planning, and the search of each directory (or day), run in a
+    pool of at most ``concurrency`` threads dedicated to this search, so
+    that a slow filesystem doesn't starve the event loop's default
+    executor.
+
+    With ``timeout`` or ``query_timeout`` (as for
+    :func:`gwtrigfind.find_trigger_files`) each directory (or day) is
+    instead searched on its own daemon thread, and abandoned once it runs
+    out of time; its paths are appended to ``timedout`` (and the
+    ``timedout`` attribute of the result) instead.
+    """
+    if timedout is None:
+        timedout = []
+    segments = core._parse_segments(start, end)
+    if not segments:
+        files = core.TriggerFileList()
+        files.timedout = timedout
+        return files
+    loop = asyncio.get_running_loop()
+    final = float('inf') if query_timeout is None else (
+        loop.time() + query_timeout)
+    name = core._finder_name(planner)
+    concurrency = max(concurrency or 1, 1)
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        func, items = await loop.run_in_executor(
+            executor,
+            instrument.bind(name, partial(planner, channel, segments,
+                                          **kwargs)),
+        )
+        func = instrument.bind(name, func)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _search(item):
+            # returns `None` if the item timed out
+            async with semaphore:
+                limit = final - loop.time()
+                if timeout is not None:
+                    limit = min(limit, timeout)
+                if limit <= 0:
+                    return None
+                if limit == float('inf'):
+                    return await loop.run_in_executor(executor, func, item)
+                try:
+                    return await asyncio.wait_for(
+                        _run_abandonable(loop, func, item), limit)
+                except asyncio.TimeoutError:
+                    return None
+
+        items = list(items)
+        chunks = await asyncio.gather(*map(_search, items))
+    finally:
+        executor.shutdown(wait=False)
+    for item, chunk in zip(items, chunks):
+        if chunk is None:
+            timedout.extend(core._item_paths(item))
+    files = core.TriggerFileList._from_records(
+        core._iter_unique(chunk for chunk in chunks if chunk is not None))
+    files.timedout = timedout
+    return files
+
+
+async def afind_trigger_files(channel, etg, start, end=None,
+                              concurrency=DEFAULT_CONCURRENCY, **kwargs):
+    """Find the paths of trigger files for this channel and ETG.
+
+    This is the `asyncio` version of
+    :func:`gwtrigfind.find_trigger_files`.
+
+    Parameters
+    ----------
+    channel : `str`
+        name of data channel for which to search
+
+    etg : `str`
+        name of trigger generator that processed the data
+
+    start : `int`, `list` of `tuple`
+        GPS start time of search, or a list of ``(start, end)`` GPS
+        segments to search (in which case ``end`` must not be given)
+
+    end : `int`, optional
+        GPS end time of search
+
+    concurrency : `int`, optional
+        maximum number of filesystem operations to run at once
+
+    **kwargs
+        custom keyword arguments to pass down to the underlying finder,
+        including ``timeout``, ``query_timeout`` and ``timedout`` (see
+        :func:`gwtrigfind.find_trigger_files`); ``jobs`` and ``processes``
+        are ignored
+
+    Returns
+    -------
+    files : `~gwtrigfind.TriggerFileList`
+        a list of file URLs
+
+    Examples
+    --------
+    >>> import asyncio
+    >>> from gwtrigfind import afind_trigger_files
+    >>> cache = asyncio.run(afind_trigger_files(
+    ...     'L1:GDS-CALIB_STRAIN', 'Omicron', 1135641617, 1135728017))
+    """
+    kwargs.pop('jobs', None)
+    kwargs.pop('processes', None)
+    planner = core._resolve_etg(etg, kwargs)
+    return await _run_plan(planner, channel, start, end, concurrency,
+                           **kwargs)
+
+
+async def afind_detchar_files(channel, start, end=None, etg='omicron',
+                              ext='h5', maxdur=None,
+                              concurrency=DEFAULT_CONCURRENCY, timeout=None,
+                              query_timeout=None, timedout=None):
+    """Find files in the detchar home directory following T1300468
+
+    See :func:`gwtrigfind.find_detchar_files` for details, and
+    :func:`gwtrigfind.find_trigger_files` for ``timeout``,
+    ``query_timeout`` and ``timedout``.
+    """
+    return await _run_plan(core._plan_detchar_files, channel, start, end,
+                           concurrency, etg=etg, ext=ext, maxdur=maxdur,
+                           timeout=timeout,
+                           query_timeout=query_timeout, timedout=timedout)
+
+
+async def afind_kleinewelle_files(channel, start, end=None, base=None,
+                                  ext='xml', maxdur=None,
+                                  concurrency=DEFAULT_CONCURRENCY,
+                                  timeout=None, query_timeout=None,
+                                  timedout=None):
+    """Find KleineWelle output event files
+
+    See :func:`gwtrigfind.find_kleinewelle_files` for details, and
+    :func:`gwtrigfind.find_trigger_files` for ``timeout``,
+    ``query_timeout`` and ``timedout``.
+    """
+    return await _run_plan(core._plan_kleinewelle_files, channel, start, end,
+                           concurrency, base=base, ext=ext, maxdur=maxdur,
+                           timeout=timeout,
+                           query_timeout=query_timeout, timedout=timedout)
+
+
+async def afind_dmt_omega_files(channel, start, end=None, base=None, ext='xml',
+                                maxdur=None, concurrency=DEFAULT_CONCURRENCY,
+                                timeout=None, query_timeout=None,
+                                timedout=None):
+    """Find DMT-Omega trigger XML files
+
+    See :func:`gwtrigfind.find_dmt_omega_files` for details, and
+    :func:`gwtrigfind.find_trigger_files` for ``timeout``,
+    ``query_timeout`` and ``timedout``.
+    """
+    return await _run_plan(core._plan_dmt_omega_files, channel, start, end,
+                           concurrency, base=base, ext=ext, maxdur=maxdur,
+                           timeout=timeout,
+                           query_timeout=query_timeout, timedout=timedout)
+
+
+async def afind_pycbc_live_files(channel, start, end=None,
+                                 base=core.DEFAULT_PYCBC_LIVE_BASE,
+                                 concurrency=DEFAULT_CONCURRENCY,
+                                 timeout=None, query_timeout=None,
+                                 timedout=None):
+    """Find CBC pycbc live trigger files
+
+    Each day directory is searched concurrently.
+
+    See :func:`gwtrigfind.find_pycbc_live_files` for details, and
+    :func:`gwtrigfind.find_trigger_files` for ``timeout``,
+    ``query_timeout`` and ``timedout``.
+    """
+    return await _run_plan(core._plan_pycbc_live_files, channel, start, end,
+                           concurrency, base=base, timeout=timeout,
+                           query_timeout=query_timeout, timedout=timedout)
+
+
+async def afind_daily_cbc_files(channel, start, end=None, run='bns_gds',
+                                filetag='30MILLISEC_CLUSTERED', ext='xml.gz',
+                                concurrency=DEFAULT_CONCURRENCY, timeout=None,
+                                query_timeout=None, timedout=None):
+    """Find daily CBC analysis trigger files
+
+    The cache file for each day is read concurrently.
+
+    See :func:`gwtrigfind.find_daily_cbc_files` for details, and
+    :func:`gwtrigfind.find_trigger_files` for ``timeout``,
+    ``query_timeout`` and ``timedout``.
+    """
+    return await _run_plan(core._plan_daily_cbc_files, channel, start, end,
+                           concurrency, run=run, filetag=filetag, ext=ext,
+                           timeout=timeout,
+                           query_timeout=query_timeout, timedout=timedout)
+
+
+async def afind_omega_online_files(channel, start, end=None,
+                                   filetag='DOWNSELECT', ext='txt',
+                                   concurrency=DEFAULT_CONCURRENCY,
+                                   timeout=None, query_timeout=None,
+                                   timedout=None):
+    """Find Omega triggers produced by online processes
+
+    See :func:`gwtrigfind.find_omega_online_files` for details, and
+    :func:`gwtrigfind.find_trigger_files` for ``timeout``,
+    ``query_timeout`` and ``timedout``.
+    """
+    return await _run_plan(core._plan_omega_online_files, channel, start,
+                           end, concurrency, filetag=filetag, ext=ext,
+                           timeout=timeout,
+                           query_timeout=query_timeout, timedout=timedout)
+
+
+async def afind_snax_files(channel, start, end=None, base=None, ext='h5',
+                           maxdur=None, concurrency=DEFAULT_CONCURRENCY,
+                           timeout=None, query_timeout=None, timedout=None):
+    """Find SNAX trigger files
+
+    See :func:`gwtrigfind.find_snax_files` for details, and
+    :func:`gwtrigfind.find_trigger_files` for ``timeout``,
+    ``query_timeout`` and ``timedout``.
+    """
+    return await _run_plan(core._plan_snax_files, channel, start, end,
+                           concurrency, base=base, ext=ext, maxdur=maxdur,
+                           timeout=timeout,
+                           query_timeout=query_timeout, timedout=timedout)
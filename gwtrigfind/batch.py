@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Cardiff University (2024)
+#
+# This file is part of GWTrigFind.
+#
+# GWTrigFind is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWTrigFind is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWTrigFind.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Answer many trigger-file queries, read as JSON lines, in one process
+
+``gwtrigfind --batch`` reads one query per line, each a JSON object
+with the keys ``channel``, ``etg``, ``gpsstart`` and ``gpsend``, and
+optionally the finder options ``ext``, ``run`` and ``filetag`` (as for
+``--file-type``, ``--run-type`` and ``--file-tag``), e.g.::
+
+    {"channel": "L1:TEST", "etg": "kw", "gpsstart": 0, "gpsend": 100}
+
+All queries share one record of directory listings (as for
+:func:`gwtrigfind.find_trigger_files_many`), and the in-memory caches
+of directory contents and daily-CBC cache files, so each directory is
+only listed once no matter how many queries need it.
+
+One JSON object is written per query, in the same order, with the
+``query`` itself, the ``files`` found, and the paths that ``timedout``;
+if a query fails, ``files`` is empty and ``error`` describes why.
+"""
+
+import argparse
+import json
+import sys
+from functools import lru_cache
+
+from . import (cli, core)
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+#: finder options accepted in each query, and the command-line option
+#: that sets the same thing
+QUERY_OPTIONS = {
+    'ext': 'file_type',
+    'run': 'run_type',
+    'filetag': 'file_tag',
+}
+
+
+@lru_cache()
+def _daily_cbc_defaults():
+    """Return the default daily-CBC options of the command-line tool
+    """
+    parser = cli.create_parser()
+    return {key: parser.get_default(QUERY_OPTIONS[key]) for
+            key in ('run', 'filetag')}
+
+
+def _query_kwargs(query):
+    """Return the finder keyword arguments for one query
+    """
+    unknown = set(query) - {
+        'channel', 'etg', 'gpsstart', 'gpsend'} - set(QUERY_OPTIONS)
+    if unknown:
+        raise ValueError("unknown query keys: %s" % ', '.join(sorted(
+            unknown)))
+    kwargs = {key: query[key] for key in QUERY_OPTIONS if key in query}
+    if core.daily_cbc.match(query['etg']):
+        for key, value in _daily_cbc_defaults().items():
+            kwargs.setdefault(key, value)
+    elif 'run' in kwargs or 'filetag' in kwargs:
+        raise ValueError("'run' and 'filetag' are only valid for daily-cbc")
+    return kwargs
+
+
+def answer(line, **kwargs):
+    """Answer one query
+
+    Parameters
+    ----------
+    line : `str`
+        the query, as one line of JSON
+
+    **kwargs
+        other keyword arguments to pass to
+        :func:`gwtrigfind.find_trigger_files` (e.g. ``jobs``, ``timeout``)
+
+    Returns
+    -------
+    result : `dict`
+        the ``query``, the ``files`` found, the paths that ``timedout``,
+        and (if the query failed) the ``error``
+    """
+    result = {'query': None, 'files': [], 'timedout': []}
+    try:
+        result['query'] = query = json.loads(line)
+        kwargs.update(_query_kwargs(query))
+        files = core.find_trigger_files(
+            query['channel'], query['etg'], int(query['gpsstart']),
+            int(query['gpsend']), **kwargs)
+    except Exception as exc:
+        if result['query'] is None:  # invalid JSON, return the line
+            result['query'] = line.rstrip('\n')
+        result['error'] = '{0}: {1}'.format(type(exc).__name__, exc)
+        return result
+    result['files'] = list(files)
+    result['timedout'] = files.timedout
+    return result
+
+
+def run_batch(lines, output, parallel=None, **kwargs):
+    """Answer a stream of queries, writing one result per query
+
+    Parameters
+    ----------
+    lines : `iterable` of `str`
+        the queries, one JSON object per line, blank lines are ignored
+
+    output : `file`
+        the open file to which to write results
+
+    parallel : `int`, optional
+        the number of queries to answer concurrently, at most
+        ``2 * parallel`` queries are read ahead of the results written
+
+    **kwargs
+        other keyword arguments to pass to :func:`answer`
+
+    Returns
+    -------
+    nfailed : `int`
+        the number of queries that failed or timed out
+    """
+    nfailed = 0
+    with core._shared_listings():
+        for result in core._map(
+                lambda line: answer(line, **kwargs),
+                (line for line in lines if line.strip()),
+                jobs=parallel):
+            nfailed += bool('error' in result or result['timedout'])
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+    return nfailed
+
+
+# -- command line -------------------------------------------------------------
+
+def create_parser():
+    """Create a command-line argument parser for ``gwtrigfind --batch``
+    """
+    parser = argparse.ArgumentParser(
+        prog='gwtrigfind --batch',
+        description=__doc__.split('\n', 1)[0],
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        'input',
+        nargs='?',
+        default='-',
+        help="file of JSON-lines queries, '-' to read from stdin",
+    )
+    parser.add_argument(
+        '-o',
+        '--output',
+        metavar='FILE',
+        default=None,
+        help='write JSON-lines results to FILE rather than stdout',
+    )
+    parser.add_argument(
+        '-p',
+        '--parallel',
+        type=int,
+        default=None,
+        metavar='N',
+        help='number of queries to answer concurrently',
+    )
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=None,
+        metavar='N',
+        help='number of directories to list concurrently for each query',
+    )
+    parser.add_argument(
+        '--timeout',
+        type=float,
+        default=None,
+        metavar='SECONDS',
+        help='maximum time to spend searching each directory',
+    )
+    parser.add_argument(
+        '--query-timeout',
+        type=float,
+        default=None,
+        metavar='SECONDS',
+        help='maximum time to spend on each query',
+    )
+    return parser
+
+
+def main(args=None):
+    """Run ``gwtrigfind --batch``
+
+    The exit code is 1 if any query failed or timed out.
+    """
+    opts = create_parser().parse_args(args=args)
+    kwargs = {
+        key: val for key, val in (
+            ('jobs', opts.jobs),
+            ('timeout', opts.timeout),
+            ('query_timeout', opts.query_timeout),
+        ) if val is not None
+    }
+    source = sys.stdin if opts.input == '-' else open(opts.input, 'r')
+    output = sys.stdout if opts.output is None else open(opts.output, 'w')
+    try:
+        nfailed = run_batch(source, output, parallel=opts.parallel,
+                            **kwargs)
+    finally:
+        for stream in (source, output):
+            if stream not in (sys.stdin, sys.stdout):
+                stream.close()
+    if nfailed:
+        print('%d queries failed or timed out' % nfailed, file=sys.stderr)
+    return int(bool(nfailed))
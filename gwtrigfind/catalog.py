@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Cardiff University (2024)
+#
+# This file is part of GWTrigFind.
+#
+# GWTrigFind is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWTrigFind is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWTrigFind.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Persistent on-disk catalog of trigger directory listings
+
+The catalog records the contents of each directory searched by
+:func:`gwtrigfind.find_trigger_files` in an SQLite database, with the
+GPS start time and duration of each file already parsed from its name.
+Directories are only re-listed when their modification time changes.
+"""
+
+import fnmatch
+import glob
+import os
+import re
+import threading
+import time
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+#: name of the environment variable that sets the default cache directory
+CACHE_DIR_ENV = 'GWTRIGFIND_CACHE_DIR'
+
+#: directories modified more recently than this (seconds) are always
+#: re-listed, to protect against coarse mtime resolution on NFS
+MTIME_SETTLE = 2.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS directories (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    directory INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    start REAL NOT NULL,
+    duration REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_span ON files (directory, start);
+"""
+
+_catalog = None
+
+
+def default_cache_dir():
+    """Return the default directory in which to store the catalog
+
+    This is ``$GWTRIGFIND_CACHE_DIR`` if set, otherwise
+    ``$XDG_CACHE_HOME/gwtrigfind`` (``~/.cache/gwtrigfind``).
+    """
+    try:
+        return os.environ[CACHE_DIR_ENV]
+    except KeyError:
+        xdg = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+            os.path.expanduser('~'), '.cache')
+        return os.path.join(xdg, 'gwtrigfind')
+
+
+def _parse_name(name):
+    """Parse the GPS ``(start, duration)`` from a T050017 file name
+
+    Returns `None` if the name doesn't follow the convention.
+    """
+    try:
+        _, _, a, b = name.split('-')
+        return float(a), float(b.split('.')[0])
+    except ValueError:
+        return None
+
+
+class Catalog(object):
+    """An SQLite-backed catalog of trigger directory listings
+
+    Parameters
+    ----------
+    cachedir : `str`, optional
+        directory in which to store the catalog database, defaults to
+        :func:`default_cache_dir`
+
+    filename : `str`, optional
+        name of the database file inside ``cachedir``
+    """
+    def __init__(self, cachedir=None, filename='catalog.sqlite'):
+        if cachedir is None:
+            cachedir = default_cache_dir()
+        os.makedirs(cachedir, exist_ok=True)
+        self.path = os.path.join(cachedir, filename)
+        self._lock = threading.Lock()
+        import sqlite3
+        self._db = sqlite3.connect(self.path, timeout=30,
+                                   check_same_thread=False)
+        with self._lock:
+            self._db.executescript(_SCHEMA)
+
+    def close(self):
+        """Close the connection to the database
+        """
+        self._db.close()
+
+    def refresh(self, directory):
+        """Update the listing of a directory if it has changed
+
+        Parameters
+        ----------
+        directory : `str`
+            path of directory to refresh
+
+        Returns
+        -------
+        dirid : `int`, `None`
+            the catalog ID of the directory, or `None` if the directory
+            doesn't exist
+        """
+        return self._refresh(os.path.abspath(directory))
+
+    def _refresh(self, directory):
+        """Refresh a directory, see `refresh`
+
+        The directory is only listed (which may be slow, e.g. on NFS)
+        while the database is not locked, so that other threads can use
+        the catalog meanwhile.
+        """
+        db = self._db
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            mtime = None
+        settled = (
+            mtime is not None
+            and time.time() - mtime * 1e-9 > MTIME_SETTLE
+        )
+        with self._lock:
+            row = db.execute(
+                'SELECT id, mtime FROM directories WHERE path = ?',
+                (directory,),
+            ).fetchone()
+        if row is not None and row[1] == mtime and settled:  # fresh
+            return row[0]
+
+        names = None
+        if mtime is not None:
+            try:
+                names = os.listdir(directory)
+            except OSError:
+                pass
+
+        with self._lock, db:
+            # another thread may have updated the directory meanwhile
+            row = db.execute(
+                'SELECT id, mtime FROM directories WHERE path = ?',
+                (directory,),
+            ).fetchone()
+            if row is not None:
+                db.execute('DELETE FROM files WHERE directory = ?', (row[0],))
+            if names is None:  # directory is gone (or unreadable)
+                if row is not None:
+                    db.execute('DELETE FROM directories WHERE id = ?',
+                               (row[0],))
+                return None
+            if row is None:
+                dirid = db.execute(
+                    'INSERT INTO directories (path, mtime) VALUES (?, ?)',
+                    (directory, mtime),
+                ).lastrowid
+            else:
+                dirid = row[0]
+                db.execute('UPDATE directories SET mtime = ? WHERE id = ?',
+                           (mtime, dirid))
+            db.executemany(
+                'INSERT INTO files (directory, name, start, duration) '
+                'VALUES (?, ?, ?, ?)',
+                ((dirid, name) + seg for name, seg in
+                 ((n, _parse_name(n)) for n in names) if seg is not None),
+            )
+        return dirid
+
+    def find(self, directory, pattern, start, end):
+        """Find files in a directory that overlap a GPS span
+
+        Parameters
+        ----------
+        directory : `str`
+            path of the directory to search
+
+        pattern : `str`
+            glob-style pattern that file names must match
+
+        start : `float`
+            GPS start time of search
+
+        end : `float`
+            GPS end time of search
+
+        Returns
+        -------
+        paths : `list` of `str`
+            the paths of matching files, sorted by start time
+        """
+        return [path for _, _, path in
+                self._find(directory, pattern, start, end)]
+
+    def _find(self, directory, pattern, start, end):
+        """Find files in a directory, see `find`
+
+        Returns ``(start, end, path)`` for each file.
+        """
+        directory = os.path.abspath(directory)
+        match = re.compile(fnmatch.translate(pattern)).match
+        dirid = self._refresh(directory)
+        if dirid is None:
+            return []
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT start, duration, name FROM files WHERE directory = ? '
+                'AND start < ? AND start + duration > ? '
+                'ORDER BY start, name',
+                (dirid, end, start),
+            ).fetchall()
+        join = os.path.join
+        return [(fstart, fstart + duration, join(directory, name)) for
+                fstart, duration, name in rows if match(name)]
+
+    def glob(self, pathname, start, end):
+        """Find files matching a glob pattern that overlap a GPS span
+
+        Wildcards in the directory components of ``pathname`` are
+        expanded on the live filesystem, each matching directory is then
+        answered from the catalog.
+
+        Parameters
+        ----------
+        pathname : `str`
+            glob-style path pattern for files
+
+        start : `float`
+            GPS start time of search
+
+        end : `float`
+            GPS end time of search
+
+        Returns
+        -------
+        paths : `list` of `str`
+            the paths of matching files
+        """
+        return [path for _, _, path in self.records(pathname, start, end)]
+
+    def records(self, pathname, start, end):
+        """Find files matching a glob pattern that overlap a GPS span
+
+        This is the same as `glob`, but returns the GPS segment of each
+        file (as stored in the catalog) along with its path.
+
+        Returns
+        -------
+        records : `list` of `tuple`
+            ``(start, end, path)`` for each matching file
+        """
+        dirname, pattern = os.path.split(pathname)
+        if glob.has_magic(dirname):
+            dirs = sorted(glob.glob(dirname))
+        else:
+            dirs = [dirname]
+        out = []
+        for directory in dirs:
+            out.extend(self._find(directory, pattern, start, end))
+        return out
+
+
+def get_catalog():
+    """Return the active `Catalog`, or `None` if the catalog is disabled
+    """
+    return _catalog
+
+
+def enable_catalog(cachedir=None):
+    """Enable the persistent directory catalog for all searches
+
+    Parameters
+    ----------
+    cachedir : `str`, optional
+        directory in which to store the catalog database, defaults to
+        :func:`default_cache_dir`
+
+    Returns
+    -------
+    catalog : `Catalog`
+        the new active catalog
+    """
+    global _catalog
+    disable_catalog()
+    _catalog = Catalog(cachedir=cachedir)
+    return _catalog
+
+
+def disable_catalog():
+    """Disable the persistent directory catalog
+
+    All searches will revert to listing directories directly.
+    """
+    global _catalog
+    if _catalog is not None:
+        _catalog.close()
+    _catalog = None
@@ -22,18 +22,15 @@
 from __future__ import print_function
 
 import argparse
+import json
 import os.path
 import sys
 
-try:
-    from urllib.parse import urlparse
-except ImportError:  # python < 3
-    from urlparse import urlparse
-
-from ligo.segments import (segment as Segment, segmentlist as SegmentList)
-
 import gwtrigfind
-from .core import _file_segment as file_segment
+from . import instrument
+from .coverage import Coverage
+from .filelist import _split_url as split_url
+from .output import (FORMATS, open_output)
 
 __author__ = "Duncan Macleod <duncan.macleod@ligo.org>"
 __version__ = gwtrigfind.__version__
@@ -68,11 +65,13 @@ def create_parser():
     parser.add_argument(
         "gpsstart",
         type=int,
+        nargs="?",
         help="GPS start time of search",
     )
     parser.add_argument(
         "gpsend",
         type=int,
+        nargs="?",
         help="GPS end time of search",
     )
 
@@ -88,29 +87,148 @@ def create_parser():
             "1, some files found with gaps"
         ),
     )
+    parser.add_argument(
+        "-s",
+        "--segments-file",
+        metavar="FILE",
+        default=None,
+        help=(
+            "path of file listing GPS segments to search, one "
+            "'start end' or 'index start end duration' per line; "
+            "if gpsstart and gpsend are also given, only the parts "
+            "of these segments inside that span are searched"
+        ),
+    )
     parser.add_argument(
         "-t",
         "--file-type",
         default=None,
         help="type of files to find, only used for some ETGs",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        metavar="N",
+        help="number of directories to list concurrently",
+    )
+    parser.add_argument(
+        "-P",
+        "--processes",
+        type=int,
+        default=None,
+        metavar="N",
+        help=(
+            "number of processes across which to split long searches, "
+            "in GPS-aligned chunks"
+        ),
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help=(
+            "maximum time to spend searching each directory, directories "
+            "that time out are reported on stderr (as unknown coverage "
+            "with --gaps) and the exit code is 1"
+        ),
+    )
+    parser.add_argument(
+        "--query-timeout",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help=(
+            "maximum time to spend on the whole search, directories not "
+            "searched in time are reported as for --timeout"
+        ),
+    )
+    parser.add_argument(
+        "-F",
+        "--follow",
+        action="store_true",
+        default=False,
+        help=(
+            "after finding existing files, keep running and print new "
+            "files as they are written, until gpsend (if given)"
+        ),
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        default=False,
+        help=(
+            "answer many queries, read as JSON lines from stdin (or a "
+            "file), in one process, see 'gwtrigfind --batch --help'"
+        ),
+    )
+    parser.add_argument(
+        "--explain",
+        action="store_true",
+        default=False,
+        help="print the search plan, rather than searching for files",
+    )
+    parser.add_argument(
+        "--socket",
+        metavar="PATH",
+        default=os.environ.get("GWTRIGFIND_SOCKET") or None,
+        help=(
+            "path of the socket of a running 'gwtrigfind serve' daemon "
+            "to forward this query to, if the daemon can't be reached "
+            "the query is run in this process; "
+            "defaults to $GWTRIGFIND_SOCKET"
+        ),
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        default=False,
+        help=(
+            "write a JSON report of the filesystem operations performed, "
+            "and the time they took, to stderr"
+        ),
+    )
 
     outopts = parser.add_argument_group(
         "output options",
     )
+    outopts.add_argument(
+        "--format",
+        choices=list(FORMATS),
+        default=None,
+        help=(
+            "output format, one of: %(choices)s; 'binary' is a compact "
+            "columnar cache that can be read with "
+            "gwtrigfind.output.read_binary_cache (default: url)"
+        ),
+    )
+    outopts.add_argument(
+        "-o",
+        "--output",
+        metavar="FILE",
+        default=None,
+        help=(
+            "write output to FILE rather than stdout, compressed with "
+            "gzip if FILE ends with .gz"
+        ),
+    )
     outopts.add_argument(
         "-l",
         "--lal-cache",
         action="store_true",
         default=False,
-        help="format output for use as a LAL cache file",
+        help="format output for use as a LAL cache file, same as "
+             "--format lal",
     )
     outopts.add_argument(
         "-n",
         "--names-only",
         action="store_true",
         default=False,
-        help="print the names of files, rather than full URLs",
+        help="print the names of files, rather than full URLs, same as "
+             "--format path",
     )
 
     cbcopts = parser.add_argument_group(
@@ -140,25 +258,170 @@ def create_parser():
     return parser
 
 
+def read_segments(path):
+    """Read a list of GPS segments from a file
+
+    Each line should contain either ``start end``, or
+    ``index start end duration`` (as written by ``ligolw_segment_query``);
+    blank lines and lines starting with ``#`` are ignored.
+
+    Returns a `~ligo.segments.segmentlist`, which is not coalesced.
+    """
+    from ligo.segments import (segment as Segment,
+                               segmentlist as SegmentList)
+    segs = SegmentList()
+    with open(path, "r") as f:
+        for line in f:
+            words = line.split()
+            if not words or words[0].startswith("#"):
+                continue
+            if len(words) == 4:
+                words = words[1:3]
+            elif len(words) != 2:
+                raise ValueError(
+                    "cannot parse segment from line {0!r} in {1}".format(
+                        line.rstrip(), path))
+            segs.append(Segment(*map(float, words)))
+    return segs
+
+
+def check_args(parser, opts):
+    """Check that the parsed arguments are consistent
+    """
+    if opts.format is None:
+        if opts.lal_cache:
+            opts.format = "lal"
+        elif opts.names_only:
+            opts.format = "path"
+        else:
+            opts.format = "url"
+    elif opts.lal_cache or opts.names_only:
+        parser.error("--lal-cache and --names-only cannot be used with "
+                     "--format")
+    if FORMATS[opts.format].binary and opts.output is None:
+        parser.error("--format %s requires --output" % opts.format)
+    if opts.follow:
+        if opts.gpsstart is None:
+            parser.error("--follow requires gpsstart")
+        if opts.segments_file is not None or opts.gaps:
+            parser.error("--follow cannot be used with --segments-file "
+                         "or --gaps")
+        return
+    if (opts.gpsstart is None) != (opts.gpsend is None):
+        parser.error("gpsstart and gpsend must be given together")
+    if opts.gpsstart is None and opts.segments_file is None:
+        parser.error("please give gpsstart and gpsend, or --segments-file")
+
+
 def main(args=None):
     """Run the tool.
     """
+    if args is None:
+        args = sys.argv[1:]
+    if args[:1] == ["serve"]:
+        from .daemon import main as serve
+        return serve(args[1:])
+    if args[:1] == ["index"]:
+        from .manifest import main as index
+        return index(args[1:])
+    if "--batch" in args:
+        from .batch import main as batch
+        return batch([arg for arg in args if arg != "--batch"])
 
-    # parse args and simplify variables
     parser = create_parser()
     opts = parser.parse_args(args=args)
-    start = int(opts.gpsstart)
-    end = int(opts.gpsend)
+    check_args(parser, opts)
+
+    # forward to a running daemon, if possible (the daemon returns all
+    # output at once, so can't stream output from --follow)
+    if opts.socket and not opts.follow:
+        from .daemon import forward
+        status = forward(opts.socket, args)
+        if status is not None:
+            return status
+
+    return run(opts)
+
+
+def run(opts, stdout=None, stderr=None):
+    """Execute a query from parsed command-line arguments
+
+    Parameters
+    ----------
+    opts : `argparse.Namespace`
+        the arguments parsed by :func:`create_parser`, which must have
+        passed :func:`check_args`
+
+    stdout, stderr : `file`, optional
+        where to write results and diagnostics, defaults to
+        `sys.stdout` and `sys.stderr`
+
+    Returns
+    -------
+    status : `int`
+        the exit code for the query
+    """
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+    if not opts.profile:
+        return _run(opts, stdout, stderr)
+    with instrument.profile() as prof, instrument.finder("cli"):
+        status = _run(opts, stdout, stderr)
+        stdout.flush()
+    json.dump(prof.to_dict(), stderr, indent=2)
+    print(file=stderr)
+    return status
+
+
+def _write(writer, files, opts, coverage):
+    """Write files as they are found, recording their coverage
+    """
+    # parse each file name once, and only if needed
+    gaps = opts.gaps
+    parse = gaps or writer.parse
+    timed = instrument.timed
+    for e in files:
+        if parse:
+            try:
+                fields = timed("parse", split_url, e)
+            except ValueError:
+                fields = None
+            if gaps and fields is not None:
+                t0 = float(fields[3])
+                coverage.add(t0, t0 + float(fields[4]))
+            writer.write(e, fields)
+        else:
+            writer.write(e)
+        if opts.follow:
+            writer.flush()
+    writer.close()
+
+
+def _run(opts, stdout, stderr):
+    # simplify variables
     gaps = opts.gaps
 
     # -- find files
 
-    segs = SegmentList([Segment(start, end)])
+    if opts.follow:
+        segs = []
+    elif opts.segments_file is None:
+        segs = [tuple(sorted((opts.gpsstart, opts.gpsend)))]
+    else:
+        from ligo.segments import (segment as Segment,
+                                   segmentlist as SegmentList)
+        segs = read_segments(opts.segments_file).coalesce()
+        if opts.gpsstart is not None:
+            segs &= SegmentList([Segment(opts.gpsstart, opts.gpsend)])
 
     # map command-line opts to function kwargs
     kwargs = {}
     argmap = {
         "ext": "file_type",
+        "jobs": "jobs",
+        "processes": "processes",
+        "timeout": "timeout",
+        "query_timeout": "query_timeout",
     }
     for key, arg in argmap.items():
         if (val := getattr(opts, arg)) is not None:
@@ -173,39 +436,78 @@ def main(args=None):
         for key, arg in cbcmap.items():
             kwargs[key] = getattr(opts, arg)
 
-    cache = list()
-    for seg in segs:
-        cache.extend(gwtrigfind.find_trigger_files(
+    if opts.explain:
+        plan = gwtrigfind.explain_trigger_files(
             opts.channel,
             opts.etg,
-            start,
-            end,
+            segs,
             **kwargs,
-        ))
+        )
+        print("finder: %s" % plan["finder"], file=stdout)
+        print("segments: %d" % len(plan["segments"]), file=stdout)
+        for seg in plan["segments"]:
+            print("  %s %s" % seg, file=stdout)
+        print("paths: %d" % len(plan["paths"]), file=stdout)
+        for path in plan["paths"]:
+            print("  %s" % path, file=stdout)
+        return 0
 
-    known = SegmentList(map(file_segment, cache)) & segs
-    if gaps:
-        gaps = segs - known
-    if gaps:
-        print("Missing segments:", file=sys.stderr)
-        for seg in gaps:
-            print("%f %f" % seg, file=sys.stderr)
+    timedout = []
+    if opts.follow:
+        files = gwtrigfind.follow_trigger_files(
+            opts.channel,
+            opts.etg,
+            opts.gpsstart,
+            opts.gpsend,
+            **kwargs,
+        )
+    else:
+        files = gwtrigfind.iter_trigger_files(
+            opts.channel,
+            opts.etg,
+            segs,
+            timedout=timedout,
+            **kwargs,
+        )
 
-    # -- print files
+    # -- write files as they are found
 
-    if opts.lal_cache:
-        def fmt(path):
-            obs, tag, start, duration = os.path.basename(path).split("-")
-            return " ".join((obs, tag, start, duration.split(".")[0], path))
-    elif opts.names_only:
-        def fmt(path):
-            return urlparse(path).path
+    coverage = Coverage()
+    writer = FORMATS[opts.format]
+    if opts.output is None:
+        _write(writer(stdout), files, opts, coverage)
     else:
-        fmt = str
-    for e in cache:
-        print(fmt(e))
+        with open_output(opts.output, binary=writer.binary) as out:
+            _write(writer(out), files, opts, coverage)
 
-    # exit with appropriate code
+    # -- report gaps
+
+    if gaps:
+        # spans whose search timed out are unknown, rather than missing
+        unknown = Coverage()
+        for path in timedout:
+            span = gwtrigfind.core._path_span(path)
+            for seg in ([span] if span is not None else segs):
+                unknown.add(*seg)
+        gaps = [part for seg in segs for gap in coverage.gaps(*seg) for
+                part in unknown.gaps(*gap)]
+        livetime = float(sum(
+            b - a for seg in segs for a, b in unknown.gaps(*seg)))
+        missing = sum(b - a for a, b in gaps)
+        fraction = 1. - missing / livetime if livetime else 1.
     if gaps:
+        print("Missing segments:", file=stderr)
+        for seg in gaps:
+            print("%f %f" % seg, file=stderr)
+    if timedout:
+        print("Unknown coverage (timed out):" if opts.gaps else
+              "Warning: search incomplete, timed out:", file=stderr)
+        for path in timedout:
+            print(path, file=stderr)
+    if opts.gaps:
+        print("Coverage: %f" % fraction, file=stderr)
+
+    # exit with appropriate code
+    if gaps or timedout:
         return 1
     return 0
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Cardiff University (2024)
+#
+# This file is part of GWTrigFind.
+#
+# GWTrigFind is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWTrigFind is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWTrigFind.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Test configuration for gwtrigfind
+"""
+
+import pytest
+
+from . import core
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+
+@pytest.fixture(autouse=True)
+def clear_missing():
+    """Forget missing paths, remembered directory contents, and learned
+    file cadences between tests, which often mock the filesystem
+    """
+    core._missing.clear()
+    core._cadences.clear()
+    if core._results is not None:
+        core._results.clear()
+    yield
+    core._missing.clear()
+    core._cadences.clear()
+    if core._results is not None:
+        core._results.clear()
+
+
+@pytest.fixture
+def kw_archive(tmp_path):
+    """Build synthetic KleineWelle archives of empty files
+
+    Returns a function that writes ``<prefix>-<gps>-<duration>.xml``
+    every ``step`` seconds over ``[start, end)`` (except the times in
+    ``skip``) into GPS5 directories named by ``dirname`` under ``root``
+    (default: ``tmp_path``), and returns the ``base`` to pass to the
+    finder.
+    """
+    def _make(start=1135640000, end=1135660000, step=1000, duration=None,
+              prefix='L-KW_TRIGGERS', dirname='{0}', root=None, skip=()):
+        root = tmp_path if root is None else root
+        for gps in range(start, end, step):
+            if gps in skip:
+                continue
+            directory = root / dirname.format(gps // 100000)
+            directory.mkdir(parents=True, exist_ok=True)
+            (directory / '{0}-{1}-{2}.xml'.format(
+                prefix, gps, duration or step)).touch()
+        return str(root / dirname)
+
+    return _make
@@ -21,21 +21,30 @@ files written on the LIGO Data Grid according to the conventions in
 LIGO-T1300468.
 """
 
+import fnmatch
 import glob
+import math
 import os.path
 import re
-import datetime
+import threading
+import time
 import warnings
-from collections import OrderedDict
-
-try:
-    from urllib.parse import urlparse
-except ImportError:  # python < 3
-    from urlparse import urlparse
-
-from gpstime import gpstime
-
-from ligo.segments import segment as Segment
+from array import array
+from bisect import bisect_left
+from collections import (OrderedDict, deque)
+from contextlib import (contextmanager, nullcontext)
+from contextvars import (ContextVar, copy_context)
+from functools import lru_cache
+from itertools import islice
+
+from . import (gps as _gps, instrument as _instrument)
+from .catalog import (MTIME_SETTLE as _MTIME_SETTLE,
+                      get_catalog as _get_catalog)
+from .coverage import Coverage
+from .filelist import TriggerFileList
+from .manifest import (MANIFEST_NAME as _MANIFEST_NAME,
+                       manifests_enabled as _manifests_enabled,
+                       read_manifest as _read_manifest)
 
 __author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
 
@@ -55,19 +64,558 @@ DMT_OMEGA_V1_O4_EPOCH = 1392496139
 DEFAULT_PYCBC_LIVE_BASE = os.path.join(
     os.path.sep, 'home', 'pycbc.live', 'triggers', 'data')
 
+DEFAULT_DAILY_CBC_BASE = os.path.join(
+    os.path.sep, 'home', 'cbc', 'public_html', 'daily_cbc_offline')
+
+#: assumed maximum duration (seconds) of a single trigger file written to
+#: the default archive of each finder that searches GPS directories, used
+#: to decide whether the directory before the start of a search needs to
+#: be listed; these only apply to the default archive locations (searches
+#: of a custom ``base``, and finders not listed here, always list the
+#: preceding directory), and can be overridden with the ``maxdur``
+#: keyword of each finder
+MAX_FILE_DURATION = {
+    'detchar': 86400,
+    'dmt_omega': 3600,
+    'kleinewelle': 3600,
+    'snax': 3600,
+}
+
+#: length (seconds) of the GPS-aligned chunks of time searched by each
+#: process in a multi-process search, this matches the GPS5 directories
+#: used by most archives
+PROCESS_CHUNK = 100000
+
+#: maximum number of parsed daily CBC cache files to keep in memory
+DAILY_CBC_CACHE_SIZE = 64
+
+#: default maximum number of directories for which to remember the files
+#: found, see `enable_result_cache`
+RESULT_CACHE_SIZE = 256
+
+#: how long (seconds) to remember that a directory or file doesn't exist
+NEGATIVE_CACHE_TTL = 60.
+
+#: age (seconds) after which the data for a GPS span are treated as
+#: complete, so that missing directories and files for that span are
+#: remembered for the lifetime of the process
+HISTORICAL_LATENCY = 7 * 86400.
+
+#: maximum number of missing paths to remember
+NEGATIVE_CACHE_SIZE = 65536
+
 
 def _file_segment(path):
     _, _, a, b = os.path.basename(path).split('-')
     start = float(a)
     duration = float(b.split('.')[0])
-    return Segment(start, start + duration)
+    return start, start + duration
 
 
 def _as_url(path):
-     return urlparse(os.path.abspath(path), scheme='file').geturl()
+    from urllib.parse import urlparse
+    return urlparse(os.path.abspath(path), scheme='file').geturl()
+
+
+# -- directory scanning -------------------------------------------------------
+
+def _translate_glob_char(pattern, i, star):
+    """Translate the glob token at ``pattern[i]`` into a regular expression
+
+    Returns the regex and the index of the next token.
+    """
+    c = pattern[i]
+    if c == '*':
+        return star, i + 1
+    if c == '?':
+        return '[^-]', i + 1
+    if c == '[':
+        j = pattern.find(']', i + 2)
+        if j != -1:
+            stuff = pattern[i+1:j].replace('\\', r'\\')
+            if stuff.startswith('!'):
+                stuff = '^' + stuff[1:]
+            return '[%s]' % stuff, j + 1
+    return re.escape(c), i + 1
+
+
+@lru_cache(maxsize=256)
+def _compile_filename_pattern(pattern):
+    """Compile a glob pattern for T050017 file names into a regex
+
+    The compiled regex captures the GPS start time and duration of each
+    matching file name as its two groups.
+
+    Returns `None` if ``pattern`` doesn't have the four dash-separated
+    fields of the T050017 convention.
+    """
+    out = []
+    field = 0  # index of current dash-separated field
+    inext = False  # whether we are in the file extension
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '-':  # start new field
+            field += 1
+            out.append({2: '-(', 3: ')-('}.get(field, '-'))
+            i += 1
+        elif field == 3 and c == '.' and not inext:  # end of duration
+            inext = True
+            out.append(r')\.')
+            i += 1
+        else:
+            if inext or field < 2:
+                star = '[^-]*'
+            elif field == 2:  # start time
+                star = '[0-9.]*'
+            else:  # duration
+                star = '[0-9]*'
+            regex, i = _translate_glob_char(pattern, i, star)
+            out.append(regex)
+    if field != 3:
+        return None
+    if not inext:
+        out.append(')')
+    return re.compile(''.join(out) + r'\Z')
+
+
+def _scandir_names(directory):
+    """List the names of entries in a directory
+
+    Returns an empty list if the directory cannot be read.
+    """
+    return _instrument.timed('listdir', _read_dir_names, directory)
+
+
+def _read_dir_names(directory):
+    try:
+        with os.scandir(directory or os.curdir) as entries:
+            return [entry.name for entry in entries]
+    except (FileNotFoundError, NotADirectoryError):
+        _missing.add(directory)
+        return []
+    except OSError:
+        return []
+
+
+def _listdir(directory):
+    if directory in _missing:
+        return []
+    listings = _listings.get()
+    if listings is None:
+        return _scandir_names(directory)
+    return listings.listdir(directory)
+
+
+def _scan_dir(directory, pattern, start, end):
+    """Find files in a directory matching a pattern that overlap a GPS span
+
+    Parameters
+    ----------
+    directory : `str`
+        path of the directory to scan, must not contain wildcards
+
+    pattern : `str`
+        glob-style pattern that file names must match
+
+    start : `int`
+        GPS start time of search
+
+    end : `int`
+        GPS end time of search
+
+    Returns
+    -------
+    files : `list` of `tuple`
+        ``(start, end, url)`` for each matching file
+    """
+    if directory in _missing:
+        return []
+    if _results is None or _listings.get() is not None:
+        # shared listings are already validated (and recorded) per search
+        nnames, out = _scan_names(directory, pattern, start, end)
+    else:
+        nnames, out = _results.scan(directory, pattern, start, end)
+    _instrument.tally(nnames, len(out))
+    return out
+
+
+def _scan_names(directory, pattern, start, end):
+    """Scan a directory, see `_scan_dir`
+
+    Returns the number of names examined, and the matching files in
+    directory order.
+    """
+    prefix = 'file://' + os.path.join(os.path.abspath(directory), '')
+    regex = _compile_filename_pattern(pattern)
+    out = []
+    append = out.append
+
+    # use a fresh manifest if there is one, otherwise list the directory
+    manifest = None
+    if _manifests_enabled():
+        manifest = _instrument.timed('manifest', _read_manifest, directory)
+    if manifest is None:
+        names = _listdir(directory)
+        if not names and directory in _missing:  # remember by GPS time
+            _missing.add(directory, end=end)
+        elif _MANIFEST_NAME in names:  # in-place manifest, select from it
+            manifest = _instrument.timed(
+                'manifest', _read_manifest, directory, '')
+    if manifest is not None:
+        names = manifest.select(start, end)
+
+    # non-standard pattern, use fnmatch and parse each name separately
+    if regex is None:
+        match = re.compile(fnmatch.translate(pattern)).match
+        for name in names:
+            if match(name) and not name.startswith('.'):
+                try:
+                    seg = _file_segment(name)
+                except ValueError:
+                    continue
+                if seg[0] < end and seg[1] > start:
+                    append((seg[0], seg[1], prefix + name))
+        return len(names), out
+
+    match = regex.match
+    for name in names:
+        m = match(name)
+        if m is None:
+            continue
+        a, b = m.groups()
+        try:
+            fstart = float(a) if '.' in a else int(a)
+            fend = fstart + int(b)
+        except ValueError:
+            continue
+        if fstart < end and fend > start:
+            append((fstart, fend, prefix + name))
+    return len(names), out
+
+
+# -- missing paths ------------------------------------------------------------
+
+class _MissingPaths(object):
+    """Record of directories and files that don't exist
+
+    Each path is remembered for `NEGATIVE_CACHE_TTL` seconds, or, if it
+    would hold data that ended more than `HISTORICAL_LATENCY` seconds
+    ago, for the lifetime of the process (such data are not expected
+    to appear later). At most `NEGATIVE_CACHE_SIZE` paths are kept,
+    oldest first out.
+
+    Searches in an `ignore_recent` context only trust the paths that are
+    remembered permanently.
+    """
+    def __init__(self):
+        self._expiry = OrderedDict()
+
+    def __contains__(self, path):
+        with _missing_lock:
+            try:
+                expiry = self._expiry[path]
+            except KeyError:
+                return False
+            if expiry == float('inf'):
+                return True
+            if expiry < time.monotonic():
+                self._expiry.pop(path, None)
+                return False
+        return not _ignore_recent_missing.get()
+
+    def add(self, path, end=None):
+        """Record that a path doesn't exist
+
+        Parameters
+        ----------
+        path : `str`
+            the path that doesn't exist
+
+        end : `float`, optional
+            the GPS end time of the data the path would hold, if known
+        """
+        if end is not None and _gps.gps_now() - end > HISTORICAL_LATENCY:
+            expiry = float('inf')
+        else:
+            expiry = time.monotonic() + NEGATIVE_CACHE_TTL
+        with _missing_lock:
+            self._expiry[path] = expiry
+            self._expiry.move_to_end(path)
+            while len(self._expiry) > NEGATIVE_CACHE_SIZE:
+                self._expiry.popitem(last=False)
+
+    @staticmethod
+    @contextmanager
+    def ignore_recent():
+        """Context in which paths that aren't remembered permanently are
+        looked for again
+
+        This only affects searches in the same `contextvars` context (e.g.
+        those of one follower), not unrelated searches in other threads.
+        """
+        token = _ignore_recent_missing.set(True)
+        try:
+            yield
+        finally:
+            _ignore_recent_missing.reset(token)
+
+    def clear(self):
+        with _missing_lock:
+            self._expiry.clear()
+
+
+_missing_lock = threading.Lock()
+_ignore_recent_missing = ContextVar('gwtrigfind_ignore_recent_missing',
+                                    default=False)
+_missing = _MissingPaths()
+
+
+# -- shared directory listings ------------------------------------------------
+
+class _ListingCache(object):
+    """In-memory record of directory listings shared between searches
+
+    Each directory is listed at most once, and the results of each glob
+    pattern are remembered, so that many searches that resolve to the same
+    directories only pay for the filesystem access once.
+
+    With ``validate=True`` (for long-lived caches) each directory is
+    re-listed whenever its modification time changes, glob results are
+    rebuilt from the (validated) listings each time, and at most
+    ``maxdirs`` listings are kept, least recently used first out.
+    With ``track=True`` the paths of all directories validated are
+    added to ``touched`` (otherwise ``touched`` is `None`), for the
+    caller to clear between searches.
+
+    A cache may be shared by many threads; directories are listed
+    outside the lock.
+    """
+    def __init__(self, validate=False, maxdirs=None, track=False):
+        self.validate = validate
+        self.maxdirs = maxdirs
+        self.touched = set() if track else None
+        self._dirs = OrderedDict()
+        self._globs = {}
+        self._isdir = {}
+        self._lock = threading.Lock()
+
+    def isdir(self, path, end=None):
+        try:
+            return self._isdir[path]
+        except KeyError:
+            isdir = _probe_isdir(path, end=end)
+            if isdir or not self.validate:  # new directories may appear
+                with self._lock:
+                    self._isdir[path] = isdir
+            return isdir
+
+    def listdir(self, directory):
+        if self.validate:
+            return self._listdir_validated(directory)
+        try:
+            return self._dirs[directory]
+        except KeyError:
+            names = _scandir_names(directory)
+            with self._lock:
+                return self._dirs.setdefault(directory, names)
+
+    def _listdir_validated(self, directory):
+        try:
+            mtime = os.stat(directory or os.curdir).st_mtime_ns
+        except OSError:
+            mtime = None
+        with self._lock:
+            if self.touched is not None:
+                self.touched.add(directory)
+            stamp, names = self._dirs.get(directory, (None, None))
+            if stamp == mtime and mtime is not None and (
+                    time.time() - mtime * 1e-9 > _MTIME_SETTLE):
+                self._dirs.move_to_end(directory)
+                return names
+        names = _scandir_names(directory) if mtime is not None else []
+        with self._lock:
+            self._dirs[directory] = (mtime, names)
+            self._dirs.move_to_end(directory)
+            if self.maxdirs is not None:
+                while len(self._dirs) > self.maxdirs:
+                    self._dirs.popitem(last=False)
+        return names
+
+    def glob(self, pathname):
+        try:
+            return self._globs[pathname]
+        except KeyError:
+            pass
+        dirname, basename = os.path.split(pathname)
+        if not glob.has_magic(pathname):
+            out = [pathname] if os.path.lexists(pathname) else []
+        else:
+            if glob.has_magic(dirname):
+                dirs = self.glob(dirname)
+            else:
+                dirs = [dirname]
+            match = re.compile(fnmatch.translate(basename)).match
+            hidden = basename.startswith('.')
+            out = [os.path.join(d, name) for d in dirs for
+                   name in self.listdir(d) if
+                   match(name) and (hidden or not name.startswith('.'))]
+        if not self.validate:
+            with self._lock:
+                self._globs[pathname] = out
+        return out
+
+
+#: the `_ListingCache` shared by searches in the current context, if any,
+#: see `_shared_listings`
+_listings = ContextVar('gwtrigfind_listings', default=None)
+
+
+# -- result cache -------------------------------------------------------------
+
+class _ResultCache(object):
+    """In-memory record of the files found in each directory
+
+    The files in each scanned directory (for each file name pattern) are
+    remembered, along with the modification time of the directory, so
+    that later searches that overlap the same directories (e.g. with
+    sliding time spans) only need to ``stat`` each directory, and only
+    re-scan those that have changed. At most ``maxdirs`` directories
+    are remembered, least recently used first out.
+
+    The cache is bypassed by searches that share directory listings (see
+    `_shared_listings`), which already remember each listing.
+    """
+    def __init__(self, maxdirs=None):
+        self.maxdirs = maxdirs
+        self._dirs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def scan(self, directory, pattern, start, end):
+        """Scan a directory, see `_scan_names`
+        """
+        try:
+            mtime = _instrument.timed(
+                'stat', os.stat, directory or os.curdir).st_mtime_ns
+        except OSError:
+            return _scan_names(directory, pattern, start, end)
+        key = (directory, pattern)
+        with self._lock:
+            stamp, records = self._dirs.get(key, (None, None))
+            if stamp == mtime:
+                self._dirs.move_to_end(key)
+        if stamp != mtime:
+            nnames, records = _scan_names(
+                directory, pattern, float('-inf'), float('inf'))
+            # only remember directories that have settled, later changes
+            # to others may not change their modification time
+            if time.time() - mtime * 1e-9 > _MTIME_SETTLE:
+                self._store(key, mtime, records)
+        else:
+            nnames = len(records)
+        return nnames, [r for r in records if r[0] < end and r[1] > start]
+
+    def _store(self, key, mtime, records):
+        with self._lock:
+            self._dirs[key] = (mtime, records)
+            self._dirs.move_to_end(key)
+            if self.maxdirs is not None:
+                while len(self._dirs) > self.maxdirs:
+                    self._dirs.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._dirs.clear()
+
+
+_results = None
+
+
+def enable_result_cache(maxdirs=RESULT_CACHE_SIZE):
+    """Remember the files found in each directory between searches
+
+    The result cache is disabled by default. Each remembered directory is
+    only re-scanned when its modification time changes, at the cost of a
+    ``stat`` of each directory for each search, so this is only worthwhile
+    for a process that repeats overlapping searches.
+
+    Parameters
+    ----------
+    maxdirs : `int`, `None`, optional
+        the maximum number of directories to remember, or `None` for no
+        limit, any previously remembered results are discarded
+
+    Examples
+    --------
+    >>> from gwtrigfind import enable_result_cache
+    >>> enable_result_cache(maxdirs=1024)
+    """
+    global _results
+    _results = _ResultCache(maxdirs=maxdirs)
+
+
+def disable_result_cache():
+    """Stop remembering the files found in each directory
+
+    All previously remembered results are discarded.
+    """
+    global _results
+    _results = None
+
+
+@contextmanager
+def _shared_listings(listings=None):
+    """Context in which all directory listings are shared
+
+    The record is only shared with searches in the same `contextvars`
+    context (i.e. the current thread, and the worker threads of its
+    searches), so it doesn't affect unrelated searches in other threads.
+
+    Parameters
+    ----------
+    listings : `_ListingCache`, optional
+        the record of listings to share, defaults to a new one that is
+        discarded at the end of the context
+    """
+    current = _listings.get()
+    if current is not None:  # already sharing
+        yield current
+        return
+    listings = listings or _ListingCache()
+    token = _listings.set(listings)
+    try:
+        yield listings
+    finally:
+        _listings.reset(token)
 
 
-def find_trigger_files(channel, etg, start, end, **kwargs):
+def _glob(pathname):
+    listings = _listings.get()
+    if listings is None:
+        return _instrument.timed('glob', glob.glob, pathname)
+    return list(listings.glob(pathname))
+
+
+def _probe_isdir(path, end=None):
+    if path in _missing:
+        return False
+    isdir = _instrument.timed('isdir', os.path.isdir, path)
+    if not isdir:
+        _missing.add(path, end=end)
+    return isdir
+
+
+def _isdir(path, end=None):
+    listings = _listings.get()
+    if listings is None:
+        return _probe_isdir(path, end=end)
+    return listings.isdir(path, end=end)
+
+
+# -- finders ------------------------------------------------------------------
+
+
+def find_trigger_files(channel, etg, start, end=None, **kwargs):
     """Find the paths of trigger files for this channel and ETG.
 
     This method uses an ETG-specific finder function to retrieve the
@@ -81,19 +629,41 @@ def find_trigger_files(channel, etg, start, end, **kwargs):
     etg : `str`
         name of trigger generator that processed the data
 
-    start : `int`
-        GPS start time of search
+    start : `int`, `list` of `tuple`
+        GPS start time of search, or a list of ``(start, end)`` GPS
+        segments to search (in which case ``end`` must not be given)
 
-    end : `int`
+    end : `int`, optional
         GPS end time of search
 
+    timeout : `float`, optional
+        the number of seconds to allow for searching each directory (or
+        day), default is no limit
+
+    query_timeout : `float`, optional
+        the number of seconds to allow for the whole search, default is
+        no limit
+
+    timedout : `list`, optional
+        a list to which to append the paths (as shown by
+        :func:`explain_trigger_files`) that timed out
+
     **kwargs
         custom keyword arguments to pass down to the underlying finder
 
     Returns
     -------
-    files : `list` of `str`
-        a list of file URLs
+    files : `~gwtrigfind.TriggerFileList`
+        a list of file URLs, if any paths timed out this is a partial
+        result, and those paths are listed in ``files.timedout``
+
+    Notes
+    -----
+    With ``timeout`` or ``query_timeout``, each directory is searched on
+    a worker thread; a search that misses its deadline (e.g. on a hung
+    NFS mount) is abandoned, so a query never waits longer than its
+    timeout, but the abandoned thread may linger until the filesystem
+    responds.
 
     See Also
     --------
@@ -109,26 +679,153 @@ def find_trigger_files(channel, etg, start, end, **kwargs):
     >>> from gwtrigfind import find_trigger_files
     >>> cache = find_trigger_files('L1:GDS-CALIB_STRAIN', 'Omicron', 1135641617, 1135728017)
     """
-    start = int(start)
-    end = int(end)
+    planner = _resolve_etg(etg, kwargs)
+    return _find_files(planner, channel, start, end, **kwargs)
+
+
+def iter_trigger_files(channel, etg, start, end=None, **kwargs):
+    """Iterate over the paths of trigger files for this channel and ETG.
+
+    Files are yielded in time order as each directory (or day) is
+    searched, so that results can be consumed before the search is
+    complete.
 
-    # construct search
+    See :func:`find_trigger_files` for details of the parameters.
+
+    Yields
+    ------
+    url : `str`
+        the URL of each file
+
+    Examples
+    --------
+    >>> from gwtrigfind import iter_trigger_files
+    >>> for url in iter_trigger_files('L1:GDS-CALIB_STRAIN', 'Omicron',
+    ...                               1135641617, 1135728017):
+    ...     print(url)
+    """
+    planner = _resolve_etg(etg, kwargs)
+    yield from _iter_search(planner, channel, start, end, **kwargs)
+
+
+def explain_trigger_files(channel, etg, start, end=None, **kwargs):
+    """Describe how :func:`find_trigger_files` would search for files
+
+    The search is planned (which may involve resolving wildcard base
+    directories), but no trigger directories are listed.
+
+    See :func:`find_trigger_files` for details of the parameters.
+
+    Returns
+    -------
+    plan : `dict`
+        a description of the search, with keys ``'finder'`` (the name of
+        the finder that would be used), ``'segments'`` (the coalesced
+        list of ``(start, end)`` segments to search), and ``'paths'``
+        (the list of directory glob patterns, days, or cache files that
+        would be searched, in order)
+
+    Examples
+    --------
+    >>> from gwtrigfind import explain_trigger_files
+    >>> plan = explain_trigger_files('L1:GDS-CALIB_STRAIN', 'Omicron',
+    ...                              1135641617, 1135728017)
+    >>> plan['paths']
+    """
+    for key in ('jobs', 'processes', 'timeout', 'query_timeout', 'timedout'):
+        kwargs.pop(key, None)
+    planner = _resolve_etg(etg, kwargs)
+    segments = _parse_segments(start, end)
+    paths = []
+    if segments:
+        for item in planner(channel, segments, **kwargs)[1]:
+            paths.extend(_item_paths(item))
+    return {
+        'finder': _finder_name(planner),
+        'segments': segments,
+        'paths': paths,
+    }
+
+
+def _resolve_etg(etg, kwargs):
+    """Return the search planner for the given ETG
+
+    ``kwargs`` is updated in place with any extra keyword arguments
+    the planner needs.
+    """
     if daily_cbc.match(etg):
-        finder = find_daily_cbc_files
-    elif pycbc_live.match(etg):
-        finder = find_pycbc_live_files
-    elif omega.match(etg):
-        finder = find_omega_online_files
-    elif kleinewelle.match(etg):
-        finder = find_kleinewelle_files
-    elif dmt_omega.match(etg):
-        finder = find_dmt_omega_files
-    elif snax.match(etg):
-        finder = find_snax_files
-    else:
-        finder = find_detchar_files
-        kwargs['etg'] = etg
-    return finder(channel, start, end, **kwargs)
+        return _plan_daily_cbc_files
+    if pycbc_live.match(etg):
+        return _plan_pycbc_live_files
+    if omega.match(etg):
+        return _plan_omega_online_files
+    if kleinewelle.match(etg):
+        return _plan_kleinewelle_files
+    if dmt_omega.match(etg):
+        return _plan_dmt_omega_files
+    if snax.match(etg):
+        return _plan_snax_files
+    kwargs['etg'] = etg
+    return _plan_detchar_files
+
+
+def find_trigger_files_many(queries, start, end=None):
+    """Find the paths of trigger files for many channels and ETGs.
+
+    All queries are executed with a shared record of directory listings,
+    so that each physical directory is only listed once, no matter how
+    many queries resolve to it.
+
+    Parameters
+    ----------
+    queries : `iterable` of `tuple`
+        each query is a ``(channel, etg)`` or ``(channel, etg, kwargs)``
+        tuple, where ``kwargs`` is a `dict` of keyword arguments to pass
+        to the underlying finder
+
+    start : `int`, `list` of `tuple`
+        GPS start time of search, or a list of ``(start, end)`` GPS
+        segments to search (in which case ``end`` must not be given)
+
+    end : `int`, optional
+        GPS end time of search
+
+    Returns
+    -------
+    files : `collections.OrderedDict`
+        a mapping of query to `~gwtrigfind.TriggerFileList` of file URLs,
+        for queries that include ``kwargs``, the key is
+        ``(channel, etg, items)`` where ``items`` is the sorted `tuple` of
+        ``kwargs`` items
+
+    See Also
+    --------
+    gwtrigfind.find_trigger_files
+        for details of how each query is resolved
+
+    Examples
+    --------
+    >>> from gwtrigfind import find_trigger_files_many
+    >>> caches = find_trigger_files_many([
+    ...     ('L1:GDS-CALIB_STRAIN', 'Omicron'),
+    ...     ('L1:PSL-ISS_PDA_REL_OUT_DQ', 'Omicron'),
+    ... ], 1135641617, 1135728017)
+    """
+    out = OrderedDict()
+    with _shared_listings():
+        for query in queries:
+            channel, etg = query[:2]
+            try:
+                kwargs = query[2]
+            except IndexError:
+                key = (channel, etg)
+                kwargs = {}
+            else:
+                key = (channel, etg, tuple(sorted(kwargs.items())))
+            if key not in out:
+                out[key] = find_trigger_files(channel, etg, start, end,
+                                              **kwargs)
+    return out
 
 
 def find_trigger_urls(*args, **kwargs):
@@ -139,7 +836,8 @@ def find_trigger_urls(*args, **kwargs):
     return find_trigger_files(*args, **kwargs)
 
 
-def find_detchar_files(channel, start, end, etg='omicron', ext='h5'):
+def find_detchar_files(channel, start, end=None, etg='omicron', ext='h5',
+                       maxdur=None, jobs=None):
     """Find files in the detchar home directory following T1300468
 
     Parameters
@@ -147,10 +845,11 @@ def find_detchar_files(channel, start, end, etg='omicron', ext='h5'):
     channel : `str`
         name of data channel for which to search
 
-    start : `int`
-        GPS start time of search
+    start : `int`, `list` of `tuple`
+        GPS start time of search, or a list of ``(start, end)`` GPS
+        segments to search (in which case ``end`` must not be given)
 
-    end : `int`
+    end : `int`, optional
         GPS end time of search
 
     etg : `str`, optional
@@ -160,14 +859,48 @@ def find_detchar_files(channel, start, end, etg='omicron', ext='h5'):
     ext : `str`, optional
         file extension, defaults to ``'h5'``
 
+    maxdur : `float`, optional
+        maximum duration (seconds) of any one file, used to decide whether
+        the directory before the start of the search needs to be listed,
+        defaults to the `MAX_FILE_DURATION` of the default archive
+
+    jobs : `int`, optional
+        number of threads with which to list directories concurrently,
+        defaults to listing one directory at a time
+
     Returns
     -------
-    files : `list` of `str`
+    files : `~gwtrigfind.TriggerFileList`
         a list of file URLs
     """
+    return _find_files(_plan_detchar_files, channel, start, end, jobs=jobs,
+                       etg=etg, ext=ext, maxdur=maxdur)
+
+
+def iter_detchar_files(channel, start, end=None, etg='omicron', ext='h5',
+                       maxdur=None, jobs=None):
+    """Iterate over files in the detchar home directory, in time order
+
+    See :func:`find_detchar_files` for details of the parameters.
+
+    Yields
+    ------
+    url : `str`
+        the URL of each file
+    """
+    yield from _iter_search(
+        _plan_detchar_files, channel, start, end, jobs=jobs,
+        etg=etg, ext=ext, maxdur=maxdur,
+    )
+
+
+def _plan_detchar_files(channel, segments, etg='omicron', ext='h5',
+                        maxdur=None):
+    """Plan a search, see :func:`find_detchar_files`
+    """
     ifo, name = _format_channel_name(channel).split('-', 1)
     # find base path relative to O1 or O2 formatting
-    if start >= OMICRON_O2_EPOCH:
+    if segments[0][0] >= OMICRON_O2_EPOCH:
         base = os.path.join(os.path.sep, 'home', 'detchar', 'triggers')
         tag = etg.upper()
         dirtag = '%s_%s' % (name, tag)
@@ -183,17 +916,19 @@ def find_detchar_files(channel, start, end, etg='omicron', ext='h5'):
 
     # test for channel-level directory
     channelbase = os.path.join(base, ifo, dirtag)
-    if not glob.glob(channelbase):
+    if not _resolve_base(channelbase):
         raise ValueError("No channel-level directory found at %s. Either the "
                          "channel name or ETG names are wrong, or this "
                          "channel is not configured for this ETG."
                          % channelbase)
 
-    return _find_in_gps_dirs(os.path.join(channelbase, '{0}', trigform),
-                             start, end, ngps=5)
+    return _plan_gps_dirs(os.path.join(channelbase, '{0}', trigform),
+                          segments, ngps=5,
+                          maxdur=_max_file_duration('detchar', maxdur))
 
 
-def find_kleinewelle_files(channel, start, end, base=None, ext='xml'):
+def find_kleinewelle_files(channel, start, end=None, base=None, ext='xml',
+                           maxdur=None, jobs=None):
     """Find KleineWelle output event files
 
     Parameters
@@ -201,10 +936,11 @@ def find_kleinewelle_files(channel, start, end, base=None, ext='xml'):
     channel : `str`
         name of data channel for which to search
 
-    start : `int`
-        GPS start time of search
+    start : `int`, `list` of `tuple`
+        GPS start time of search, or a list of ``(start, end)`` GPS
+        segments to search (in which case ``end`` must not be given)
 
-    end : `int`
+    end : `int`, optional
         GPS end time of search
 
     base : `str`, optional
@@ -214,15 +950,50 @@ def find_kleinewelle_files(channel, start, end, base=None, ext='xml'):
     ext : `str`, optional
         file extension, defaults to ``'xml'``
 
+    maxdur : `float`, optional
+        maximum duration (seconds) of any one file, used to decide whether
+        the directory before the start of the search needs to be listed,
+        defaults to the `MAX_FILE_DURATION` of the default archive, or no
+        limit for a custom ``base``
+
+    jobs : `int`, optional
+        number of threads with which to list directories concurrently,
+        defaults to listing one directory at a time
+
     Returns
     -------
-    files : `list` of `str`
+    files : `~gwtrigfind.TriggerFileList`
         a list of file URLs
     """
-    span = Segment(int(start), int(end))
+    return _find_files(_plan_kleinewelle_files, channel, start, end,
+                       jobs=jobs, base=base, ext=ext, maxdur=maxdur)
+
+
+def iter_kleinewelle_files(channel, start, end=None, base=None, ext='xml',
+                           maxdur=None, jobs=None):
+    """Iterate over KleineWelle output event files, in time order
+
+    See :func:`find_kleinewelle_files` for details of the parameters.
+
+    Yields
+    ------
+    url : `str`
+        the URL of each file
+    """
+    yield from _iter_search(
+        _plan_kleinewelle_files, channel, start, end, jobs=jobs,
+        base=base, ext=ext, maxdur=maxdur,
+    )
+
+
+def _plan_kleinewelle_files(channel, segments, base=None, ext='xml',
+                            maxdur=None):
+    """Plan a search, see :func:`find_kleinewelle_files`
+    """
     ifo, name = _format_channel_name(str(channel)).split('-', 1)
     hoft = name == 'GDS_CALIB_STRAIN'
     site = ifo[0].upper()
+    maxdur = _max_file_duration('kleinewelle', maxdur, base=base)
 
     # find base path
     if hoft:
@@ -235,10 +1006,12 @@ def find_kleinewelle_files(channel, start, end, base=None, ext='xml'):
 
     # loop over GPS directories and find files
     filename = '%s-*-*.%s' % (tag, ext)
-    return _find_in_gps_dirs(os.path.join(base, filename), start, end, ngps=5)
+    return _plan_gps_dirs(os.path.join(base, filename), segments, ngps=5,
+                          maxdur=maxdur)
 
 
-def find_dmt_omega_files(channel, start, end, base=None, ext='xml'):
+def find_dmt_omega_files(channel, start, end=None, base=None, ext='xml',
+                         maxdur=None, jobs=None):
     """Find DMT-Omega trigger XML files.
 
     Parameters
@@ -246,10 +1019,11 @@ def find_dmt_omega_files(channel, start, end, base=None, ext='xml'):
     channel : `str`
         name of data channel for which to search
 
-    start : `int`
-        GPS start time of search
+    start : `int`, `list` of `tuple`
+        GPS start time of search, or a list of ``(start, end)`` GPS
+        segments to search (in which case ``end`` must not be given)
 
-    end : `int`
+    end : `int`, optional
         GPS end time of search
 
     base : `str`, optional
@@ -259,15 +1033,51 @@ def find_dmt_omega_files(channel, start, end, base=None, ext='xml'):
     ext : `str`, optional
         file extension, defaults to ``'xml'``
 
+    maxdur : `float`, optional
+        maximum duration (seconds) of any one file, used to decide whether
+        the directory before the start of the search needs to be listed,
+        defaults to the `MAX_FILE_DURATION` of the default archive, or no
+        limit for a custom ``base``
+
+    jobs : `int`, optional
+        number of threads with which to list directories concurrently,
+        defaults to listing one directory at a time
+
     Returns
     -------
-    files : `list` of `str`
+    files : `~gwtrigfind.TriggerFileList`
         a list of file URLs
     """
-    span = Segment(int(start), int(end))
+    return _find_files(_plan_dmt_omega_files, channel, start, end,
+                       jobs=jobs, base=base, ext=ext, maxdur=maxdur)
+
+
+def iter_dmt_omega_files(channel, start, end=None, base=None, ext='xml',
+                         maxdur=None, jobs=None):
+    """Iterate over DMT-Omega trigger XML files, in time order
+
+    See :func:`find_dmt_omega_files` for details of the parameters.
+
+    Yields
+    ------
+    url : `str`
+        the URL of each file
+    """
+    yield from _iter_search(
+        _plan_dmt_omega_files, channel, start, end, jobs=jobs,
+        base=base, ext=ext, maxdur=maxdur,
+    )
+
+
+def _plan_dmt_omega_files(channel, segments, base=None, ext='xml',
+                          maxdur=None):
+    """Plan a search, see :func:`find_dmt_omega_files`
+    """
     ifo, name = _format_channel_name(str(channel)).split('-', 1)
     hoft = name in ['GDS_CALIB_STRAIN', 'Hrec_hoft_16384Hz']
     site = ifo[0].upper()
+    end = segments[-1][1]
+    maxdur = _max_file_duration('dmt_omega', maxdur, base=base)
 
     if hoft and site == 'V' and end < DMT_OMEGA_V1_O4_EPOCH:
         tag = os.path.join(f'{ifo.upper()}', f'{name}_OMICRON')
@@ -288,31 +1098,704 @@ def find_dmt_omega_files(channel, start, end, base=None, ext='xml'):
         filename = f'{ifo}-{name}_OMICRON-*-*.{ext}'
     else:
         filename = f'{ifo}-{name}_OmegaC-*-*.{ext}'
-    return _find_in_gps_dirs(os.path.join(base, filename), start, end, ngps=5)
+    return _plan_gps_dirs(os.path.join(base, filename), segments, ngps=5,
+                          maxdur=maxdur)
+
+
+def _map(func, iterable, jobs=None):
+    """Map a function over an iterable, optionally using a thread pool
+
+    Each call in the pool runs in a copy of the calling context.
+    Results are always yielded in the order of the input. At most
+    ``2 * jobs`` items are taken from the iterable ahead of the result
+    being yielded, so that (e.g.) a stream of queries is answered as it
+    is read.
+    """
+    if not jobs or jobs <= 1:
+        yield from map(func, iterable)
+        return
+    from concurrent.futures import ThreadPoolExecutor
+    context = copy_context()  # e.g. shared listings
+    items = iter(iterable)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        def _submit(item):
+            return executor.submit(context.copy().run, func, item)
+
+        pending = deque(map(_submit, islice(items, 2 * jobs)))
+        try:
+            while pending:
+                future = pending.popleft()
+                pending.extend(map(_submit, islice(items, 1)))
+                yield future.result()
+        finally:  # e.g. the caller stopped early
+            for future in pending:
+                future.cancel()
+
+
+class _Task(threading.Thread):
+    """Call a function on a daemon thread
+
+    Daemon threads don't stop the interpreter from exiting, so a call
+    that never returns (e.g. on a hung NFS mount) can be abandoned.
+    """
+    def __init__(self, func, item):
+        super().__init__(daemon=True)
+        self.func = func
+        self.item = item
+        self.context = copy_context()
+        self.result = self.error = None
+        self.started = time.monotonic()
+        self.start()
+
+    def run(self):
+        try:
+            self.result = self.context.run(self.func, self.item)
+        except BaseException as exc:
+            self.error = exc
+
+
+def _item_paths(item):
+    """Return the paths searched for one item of a search plan
+    """
+    if isinstance(item, tuple):
+        return list(item)
+    return [item]
+
+
+_gps_dir_number = re.compile(r'(?<!\d)\d{5}(?!\d)')
+_utc_day_name = re.compile(
+    r'(?<!\d)(\d{4})(?:_(\d{1,2})_(\d{1,2})|(\d{2})(\d{2}))(?!\d)')
+
+
+def _path_span(path):
+    """Return the GPS span of the data that a searched path would hold
+
+    This understands the GPS5 directories (e.g. ``.../11356/*.xml``) and
+    UTC day directories (e.g. ``.../2019_04_01``, ``.../20190401/...``)
+    used by the finders, and is used to account for paths whose search
+    timed out.
+
+    Returns
+    -------
+    span : `tuple`, `None`
+        the ``(start, end)`` GPS span, or `None` if it can't be told
+    """
+    directory = os.path.dirname(path) if glob.has_magic(
+        os.path.basename(path)) else path
+    days = list(_utc_day_name.finditer(directory))
+    if days:
+        year, month, day, month2, day2 = days[-1].groups()
+        start = _gps.date_to_gps(int(year), int(month or month2),
+                                 int(day or day2))
+        return start, start + 86400
+    gps5 = _gps_dir_number.findall(directory)
+    if gps5:
+        start = int(gps5[-1]) * 100000
+        return start, start + 100000
+    return None
+
+
+def _map_deadline(func, iterable, jobs=None, timeout=None,
+                  query_timeout=None, timedout=None):
+    """Map a function over an iterable on worker threads, with deadlines
+
+    Each call is given ``timeout`` seconds, and all calls must finish
+    within ``query_timeout`` seconds. Calls that miss their deadline are
+    abandoned on their (daemon) threads, and the paths of their items are
+    appended to ``timedout``; items that are not started before the
+    query deadline are treated the same way.
+
+    Results are always yielded in the order of the input, skipping
+    those that timed out.
+    """
+    if timedout is None:
+        timedout = []
+    now = time.monotonic
+    final = float('inf') if query_timeout is None else now() + query_timeout
+    items = iter(iterable)
+    running = deque()
+
+    def _next():
+        for item in items:
+            if now() < final:
+                running.append(_Task(func, item))
+                return
+            timedout.extend(_item_paths(item))
+
+    for _ in range(max(jobs or 1, 1)):
+        _next()
+    while running:
+        task = running.popleft()
+        limit = final if timeout is None else min(
+            final, task.started + timeout)
+        task.join(max(limit - now(), 0))
+        _next()
+        if task.is_alive():
+            timedout.extend(_item_paths(task.item))
+        elif task.error is not None:
+            raise task.error
+        else:
+            yield task.result
+
+
+def _iter_unique(chunks):
+    """Chain chunks of ``(start, end, url)`` records together, removing
+    duplicate URLs (preserving order)
+
+    Duplicates are only checked against the current and previous chunks,
+    which is where they occur for time-ordered directory searches, so
+    memory use doesn't grow with the size of the search.
+    """
+    previous = set()
+    for chunk in chunks:
+        current = set()
+        add = current.add
+        for record in chunk:
+            url = record[2]
+            if url not in previous and url not in current:
+                yield record
+            add(url)
+        previous = current
+
+
+def _search_gps_dir(paths, segments, catalog=None):
+    """Find files matching glob paths that overlap a list of segments
+
+    ``paths`` are the paths to search for one GPS directory, one for each
+    resolved base directory.
+
+    Returns the ``(start, end, url)`` of each file, sorted by start time.
+    """
+    start = segments[0][0]
+    end = segments[-1][1]
+    if catalog is not None:
+        import sqlite3
+        try:
+            out = [
+                (fstart, fend, 'file://' + path) for
+                globpath in paths for
+                fstart, fend, path in _instrument.timed(
+                    'catalog', catalog.records, globpath, start, end)
+            ]
+        except sqlite3.Error:  # catalog unusable, list directly
+            pass
+        else:
+            _learn_cadence(paths, out)
+            return _select(out, segments)
+    out = []
+    for path in paths:
+        dirname, pattern = os.path.split(path)
+        if glob.has_magic(dirname):
+            dirs = sorted(_glob(dirname))
+        else:
+            dirs = [dirname]
+        for directory in dirs:
+            out.extend(_scan_dir(directory, pattern, start, end))
+    _learn_cadence(paths, out)
+    return _select(out, segments)
+
+
+# -- point lookup -------------------------------------------------------------
+
+#: the cadence of the files matching each GPS-directory template,
+#: learned from GPS-directory searches, see `find_trigger_file_at`
+_cadences = {}
+
+#: maximum number of file name patterns for which to remember a cadence
+CADENCE_CACHE_SIZE = 4096
+
+
+def _learn_cadence(paths, records):
+    """Remember the cadence of the files found by a GPS-directory search
+
+    The cadence is only remembered if the first and last files found
+    have the same ``OBS-TAG`` prefix and extension, the same integer
+    duration, and start times that are aligned to a multiple of that
+    duration (checking only two files keeps this cheap enough to do for
+    every search); otherwise any previous cadence for the template is
+    forgotten.
+
+    The cadence is stored as ``(head, ext, duration, offset)``, where
+    ``head`` is the ``OBS-TAG`` prefix and ``ext`` the extension
+    (including the leading ``.``) of the file names, keyed by the
+    template of the search path (see `_cadence_key`).
+    """
+    if not paths or not records:
+        return
+    key = _cadence_key(paths[0])
+    first, last = min(records), max(records)
+    duration = first[1] - first[0]
+    fields = _name_fields(first[2])
+    if (fields is not None and fields == _name_fields(last[2])
+            and duration > 0 and float(duration).is_integer()
+            and float(first[0]).is_integer()
+            and last[1] - last[0] == duration
+            and (last[0] - first[0]) % duration == 0):
+        if key not in _cadences and len(_cadences) >= CADENCE_CACHE_SIZE:
+            _cadences.clear()
+        _cadences[key] = fields + (
+            int(duration), int(first[0] % duration))
+    else:
+        _cadences.pop(key, None)
+
+
+def _cadence_key(path):
+    """Return the template of a GPS-directory search path
+
+    The (last) GPS5 directory number in the path is replaced with
+    ``{0}``, so that searches of any GPS directory of the same archive
+    share a key.
+    """
+    directory, pattern = os.path.split(path)
+    match = None
+    for match in _gps_dir_number.finditer(directory):
+        pass
+    if match is not None:
+        directory = '{0}{{0}}{1}'.format(
+            directory[:match.start()], directory[match.end():])
+    return os.path.join(directory, pattern)
+
+
+def _name_fields(url):
+    """Return the ``OBS-TAG`` prefix and extension of a T050017 file name
+
+    Returns `None` if the name doesn't have four ``-``-separated fields.
+    """
+    name = os.path.basename(url)
+    try:
+        obs, tag, _, last = name.split('-')
+    except ValueError:
+        return None
+    _, dot, ext = last.partition('.')
+    return '%s-%s' % (obs, tag), dot + ext
+
+
+def _predict_file_at(items, gps):
+    """Predict the path of the file containing a GPS time from its cadence
+
+    ``items`` are the GPS-directory items of a search plan for the second
+    containing ``gps``.
 
+    The file name is built from the fields of the names found by
+    previous searches (see `_learn_cadence`), and must still match the
+    file name pattern of the search.
 
-def _find_in_gps_dirs(globpath, start, end, ngps=5):
-    span = Segment(start, end)
+    Returns the URL of the predicted file if it exists (which costs one
+    ``stat`` for each base directory), otherwise `None`.
+    """
+    pattern = os.path.basename(items[-1][0])
+    try:
+        head, ext, duration, offset = _cadences[_cadence_key(items[-1][0])]
+    except KeyError:
+        return None
+    start = int(gps - (gps - offset) % duration)
+    filename = '{0}-{1}-{2}{3}'.format(head, start, duration, ext)
+    if not fnmatch.fnmatchcase(filename, pattern):
+        return None
+
+    # files are stored in the GPS directory that holds their start time,
+    # which is the last one searched unless the file started earlier
+    if len(items) > 1 and '%.5s' % start != '%.5s' % int(gps):
+        item = items[-2]
+    else:
+        item = items[-1]
+    for path in item:
+        directory = os.path.dirname(path)
+        if glob.has_magic(directory):
+            return None
+        path = os.path.join(directory, filename)
+        if _instrument.timed('stat', os.path.isfile, path):
+            return _as_url(path)
+    return None
+
+
+def find_trigger_file_at(channel, etg, gps, **kwargs):
+    """Find the trigger file that contains a GPS time.
+
+    For finders that store files in GPS directories, the name of the
+    file is predicted from the cadence (duration and alignment) of the
+    files found by previous searches for the same channel and ETG, and
+    confirmed with a single ``stat``; if there is no prediction, or it
+    is wrong, only the directory that should hold the file is searched
+    (and the one before, if the file isn't found there).
+
+    Parameters
+    ----------
+    channel : `str`
+        name of data channel for which to search
+
+    etg : `str`
+        name of trigger generator that processed the data
+
+    gps : `float`
+        GPS time of interest
+
+    **kwargs
+        custom keyword arguments to pass down to the underlying finder
+
+    Returns
+    -------
+    url : `str`, `None`
+        the URL of the file that contains ``gps``, or `None` if no file
+        was found; if more than one file contains ``gps``, only one of
+        them is returned
+
+    Examples
+    --------
+    >>> from gwtrigfind import find_trigger_file_at
+    >>> url = find_trigger_file_at('L1:GDS-CALIB_STRAIN', 'Omicron',
+    ...                            1126259462.4)
+    """
+    for key in ('jobs', 'processes', 'timeout', 'query_timeout', 'timedout'):
+        kwargs.pop(key, None)
+    planner = _resolve_etg(etg, kwargs)
+    name = _finder_name(planner)
+    with _instrument.finder(name):
+        return _find_file_at(planner, channel, gps, kwargs)
+
+
+def _find_file_at(planner, channel, gps, kwargs):
+    """Find the file containing a GPS time, see `find_trigger_file_at`
+    """
+    start = int(math.floor(gps))
+    func, items = planner(channel, [(start, start + 1)], **kwargs)
+    if items and isinstance(items[-1], tuple):  # GPS directories
+        url = _predict_file_at(items, gps)
+        if url is not None:
+            return url
+        chunks = (func(item) for item in reversed(items))
+    else:
+        chunks = map(func, items)
+    for records in chunks:
+        for fstart, fend, url in records:
+            if fstart <= gps < fend:
+                return url
+    return None
+
+
+def _max_file_duration(finder, maxdur=None, base=None):
+    """Return the maximum file duration to assume for a search
+
+    An explicit ``maxdur`` is always used, otherwise the
+    `MAX_FILE_DURATION` of the ``finder`` is used only for searches of
+    its default archive (``base=None``), or `None` (no limit).
+    """
+    if maxdur is not None or base is not None:
+        return maxdur
+    return MAX_FILE_DURATION.get(finder)
+
+
+def _gps_dirs(segments, ngps=5, maxdur=None):
+    """Return the GPS directory numbers that could hold files for segments
+
+    The directory before that holding the start of each segment is only
+    included if a file starting in it could last long enough to reach
+    the segment, based on the maximum file duration ``maxdur`` (if
+    `None`, it is always included).
+    """
     form = '%%.%ss' % ngps
-    gps5 = max(0, int(form % start) - 1)
-    end5 = int(form % end)
-    out = list()
+    out = set()
+    for start, end in segments:
+        first = int(form % start)
+        last = int(form % end)
+        ndigit = len('%d' % start)
+        if ndigit == len('%d' % end) and ndigit > ngps:
+            scale = 10 ** (ndigit - ngps)
+            if last * scale >= end:  # end is exclusive
+                last -= 1
+            if maxdur is None or start - first * scale < maxdur:
+                first -= 1
+        else:  # directories change scale, be careful
+            first -= 1
+        out.update(range(max(0, first), last + 1))
+    return sorted(out)
+
+
+#: cache of resolved wildcard base directories, see _resolve_base
+_bases = {}
+
+#: how long (seconds) to remember resolved wildcard base directories
+BASE_CACHE_TTL = 300.
+
+
+def _resolve_base(pattern):
+    """Expand a glob pattern for base directories, with caching
+
+    Resolutions are remembered for `BASE_CACHE_TTL` seconds, so that
+    wildcard base directories (e.g. epochs) are only expanded once
+    per query, rather than once per GPS directory.
+    """
+    now = time.monotonic()
+    try:
+        expires, paths = _bases[pattern]
+    except KeyError:
+        pass
+    else:
+        if now < expires:
+            return paths
+    if pattern in _missing:
+        return []
+    paths = sorted(_glob(pattern))
+    if paths:
+        _bases[pattern] = (now + BASE_CACHE_TTL, paths)
+    else:  # remember failures briefly, the base may appear soon
+        _missing.add(pattern)
+    return paths
+
+
+def _gps_templates(globpath):
+    """Resolve wildcards in the base directory of a GPS-directory template
+
+    Returns the list of templates with concrete base directories, or
+    just ``[globpath]`` if it has no GPS directory field (in which case
+    any wildcards are expanded by each search).
+    """
+    if '{0}' not in globpath:
+        return [globpath]
+    prefix, _, suffix = globpath.partition('{0}')
+    head, tail = os.path.split(prefix)
+    if not glob.has_magic(head):
+        return [globpath]
+    return [
+        os.path.join(base, tail) + '{0}' + suffix for
+        base in _resolve_base(head)
+    ]
+
+
+def _plan_gps_dirs(globpath, segments, ngps=5, maxdur=None):
+    """Plan a search of GPS directories
+
+    Returns the search function and the list of items to search, one
+    for each GPS directory that could hold files for any of the segments,
+    each item being a `tuple` of paths (one for each resolved base
+    directory).
+    """
+    templates = _gps_templates(globpath)
+    catalog = _get_catalog()
+    return (
+        lambda paths: _search_gps_dir(paths, segments, catalog=catalog),
+        [tuple(template.format(n) for template in templates) for
+         n in _gps_dirs(segments, ngps=ngps, maxdur=maxdur)],
+    )
+
+
+def _parse_segments(start, end=None):
+    """Normalise a GPS ``[start, end)`` span, or a list of segments
+
+    Returns a time-ordered, coalesced `list` of ``(start, end)`` tuples.
+    """
+    if end is not None:
+        start, end = int(start), int(end)
+        return [(start, end)] if end > start else []
+    return list(Coverage(map(tuple, start)))
+
+
+def _select(records, segments):
+    """Select the files that overlap a list of segments
+
+    Parameters
+    ----------
+    records : `list` of `tuple`
+        ``(start, end, url)`` for each file, sorted in place
+
+    segments : `list` of `tuple`
+        time-ordered, coalesced ``(start, end)`` segments
+
+    Returns
+    -------
+    records : `list` of `tuple`
+        the records of all files that overlap any segment, in time order
+    """
+    records.sort()
+    out = []
     append = out.append
-    while gps5 <= end5:
-        for f in glob.iglob(globpath.format(gps5)):
-            seg = _file_segment(f)
-            if seg.intersects(span):
-                append(_as_url(f))
-        gps5 += 1
-    # return unique list (preserving order)
-    return type(out)(OrderedDict.fromkeys(out))
+    nseg = len(segments)
+    i = 0
+    for record in records:  # single merge pass
+        while i < nseg and segments[i][1] <= record[0]:
+            i += 1
+        if i == nseg:
+            break
+        if segments[i][0] < record[1]:
+            append(record)
+    return out
+
+
+def _utc_days(segments, format):
+    """Return the UTC day strings that overlap any of a list of segments
+    """
+    return _gps.utc_days(segments, format)
+
+
+def _find_files(planner, channel, start, end=None, **kwargs):
+    """Plan and execute a search, returning a `TriggerFileList`
+
+    The list is built from the segments already parsed by the search,
+    see `_iter_records` for details of the keyword arguments.
+    """
+    timedout = kwargs.setdefault('timedout', [])
+    files = TriggerFileList._from_records(
+        _iter_records(planner, channel, start, end, **kwargs))
+    files.timedout = timedout
+    return files
+
+
+def _iter_search(planner, channel, start, end=None, **kwargs):
+    """Plan and execute a search, yielding unique URLs in time order
+
+    See `_iter_records` for details of the keyword arguments.
+    """
+    return (record[2] for record in
+            _iter_records(planner, channel, start, end, **kwargs))
+
+
+def _iter_records(planner, channel, start, end=None, jobs=None,
+                  processes=None, timeout=None, query_timeout=None,
+                  timedout=None, **kwargs):
+    """Plan and execute a search, yielding the ``(start, end, url)`` of
+    each unique file in time order
+
+    With ``processes`` the search is split into `PROCESS_CHUNK`-aligned
+    chunks that are searched in a pool of processes.
+
+    With ``timeout`` or ``query_timeout`` each directory (or day) is
+    searched on a worker thread with a deadline, see `_map_deadline`,
+    and the paths of those that time out are appended to ``timedout``.
+    """
+    segments = _parse_segments(start, end)
+    if not segments:
+        return iter(())
+    if timedout is None:
+        timedout = []
+    if processes and processes > 1:
+        chunks = _split_segments(segments, PROCESS_CHUNK)
+        if len(chunks) > 1:
+            if query_timeout is not None:  # the same deadline for all chunks
+                query_timeout += time.time()
+            profiled = _instrument.active()
+            return _iter_unique(_gather_timedout(_map_processes(
+                _search_chunk,
+                [(planner, channel, chunk, jobs, timeout, query_timeout,
+                  profiled, kwargs) for chunk in chunks],
+                processes,
+            ), timedout))
+    name = _finder_name(planner)
+    with _instrument.finder(name):
+        func, items = planner(channel, segments, **kwargs)
+    func = _instrument.bind(name, func)
+    if timeout is None and query_timeout is None:
+        return _iter_unique(_map(func, items, jobs=jobs))
+    return _iter_unique(_map_deadline(
+        func, items, jobs=jobs, timeout=timeout,
+        query_timeout=query_timeout, timedout=timedout))
+
+
+def _split_segments(segments, step):
+    """Split a list of segments at each multiple of ``step``
+
+    Returns a list of segment lists, one for each ``step``-aligned chunk
+    of time that overlaps any of the segments.
+    """
+    chunks = OrderedDict()
+    for a, b in segments:
+        n = int(a // step)
+        while n * step < b:
+            chunks.setdefault(n, []).append(
+                (max(a, n * step), min(b, (n + 1) * step)))
+            n += 1
+    return list(chunks.values())
+
+
+def _search_chunk(args):
+    """Search one chunk of a multi-process search, see `_iter_records`
+
+    ``query_timeout`` (if given) is the absolute (Unix) time by which the
+    whole search must finish. With ``profiled`` the events of the search
+    are collected into a `~gwtrigfind.instrument.Profile`.
+
+    Returns the list of records found, the list of paths that timed
+    out, and the profile stats (or `None`).
+    """
+    (planner, channel, segments, jobs, timeout, query_timeout, profiled,
+     kwargs) = args
+    if query_timeout is not None:
+        query_timeout = max(query_timeout - time.time(), 0)
+    timedout = []
+    with (_instrument.profile() if profiled else nullcontext()) as prof:
+        records = list(_iter_records(
+            planner, channel, segments, jobs=jobs, timeout=timeout,
+            query_timeout=query_timeout, timedout=timedout, **kwargs))
+    return records, timedout, prof and prof.stats
+
+
+def _gather_timedout(results, timedout):
+    """Yield the records from each `_search_chunk`, recording timeouts
+
+    The events profiled in each worker are reported to the hooks of this
+    process.
+    """
+    for records, paths, stats in results:
+        timedout.extend(paths)
+        if stats:
+            _instrument.replay(stats)
+        yield records
+
+
+def _init_worker(catalog_path):
+    """Set up a worker process of a multi-process search
+
+    A forked worker inherits the catalog (an open database connection)
+    and instrumentation hooks of its parent, neither of which can be used
+    across processes, so the worker drops them and opens its own catalog
+    of the same database (if the parent had one).
+    """
+    from . import catalog
+    catalog._catalog = None  # the parent's connection isn't ours to close
+    if catalog_path is not None:
+        catalog._catalog = catalog.Catalog(*os.path.split(catalog_path))
+    _instrument._hooks.set(())
+
+
+def _map_processes(func, iterable, processes):
+    """Map a function over an iterable using a process pool
+
+    Results are always yielded in the order of the input.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    catalog = _get_catalog()
+    with ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_init_worker,
+            initargs=(None if catalog is None else catalog.path,),
+    ) as executor:
+        yield from executor.map(func, iterable)
+
+
+def _finder_name(planner):
+    """Return the name of the finder for a search planner
+
+    e.g. ``'detchar'`` for `_plan_detchar_files`.
+    """
+    name = planner.__name__
+    if name.startswith('_plan_') and name.endswith('_files'):
+        return name[6:-6]
+    return name
+
+
+def _find_in_gps_dirs(globpath, start, end, ngps=5, jobs=None,
+                      maxdur=None):
+    func, items = _plan_gps_dirs(globpath, _parse_segments(start, end),
+                                 ngps=ngps, maxdur=maxdur)
+    return [record[2] for record in _iter_unique(_map(func, items,
+                                                      jobs=jobs))]
 
 
 def _format_channel_name(channel):
     return channel_delim.sub('_', channel).replace('_', '-', 1)
 
 
-def find_pycbc_live_files(channel, start, end, base=DEFAULT_PYCBC_LIVE_BASE):
+def find_pycbc_live_files(channel, start, end=None,
+                          base=DEFAULT_PYCBC_LIVE_BASE, jobs=None):
     """ Find CBC pycbc live trigger files
 
     Parameters
@@ -320,10 +1803,11 @@ def find_pycbc_live_files(channel, start, end, base=DEFAULT_PYCBC_LIVE_BASE):
     channel : `str`
         name of data channel for which to search
 
-    start : `int`
-        GPS start time of search
+    start : `int`, `list` of `tuple`
+        GPS start time of search, or a list of ``(start, end)`` GPS
+        segments to search (in which case ``end`` must not be given)
 
-    end : `int`
+    end : `int`, optional
         GPS end time of search
 
     base : `str`, optional
@@ -331,43 +1815,62 @@ def find_pycbc_live_files(channel, start, end, base=DEFAULT_PYCBC_LIVE_BASE):
         are located, this should be the parent directory of the '%Y_%m_%d'
         directories
 
+    jobs : `int`, optional
+        number of threads with which to list directories concurrently,
+        defaults to listing one directory at a time
+
     Returns
     -------
-    files : `list` of `str`
+    files : `~gwtrigfind.TriggerFileList`
         a list of file URLs
     """
-    span = Segment(start, end)
-    date = gpstime.fromgps(start)
-    date_end = gpstime.fromgps(end)
-    oneday = datetime.timedelta(days=1)
+    return _find_files(_plan_pycbc_live_files, channel, start, end,
+                       jobs=jobs, base=base)
 
-    cache = list()
-    append = cache.append
-    while date <= date_end:
-        date_fol = date.strftime('%Y_%m_%d')
 
-        # support old convention (no leading zeros in month/day)
-        if '_0' in date_fol and (
-            not os.path.isdir(os.path.join(base, date_fol)) and
-            os.path.isdir(os.path.join(base, date_fol.replace('_0', '_')))
-        ):
-            date_fol = date_fol.replace('_0', '_')
+def iter_pycbc_live_files(channel, start, end=None,
+                          base=DEFAULT_PYCBC_LIVE_BASE, jobs=None):
+    """Iterate over CBC pycbc live trigger files, in time order
 
-        full_path = os.path.join(base, date_fol, '*.hdf')
-        files = glob.glob(full_path)
+    See :func:`find_pycbc_live_files` for details of the parameters.
+
+    Yields
+    ------
+    url : `str`
+        the URL of each file
+    """
+    yield from _iter_search(
+        _plan_pycbc_live_files, channel, start, end, jobs=jobs,
+        base=base,
+    )
+
+
+def _plan_pycbc_live_files(channel, segments, base=DEFAULT_PYCBC_LIVE_BASE):
+    """Plan a search, see :func:`find_pycbc_live_files`
+    """
+    return (
+        lambda path: _search_pycbc_live_day(path, segments),
+        [os.path.join(base, day) for day in _utc_days(segments, '%Y_%m_%d')],
+    )
 
-        for path in files:
-            seg = _file_segment(path)
 
-            if seg.intersects(span):
-                append(_as_url(path))
+def _search_pycbc_live_day(path, segments):
+    # support old convention (no leading zeros in month/day)
+    base, date_fol = os.path.split(path)
+    end = segments[-1][1]
+    if '_0' in date_fol and (
+        not _isdir(path, end=end) and
+        _isdir(os.path.join(base, date_fol.replace('_0', '_')), end=end)
+    ):
+        path = os.path.join(base, date_fol.replace('_0', '_'))
 
-        date += oneday
-    return cache
+    cache = _scan_dir(path, '*.hdf', segments[0][0], segments[-1][1])
+    return _select(cache, segments)
 
 
-def find_daily_cbc_files(channel, start, end, run='bns_gds',
-                         filetag='30MILLISEC_CLUSTERED', ext='xml.gz'):
+def find_daily_cbc_files(channel, start, end=None, run='bns_gds',
+                         filetag='30MILLISEC_CLUSTERED', ext='xml.gz',
+                         jobs=None):
     """Find daily CBC analysis trigger files
 
     Parameters
@@ -375,10 +1878,11 @@ def find_daily_cbc_files(channel, start, end, run='bns_gds',
     channel : `str`
         name of data channel for which to search
 
-    start : `int`
-        GPS start time of search
+    start : `int`, `list` of `tuple`
+        GPS start time of search, or a list of ``(start, end)`` GPS
+        segments to search (in which case ``end`` must not be given)
 
-    end : `int`
+    end : `int`, optional
         GPS end time of search
 
     run : `str`, optional
@@ -392,42 +1896,145 @@ def find_daily_cbc_files(channel, start, end, run='bns_gds',
     ext : `str`, optional
         file extension, defaults to ``'xml.gz'``
 
+    jobs : `int`, optional
+        number of threads with which to list directories concurrently,
+        defaults to listing one directory at a time
+
     Returns
     -------
-    files : `list` of `str`
+    files : `~gwtrigfind.TriggerFileList`
         a list of file URLs
     """
+    return _find_files(_plan_daily_cbc_files, channel, start, end,
+                       jobs=jobs, run=run, filetag=filetag, ext=ext)
+
+
+def iter_daily_cbc_files(channel, start, end=None, run='bns_gds',
+                         filetag='30MILLISEC_CLUSTERED', ext='xml.gz',
+                         jobs=None):
+    """Iterate over daily CBC analysis trigger files, in time order
+
+    See :func:`find_daily_cbc_files` for details of the parameters.
 
-    span = Segment(start, end)
+    Yields
+    ------
+    url : `str`
+        the URL of each file
+    """
+    yield from _iter_search(
+        _plan_daily_cbc_files, channel, start, end, jobs=jobs,
+        run=run, filetag=filetag, ext=ext,
+    )
+
+
+def _plan_daily_cbc_files(channel, segments, run='bns_gds',
+                          filetag='30MILLISEC_CLUSTERED', ext='xml.gz'):
+    """Plan a search, see :func:`find_daily_cbc_files`
+    """
     ifo = channel.split(':')[0]
-    base = os.path.join(os.path.sep, 'home', 'cbc', 'public_html',
-                        'daily_cbc_offline', run)
-    date = gpstime.fromgps(start)
-    end = gpstime.fromgps(end)
-    oneday = datetime.timedelta(days=1)
+    base = os.path.join(DEFAULT_DAILY_CBC_BASE, run)
     filename = '%s-INSPIRAL_%s.cache' % (ifo, filetag)
-    out = list()
-    append = out.append
-    while date <= end:
-        day = date.strftime('%Y%m%d')
-        month = day[:6]
-        cachefile = os.path.join(base, month, day, 'cache', filename)
+    cachefiles = [
+        os.path.join(base, day[:6], day, 'cache', filename) for
+        day in _utc_days(segments, '%Y%m%d')
+    ]
+    return (
+        lambda cachefile: _read_daily_cbc_cache(cachefile, segments),
+        cachefiles,
+    )
+
+
+class _DailyCacheIndex(object):
+    """Parsed contents of a daily CBC cache file, sorted by start time
+    """
+    __slots__ = ('starts', 'ends', 'urls', 'maxdur')
+
+    def __init__(self, cachefile):
+        with open(cachefile, 'r') as f:
+            words = f.read().split()
+        if len(words) % 5:
+            raise ValueError("cannot parse LAL cache file %s" % cachefile)
+        rows = sorted(
+            (float(a), float(a) + float(b), url) for a, b, url in
+            zip(words[2::5], words[3::5], words[4::5])
+        )
+        self.starts = array('d', (row[0] for row in rows))
+        self.ends = array('d', (row[1] for row in rows))
+        self.urls = [_as_url(row[2]) for row in rows]
+        self.maxdur = max((b - a for a, b, _ in rows), default=0.)
+
+    def select(self, segments):
+        """Return the files that overlap any of the segments
+
+        ``segments`` must be time-ordered and coalesced.
+
+        Returns ``(start, end, url)`` for each file, in time order.
+        """
+        starts = self.starts
+        ends = self.ends
+        urls = self.urls
+        out = []
+        append = out.append
+        last = -1
+        for start, end in segments:
+            # no file starting before this can reach the segment
+            i = max(bisect_left(starts, start - self.maxdur), last + 1)
+            stop = bisect_left(starts, end)
+            for i in range(i, stop):
+                if ends[i] > start:
+                    append((starts[i], ends[i], urls[i]))
+                    last = i
+        return out
+
+
+_daily_cbc_caches = OrderedDict()
+_daily_cbc_lock = threading.Lock()
+
+
+def _get_daily_cbc_index(cachefile):
+    """Return the parsed index of a daily CBC cache file
+
+    Indexes are kept in a least-recently-used store of at most
+    `DAILY_CBC_CACHE_SIZE` entries, and are re-read whenever the
+    modification time or size of the file changes.
+    """
+    stat = os.stat(cachefile)
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _daily_cbc_lock:
         try:
-            with open(cachefile, 'r') as f:
-                for line in f:
-                    _, _, fstart, fdur, url = line.strip().split()
-                    fseg = Segment(float(fstart), float(fstart) + float(fdur))
-                    if fseg.intersects(span):
-                        append(_as_url(url))
-        except IOError:
+            stamp, index = _daily_cbc_caches[cachefile]
+        except KeyError:
             pass
-        date += oneday
-    # return unique list (preserving order)
-    return type(out)(OrderedDict.fromkeys(out))
-
-
-def find_omega_online_files(channel, start, end, filetag='DOWNSELECT',
-                            ext='txt'):
+        else:
+            if stamp == key:
+                _daily_cbc_caches.move_to_end(cachefile)
+                return index
+    index = _instrument.timed('open', _DailyCacheIndex, cachefile)
+    with _daily_cbc_lock:
+        _daily_cbc_caches[cachefile] = (key, index)
+        _daily_cbc_caches.move_to_end(cachefile)
+        while len(_daily_cbc_caches) > DAILY_CBC_CACHE_SIZE:
+            _daily_cbc_caches.popitem(last=False)
+    return index
+
+
+def _read_daily_cbc_cache(cachefile, segments):
+    if cachefile in _missing:
+        return []
+    try:
+        index = _get_daily_cbc_index(cachefile)
+    except FileNotFoundError:
+        _missing.add(cachefile, end=segments[-1][1])
+        return []
+    except IOError:
+        return []
+    out = index.select(segments)
+    _instrument.tally(len(index.urls), len(out))
+    return out
+
+
+def find_omega_online_files(channel, start, end=None, filetag='DOWNSELECT',
+                            ext='txt', jobs=None):
     """Find Omega triggers produced by online processes
 
     This is only tested to work for the Omega online processing for GEO600
@@ -437,10 +2044,11 @@ def find_omega_online_files(channel, start, end, filetag='DOWNSELECT',
     channel : `str`
         name of data channel for which to search
 
-    start : `int`
-        GPS start time of search
+    start : `int`, `list` of `tuple`
+        GPS start time of search, or a list of ``(start, end)`` GPS
+        segments to search (in which case ``end`` must not be given)
 
-    end : `int`
+    end : `int`, optional
         GPS end time of search
 
     filetag : `str`, optional
@@ -450,12 +2058,40 @@ def find_omega_online_files(channel, start, end, filetag='DOWNSELECT',
     ext : `str`, optional
         file extension, defaults to ``'txt'``
 
+    jobs : `int`, optional
+        number of threads with which to list directories concurrently,
+        defaults to listing one directory at a time
+
     Returns
     -------
-    files : `list` of `str`
+    files : `~gwtrigfind.TriggerFileList`
         a list of file URLs
     """
+    return _find_files(_plan_omega_online_files, channel, start, end,
+                       jobs=jobs, filetag=filetag, ext=ext)
+
 
+def iter_omega_online_files(channel, start, end=None, filetag='DOWNSELECT',
+                            ext='txt', jobs=None):
+    """Iterate over Omega triggers produced by online processes, in time order
+
+    See :func:`find_omega_online_files` for details of the parameters.
+
+    Yields
+    ------
+    url : `str`
+        the URL of each file
+    """
+    yield from _iter_search(
+        _plan_omega_online_files, channel, start, end, jobs=jobs,
+        filetag=filetag, ext=ext,
+    )
+
+
+def _plan_omega_online_files(channel, segments, filetag='DOWNSELECT',
+                             ext='txt'):
+    """Plan a search, see :func:`find_omega_online_files`
+    """
     # find base path
     ifo, name = channel.split(':', 1)
     if ifo == 'G1':
@@ -468,10 +2104,12 @@ def find_omega_online_files(channel, start, end, filetag='DOWNSELECT',
 
     trigform = '%s-OMEGA_TRIGGERS_%s-*-*.%s' % (ifo, filetag, ext)
 
-    return _find_in_gps_dirs(os.path.join(base, trigform), start, end, ngps=5)
+    return _plan_gps_dirs(os.path.join(base, trigform), segments, ngps=5,
+                          maxdur=_max_file_duration('omega_online'))
 
 
-def find_snax_files(channel, start, end, base=None, ext='h5'):
+def find_snax_files(channel, start, end=None, base=None, ext='h5',
+                    maxdur=None, jobs=None):
     """Find SNAX trigger files
 
     Parameters
@@ -479,10 +2117,11 @@ def find_snax_files(channel, start, end, base=None, ext='h5'):
     channel : `str`
         name of data channel for which to search
 
-    start : `int`
-        GPS start time of search
+    start : `int`, `list` of `tuple`
+        GPS start time of search, or a list of ``(start, end)`` GPS
+        segments to search (in which case ``end`` must not be given)
 
-    end : `int`
+    end : `int`, optional
         GPS end time of search
 
     base : `str`, optional
@@ -492,20 +2131,56 @@ def find_snax_files(channel, start, end, base=None, ext='h5'):
     ext : `str`, optional
         file extension, defaults to ``'xml'``
 
+    maxdur : `float`, optional
+        maximum duration (seconds) of any one file, used to decide whether
+        the directory before the start of the search needs to be listed,
+        defaults to the `MAX_FILE_DURATION` of the default archive, or no
+        limit for a custom ``base``
+
+    jobs : `int`, optional
+        number of threads with which to list directories concurrently,
+        defaults to listing one directory at a time
+
     Returns
     -------
-    files : `list` of `str`
+    files : `~gwtrigfind.TriggerFileList`
         a list of file URLs
     """
+    return _find_files(_plan_snax_files, channel, start, end, jobs=jobs,
+                       base=base, ext=ext, maxdur=maxdur)
+
+
+def iter_snax_files(channel, start, end=None, base=None, ext='h5',
+                    maxdur=None, jobs=None):
+    """Iterate over SNAX trigger files, in time order
+
+    See :func:`find_snax_files` for details of the parameters.
+
+    Yields
+    ------
+    url : `str`
+        the URL of each file
+    """
+    yield from _iter_search(
+        _plan_snax_files, channel, start, end, jobs=jobs,
+        base=base, ext=ext, maxdur=maxdur,
+    )
+
+
+def _plan_snax_files(channel, segments, base=None, ext='h5', maxdur=None):
+    """Plan a search, see :func:`find_snax_files`
+    """
     ifo, name = _format_channel_name(str(channel)).split('-', 1)
 
     # find base path
     tag = f"{ifo}-SNAX_FEATURES"
+    maxdur = _max_file_duration('snax', maxdur, base=base)
     if base is None:
         base = os.path.join(os.sep, 'home', 'idq', 'snax', 'production',
                             'online', '*', 'features')
 
     # loop over GPS directories and find files
     filename = f"{tag}-*-*.{ext}"
-    return _find_in_gps_dirs(os.path.join(base, '{0}', filename),
-                             start, end, ngps=5)
+    return _plan_gps_dirs(os.path.join(base, '{0}', filename),
+                          segments, ngps=5,
+                          maxdur=maxdur)
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Cardiff University (2024)
+#
+# This file is part of GWTrigFind.
+#
+# GWTrigFind is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWTrigFind is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWTrigFind.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Incremental computation of the time covered by a set of files
+"""
+
+from bisect import bisect_left
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+
+class Coverage(object):
+    """Running record of the GPS time covered by a set of files
+
+    Intervals are coalesced as they are added; when they arrive in time
+    order (as they do from the finders) each addition costs constant
+    time, so the coverage of ``N`` files is computed in a single linear
+    sweep, without building a `~ligo.segments.segment` for each file.
+    Out-of-order intervals are still handled correctly.
+
+    Parameters
+    ----------
+    intervals : `iterable` of `tuple`, optional
+        initial ``(start, end)`` intervals to add
+    """
+    def __init__(self, intervals=()):
+        self._segments = []
+        for start, end in intervals:
+            self.add(start, end)
+
+    def add(self, start, end):
+        """Add the interval ``[start, end)`` to this coverage
+        """
+        if not end > start:  # empty (or NaN) interval
+            return
+        segs = self._segments
+        if not segs or start > segs[-1][1]:  # after everything so far
+            segs.append([start, end])
+        elif start >= segs[-1][0]:  # overlaps the latest segment
+            if end > segs[-1][1]:
+                segs[-1][1] = end
+        else:
+            self._insert(start, end)
+
+    def _insert(self, start, end):
+        segs = self._segments
+        i = bisect_left(segs, [start, end])
+        if i and segs[i-1][1] >= start:  # merge with previous
+            i -= 1
+            start = segs[i][0]
+            end = max(end, segs[i][1])
+        j = i
+        while j < len(segs) and segs[j][0] <= end:  # absorb following
+            end = max(end, segs[j][1])
+            j += 1
+        segs[i:j] = [[start, end]]
+
+    def __iter__(self):
+        for start, end in self._segments:
+            yield start, end
+
+    def __len__(self):
+        return len(self._segments)
+
+    def __repr__(self):
+        return '{0}({1!r})'.format(type(self).__name__, list(self))
+
+    @property
+    def livetime(self):
+        """Total time covered
+        """
+        return sum(end - start for start, end in self._segments)
+
+    def segmentlist(self):
+        """Return this coverage as a `~ligo.segments.segmentlist`
+        """
+        from ligo.segments import (segment as Segment,
+                                   segmentlist as SegmentList)
+        return SegmentList(Segment(start, end) for start, end in self)
+
+    def gaps(self, start, end):
+        """Return the intervals of ``[start, end)`` that are not covered
+
+        Returns
+        -------
+        gaps : `list` of `tuple`
+            the ``(start, end)`` of each gap, in time order
+        """
+        out = []
+        cursor = start
+        for segstart, segend in self._segments:
+            if segend <= cursor:
+                continue
+            if segstart >= end:
+                break
+            if segstart > cursor:
+                out.append((cursor, segstart))
+            cursor = segend
+        if cursor < end:
+            out.append((cursor, end))
+        return out
+
+    def fraction(self, start, end):
+        """Return the fraction of ``[start, end)`` that is covered
+        """
+        if not end > start:
+            return 1.
+        missing = sum(b - a for a, b in self.gaps(start, end))
+        return 1. - missing / float(end - start)
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Cardiff University (2024)
+#
+# This file is part of GWTrigFind.
+#
+# GWTrigFind is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWTrigFind is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWTrigFind.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Long-running query daemon with warm directory listings
+
+``gwtrigfind serve`` starts a `QueryServer` that listens on a local Unix
+socket and answers ``gwtrigfind`` queries from a single process. Directory
+listings (re-validated by modification time) and parsed daily-CBC cache
+files stay in memory between queries, so repeated queries avoid both
+interpreter startup and cold filesystem walks.
+
+Each request is one line of JSON, ``{"args": [...], "cwd": "..."}``, where
+``args`` are the command-line arguments for ``gwtrigfind``; each response
+is one line of JSON, ``{"status": 0, "stdout": "...", "stderr": "..."}``.
+
+``gwtrigfind --socket PATH ...`` (or setting ``$GWTRIGFIND_SOCKET``)
+forwards a query to the daemon, and falls back to running it in-process
+if the daemon can't be reached.
+"""
+
+import argparse
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+
+from . import (cli, core)
+from .catalog import default_cache_dir
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+#: name of the environment variable that sets the socket path
+SOCKET_ENV = 'GWTRIGFIND_SOCKET'
+
+#: maximum number of directory listings held by the daemon
+MAX_DIRECTORIES = 16384
+
+#: how long (seconds) to wait for the daemon to accept a connection
+CONNECT_TIMEOUT = 1.
+
+#: how long (seconds) to wait for the daemon to answer a query
+REPLY_TIMEOUT = 600.
+
+
+def default_socket_path():
+    """Return the default path of the daemon socket
+
+    This is ``$GWTRIGFIND_SOCKET`` if set, otherwise
+    ``$XDG_RUNTIME_DIR/gwtrigfind.sock``, otherwise ``gwtrigfind.sock``
+    in :func:`gwtrigfind.catalog.default_cache_dir`.
+    """
+    try:
+        return os.environ[SOCKET_ENV]
+    except KeyError:
+        rundir = os.environ.get('XDG_RUNTIME_DIR') or default_cache_dir()
+        return os.path.join(rundir, 'gwtrigfind.sock')
+
+
+class _ArgumentError(Exception):
+    pass
+
+
+def _raise_argument_error(message):
+    raise _ArgumentError(message)
+
+
+def answer(args, cwd=None):
+    """Run one query, returning its exit status and output
+
+    Parameters
+    ----------
+    args : `list` of `str`
+        the command-line arguments for ``gwtrigfind``
+
+    cwd : `str`, optional
+        the working directory of the client, used to resolve relative
+        paths
+
+    Returns
+    -------
+    response : `dict`
+        the ``status``, ``stdout`` and ``stderr`` of the query
+    """
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    parser = cli.create_parser()
+    parser.error = _raise_argument_error
+    try:
+        opts = parser.parse_args(args)
+        cli.check_args(parser, opts)
+        if cwd and opts.segments_file:
+            opts.segments_file = os.path.join(cwd, opts.segments_file)
+        if cwd and opts.output:
+            opts.output = os.path.join(cwd, opts.output)
+        status = cli.run(opts, stdout=stdout, stderr=stderr)
+    except _ArgumentError as exc:
+        status = 2
+        stderr.write('{0}: error: {1}\n'.format(parser.prog, exc))
+    except SystemExit as exc:  # e.g. --help
+        status = exc.code
+    except Exception as exc:
+        status = 1
+        stderr.write('{0}: {1}\n'.format(type(exc).__name__, exc))
+    return {
+        'status': status,
+        'stdout': stdout.getvalue(),
+        'stderr': stderr.getvalue(),
+    }
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            request = json.loads(line)
+            with core._shared_listings(self.server.listings):
+                response = answer(request['args'], cwd=request.get('cwd'))
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+class QueryServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Server that answers ``gwtrigfind`` queries over a Unix socket
+
+    All queries share one long-lived record of directory listings.
+
+    Parameters
+    ----------
+    path : `str`, optional
+        path of the socket, defaults to :func:`default_socket_path`
+    """
+    daemon_threads = True
+
+    def __init__(self, path=None):
+        self.path = path or default_socket_path()
+        if os.path.exists(self.path):  # clean up after a dead server
+            if forward(self.path, None) is not None:
+                raise RuntimeError(
+                    "a gwtrigfind daemon is already listening on %s"
+                    % self.path)
+            os.unlink(self.path)
+        os.makedirs(os.path.dirname(self.path) or os.curdir, exist_ok=True)
+        super().__init__(self.path, _RequestHandler)
+        self.listings = core._ListingCache(
+            validate=True, maxdirs=MAX_DIRECTORIES)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def forward(path, args, stdout=None, stderr=None, timeout=None):
+    """Forward a query to a running daemon, and print its results
+
+    Parameters
+    ----------
+    path : `str`
+        path of the daemon socket
+
+    args : `list` of `str`, `None`
+        the command-line arguments for ``gwtrigfind``, or `None` to just
+        check that the daemon is listening
+
+    stdout, stderr : `file`, optional
+        where to write the results, defaults to `sys.stdout` and
+        `sys.stderr`
+
+    timeout : `float`, optional
+        how long (seconds) to wait for the daemon to reply, after which
+        the query is abandoned so that the caller can search in-process,
+        defaults to `REPLY_TIMEOUT`
+
+    Returns
+    -------
+    status : `int`, `None`
+        the exit status of the query, or `None` if the daemon could not
+        be reached, or did not reply in time
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CONNECT_TIMEOUT)
+    try:
+        sock.connect(path)
+    except OSError:  # includes socket.timeout
+        sock.close()
+        return None
+    sock.settimeout(REPLY_TIMEOUT if timeout is None else timeout)
+    with sock, sock.makefile('rwb') as stream:
+        if args is None:
+            return 0
+        try:
+            stream.write(json.dumps({
+                'args': list(args),
+                'cwd': os.getcwd(),
+            }).encode('utf-8') + b'\n')
+            stream.flush()
+            line = stream.readline()
+        except socket.timeout:  # daemon is wedged
+            return None
+    if not line:  # daemon went away
+        return None
+    response = json.loads(line)
+    (stdout or sys.stdout).write(response['stdout'])
+    (stderr or sys.stderr).write(response['stderr'])
+    return response['status']
+
+
+def create_parser():
+    """Create a command-line argument parser for ``gwtrigfind serve``
+    """
+    parser = argparse.ArgumentParser(
+        prog='gwtrigfind serve',
+        description=__doc__.split('\n', 1)[0],
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        '--socket',
+        metavar='PATH',
+        default=default_socket_path(),
+        help='path of the socket on which to listen',
+    )
+    return parser
+
+
+def main(args=None):
+    """Run the daemon until interrupted
+    """
+    opts = create_parser().parse_args(args=args)
+    with QueryServer(opts.socket) as server:
+        print("gwtrigfind daemon listening on %s" % server.path,
+              file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
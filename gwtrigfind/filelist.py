@@ -0,0 +1,495 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Cardiff University (2024)
+#
+# This file is part of GWTrigFind.
+#
+# GWTrigFind is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWTrigFind is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWTrigFind.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Compact columnar container for lists of trigger file URLs
+"""
+
+import math
+from array import array
+from collections.abc import Sequence
+
+from .coverage import Coverage
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+NAN = float('nan')
+
+
+def __getattr__(name):
+    # numpy is imported when first needed, since it is slow to import
+    if name == 'numpy':
+        return _numpy()
+    raise AttributeError(
+        "module {0!r} has no attribute {1!r}".format(__name__, name))
+
+
+def _numpy():
+    """Return the `numpy` module, or `None` if it isn't available
+    """
+    try:
+        return globals()['numpy']
+    except KeyError:
+        pass
+    try:
+        import numpy
+    except ImportError:  # numpy is optional
+        numpy = None
+    globals()['numpy'] = numpy
+    return numpy
+
+
+def _format_number(x):
+    if x.is_integer():
+        return '%d' % x
+    return repr(x)
+
+
+def _matches(string, value):
+    """Return `True` if a number formats to ``string``
+    """
+    if string.isdigit() and string[0] != '0':  # fast path for integers
+        return int(string) == value
+    return _format_number(float(value)) == string
+
+
+def _split_url(url):
+    """Split a T050017 file URL into its components
+
+    Returns ``(prefix, observatory, tag, start, duration, ext)``, where
+    ``start`` and ``duration`` are the original strings, and ``ext``
+    includes its leading ``'.'``.
+
+    Raises `ValueError` if the file name doesn't follow T050017.
+    """
+    prefix, _, name = url.rpartition('/')
+    obs, tag, start, last = name.split('-')
+    duration, dot, ext = last.partition('.')
+    return prefix + '/', obs, tag, start, duration, dot + ext
+
+
+class TriggerFileList(Sequence):
+    """A compact, time-aware list of trigger file URLs
+
+    The observatory, tag, GPS start time and duration of each file are
+    parsed once, when the file is added, and stored in array-backed
+    columns alongside a table of shared strings (directory prefixes,
+    observatories, tags and extensions), so each file costs a few dozen
+    bytes, rather than a full `str`.
+
+    Indexing or iterating over a `TriggerFileList` yields the URL of each
+    file as a `str`, and lists can be concatenated with ``+`` (with each
+    other, or with a `list` of URLs), so it can be used in most places a
+    `list` of URLs is expected. It is not a subclass of `list` though,
+    so ``isinstance(files, list)`` is `False`, and :func:`json.dumps`
+    doesn't accept it; use ``list(files)`` for those.
+
+    Parameters
+    ----------
+    urls : `iterable` of `str`, optional
+        the initial URLs to store
+
+    Attributes
+    ----------
+    timedout : `list` of `str`
+        the paths that were not searched because they timed out (see
+        :func:`gwtrigfind.find_trigger_files`), in which case this list
+        is only a partial result
+    """
+    def __init__(self, urls=()):
+        self._strings = []
+        self._index = {}
+        self._prefix = array('I')
+        self._obs = array('I')
+        self._tag = array('I')
+        self._ext = array('I')
+        self._start = array('d')
+        self._duration = array('d')
+        # URLs that cannot be rebuilt from the columns, keyed by position
+        self._extras = {}
+        self._coverage = Coverage()
+        self.timedout = []
+        self.extend(urls)
+
+    @classmethod
+    def _from_columns(cls, strings, start, duration, prefix, obs, tag, ext,
+                      extras=None):
+        """Create a new list directly from its columns
+
+        ``prefix``, ``obs``, ``tag`` and ``ext`` are indices into
+        ``strings``.
+        """
+        new = cls()
+        new._strings = list(strings)
+        new._index = {string: i for i, string in
+                      reversed(list(enumerate(new._strings)))}
+        new._prefix = prefix
+        new._obs = obs
+        new._tag = tag
+        new._ext = ext
+        new._start = start
+        new._duration = duration
+        new._extras = dict(extras or {})
+        add = new._coverage.add
+        for fstart, fduration in zip(start, duration):
+            add(fstart, fstart + fduration)
+        return new
+
+    @classmethod
+    def _from_records(cls, records):
+        """Create a new list from ``(start, end, url)`` records
+
+        The GPS segment of each file is taken from its record (e.g. as
+        already parsed by a directory scanner), rather than parsed again
+        from its URL.
+        """
+        new = cls()
+        new._extend_records(records)
+        return new
+
+    # -- building -------------------------------
+
+    def _intern(self, string):
+        try:
+            return self._index[string]
+        except KeyError:
+            idx = self._index[string] = len(self._strings)
+            self._strings.append(string)
+            return idx
+
+    def append(self, url):
+        """Append a new URL to this list
+        """
+        intern = self._intern
+        try:
+            prefix, obs, tag, start, duration, ext = _split_url(url)
+            fstart = float(start)
+            fduration = float(duration)
+        except ValueError:  # not T050017, store as-is
+            prefix = obs = tag = ext = ''
+            fstart = fduration = NAN
+            self._extras[len(self)] = url
+        else:
+            if (_format_number(fstart) != start
+                    or _format_number(fduration) != duration):
+                self._extras[len(self)] = url
+        self._prefix.append(intern(prefix))
+        self._obs.append(intern(obs))
+        self._tag.append(intern(tag))
+        self._ext.append(intern(ext))
+        self._start.append(fstart)
+        self._duration.append(fduration)
+        self._coverage.add(fstart, fstart + fduration)
+
+    def extend(self, urls):
+        """Append many URLs to this list
+        """
+        if isinstance(urls, TriggerFileList):
+            urls = iter(urls)
+        for url in urls:
+            self.append(url)
+
+    def _extend_records(self, records):
+        """Append many ``(start, end, url)`` records to this list
+        """
+        intern = self._intern
+        extras = self._extras
+        prefixes = self._prefix
+        obss = self._obs
+        tags = self._tag
+        exts = self._ext
+        starts = self._start
+        durations = self._duration
+        add = self._coverage.add
+        i = len(starts)
+        for fstart, fend, url in records:
+            prefix, _, name = url.rpartition('/')
+            try:
+                obs, tag, start, last = name.split('-')
+            except ValueError:  # not T050017, store as-is
+                prefix = obs = tag = ext = ''
+                extras[i] = url
+            else:
+                duration, dot, ext = last.partition('.')
+                prefix += '/'
+                ext = dot + ext
+                if not (_matches(start, fstart)
+                        and _matches(duration, fend - fstart)):
+                    extras[i] = url
+            prefixes.append(intern(prefix))
+            obss.append(intern(obs))
+            tags.append(intern(tag))
+            exts.append(intern(ext))
+            starts.append(fstart)
+            durations.append(fend - fstart)
+            add(fstart, fend)
+            i += 1
+
+    def __add__(self, other):
+        if not isinstance(other, (TriggerFileList, list, tuple)):
+            return NotImplemented
+        new = self._take(range(len(self)))
+        new.extend(other)
+        return new
+
+    def __radd__(self, other):
+        if not isinstance(other, (list, tuple)):
+            return NotImplemented
+        new = type(self)(other)
+        new.extend(self)
+        return new
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+    def _take(self, indices, coverage=None):
+        """Return a new list of the files at the given indices
+
+        ``coverage`` is the `Coverage` of the new list, if already known.
+        """
+        new = type(self)()
+        new._strings = self._strings
+        new._index = self._index
+        columns = ('_prefix', '_obs', '_tag', '_ext', '_start', '_duration')
+        numpy = _numpy()
+        if numpy is not None:
+            indices = numpy.asarray(indices, dtype=numpy.intp)
+            for col in columns:
+                old = getattr(self, col)
+                taken = array(old.typecode)
+                taken.frombytes(numpy.frombuffer(
+                    old, dtype=old.typecode)[indices].tobytes())
+                setattr(new, col, taken)
+        else:
+            for col in columns:
+                old = getattr(self, col)
+                setattr(new, col, array(old.typecode,
+                                        (old[i] for i in indices)))
+        if self._extras:
+            new._extras = {j: self._extras[i] for j, i in
+                           enumerate(indices.tolist() if numpy else indices)
+                           if i in self._extras}
+        new.timedout = list(self.timedout)
+        if coverage is not None:
+            new._coverage = Coverage(coverage)
+        elif numpy is not None:  # add in time order, the cheapest for Coverage
+            starts = numpy.frombuffer(new._start, dtype='d')
+            ends = starts + numpy.frombuffer(new._duration, dtype='d')
+            order = numpy.argsort(starts, kind='stable')
+            new._coverage = Coverage(zip(starts[order].tolist(),
+                                         ends[order].tolist()))
+        else:
+            add = new._coverage.add
+            for start, duration in zip(new._start, new._duration):
+                add(start, start + duration)
+        return new
+
+    # -- sequence interface ---------------------
+
+    def __len__(self):
+        return len(self._start)
+
+    def _url(self, i):
+        try:
+            return self._extras[i]
+        except KeyError:
+            strings = self._strings
+            return ''.join((
+                strings[self._prefix[i]],
+                strings[self._obs[i]],
+                '-',
+                strings[self._tag[i]],
+                '-',
+                _format_number(self._start[i]),
+                '-',
+                _format_number(self._duration[i]),
+                strings[self._ext[i]],
+            ))
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self._take(range(*key.indices(len(self))))
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("TriggerFileList index out of range")
+        return self._url(key)
+
+    def __iter__(self):
+        url = self._url
+        for i in range(len(self)):
+            yield url(i)
+
+    def __eq__(self, other):
+        if not isinstance(other, (TriggerFileList, list, tuple)):
+            return NotImplemented
+        return len(self) == len(other) and all(
+            a == b for a, b in zip(self, other))
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        if eq is NotImplemented:
+            return eq
+        return not eq
+
+    def __repr__(self):
+        return '{0}({1!r})'.format(type(self).__name__, list(self))
+
+    @property
+    def partial(self):
+        """`True` if any paths timed out before they were searched
+        """
+        return bool(self.timedout)
+
+    # -- columns --------------------------------
+
+    def _column(self, name):
+        col = getattr(self, name)
+        numpy = _numpy()
+        if numpy is not None:
+            return numpy.array(col, dtype=col.typecode)
+        return array(col.typecode, col)
+
+    @property
+    def start(self):
+        """The GPS start time of each file
+        """
+        return self._column('_start')
+
+    @property
+    def duration(self):
+        """The duration (seconds) of each file
+        """
+        return self._column('_duration')
+
+    @property
+    def observatory(self):
+        """The observatory prefix of each file
+        """
+        return [self._strings[i] for i in self._obs]
+
+    @property
+    def tag(self):
+        """The description tag of each file
+        """
+        return [self._strings[i] for i in self._tag]
+
+    def lal_cache_entry(self, index):
+        """Format one file as a LAL cache entry
+
+        The entry has the form ``'<obs> <tag> <start> <duration> <url>'``.
+        """
+        if index < 0:
+            index += len(self)
+        url = self._url(index)
+        if index in self._extras:
+            _, obs, tag, start, duration, _ = _split_url(url)
+        else:
+            strings = self._strings
+            obs = strings[self._obs[index]]
+            tag = strings[self._tag[index]]
+            start = _format_number(self._start[index])
+            duration = _format_number(self._duration[index])
+        return ' '.join((obs, tag, start, duration, url))
+
+    # -- segment operations ---------------------
+
+    def _spans(self):
+        """Return the ``(start, end)`` arrays of parsed files
+        """
+        start = self.start
+        duration = self.duration
+        numpy = _numpy()
+        if numpy is not None:
+            keep = ~numpy.isnan(start)
+            return start[keep], start[keep] + duration[keep]
+        pairs = [(s, s + d) for s, d in zip(start, duration) if
+                 not math.isnan(s)]
+        return [s for s, _ in pairs], [e for _, e in pairs]
+
+    def segments(self):
+        """Return the GPS segment covered by each file
+
+        Returns
+        -------
+        segments : `ligo.segments.segmentlist`
+            one segment per file, in the same order as this list
+        """
+        starts, ends = self._spans()
+        from ligo.segments import (segment as Segment,
+                                   segmentlist as SegmentList)
+        return SegmentList(map(Segment, zip(starts, ends)))
+
+    def coverage(self):
+        """Return the GPS segments covered by any file in this list
+
+        The coverage is accumulated as files are added, so this doesn't
+        need to construct a segment for each file.
+
+        Returns
+        -------
+        coverage : `ligo.segments.segmentlist`
+            the coalesced list of covered segments
+        """
+        return self._coverage.segmentlist()
+
+    def crop(self, span):
+        """Return a new list with only those files that overlap a span
+
+        Parameters
+        ----------
+        span : `tuple`
+            the ``(start, end)`` GPS span of interest
+
+        Returns
+        -------
+        cropped : `TriggerFileList`
+            a new list
+        """
+        start, end = span
+        numpy = _numpy()
+        if numpy is not None:
+            starts = numpy.frombuffer(self._start, dtype='d')
+            ends = starts + numpy.frombuffer(self._duration, dtype='d')
+            return self._take(numpy.flatnonzero(
+                (starts < end) & (ends > start)))
+        starts = self._start
+        durations = self._duration
+        return self._take([
+            i for i in range(len(self)) if
+            starts[i] < end and starts[i] + durations[i] > start
+        ])
+
+    def sort(self):
+        """Sort this list in place by GPS start time (then duration)
+        """
+        numpy = _numpy()
+        if numpy is not None:
+            order = numpy.lexsort((
+                numpy.frombuffer(self._duration, dtype='d'),
+                numpy.frombuffer(self._start, dtype='d'),
+            ))
+        else:
+            starts = self._start
+            durations = self._duration
+            order = sorted(range(len(self)),
+                           key=lambda i: (starts[i], durations[i]))
+        new = self._take(order, coverage=self._coverage)
+        for col in ('_prefix', '_obs', '_tag', '_ext', '_start', '_duration',
+                    '_extras'):
+            setattr(self, col, getattr(new, col))
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Cardiff University (2024)
+#
+# This file is part of GWTrigFind.
+#
+# GWTrigFind is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWTrigFind is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWTrigFind.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Follow new trigger files as they are written
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import time
+
+from . import core
+from .gps import gps_now
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+# inotify event flags, see inotify(7)
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+
+
+class _Inotify(object):
+    """Minimal `ctypes` interface to Linux inotify
+
+    Used only to wake up early when a watched directory changes, all
+    changes are then found by (mtime-gated) rescans.
+    """
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p,
+                                    ctypes.c_uint32)
+        self._rm_watch = libc.inotify_rm_watch
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._watches = {}
+
+    def watch(self, directories):
+        """Watch exactly these directories
+        """
+        directories = set(directories)
+        for path in set(self._watches) - directories:
+            self._rm_watch(self.fd, self._watches.pop(path))
+        for path in directories - set(self._watches):
+            wd = self._add_watch(self.fd, os.fsencode(path), _IN_MASK)
+            if wd >= 0:  # directory may not exist (yet)
+                self._watches[path] = wd
+
+    def wait(self, timeout):
+        if select.select([self.fd], [], [], timeout)[0]:
+            try:
+                while os.read(self.fd, 65536):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _Sleeper(object):
+    """Fallback for `_Inotify` where it isn't available
+    """
+    def watch(self, directories):
+        pass
+
+    def wait(self, timeout):
+        time.sleep(timeout)
+
+    def close(self):
+        pass
+
+
+def _waiter():
+    try:
+        return _Inotify()
+    except (AttributeError, OSError, TypeError):  # no inotify
+        return _Sleeper()
+
+
+def follow_trigger_files(channel, etg, start, end=None, interval=1.,
+                         lookback=600, **kwargs):
+    """Find trigger files, then follow new files as they are written
+
+    After an initial search from ``start`` until now, the directories
+    that hold the latest files are rescanned whenever they change
+    (using inotify where available, otherwise every ``interval``
+    seconds), moving on to new GPS or day directories as time passes.
+    Each directory is only re-listed when its modification time changes.
+
+    Parameters
+    ----------
+    channel : `str`
+        name of data channel for which to search
+
+    etg : `str`
+        name of trigger generator that processed the data
+
+    start : `int`
+        GPS start time of search
+
+    end : `int`, optional
+        GPS time after which to stop following, defaults to following
+        forever
+
+    interval : `float`, optional
+        maximum time (seconds) between rescans
+
+    lookback : `float`, optional
+        how long (seconds) before the end of the latest file to keep
+        looking for files that are written late
+
+    **kwargs
+        other keyword arguments to pass to :func:`find_trigger_files`
+
+    Yields
+    ------
+    url : `str`
+        the URL of each file, with each file yielded only once; files
+        are yielded in time order for each rescan
+
+    Examples
+    --------
+    >>> from gwtrigfind import follow_trigger_files
+    >>> for url in follow_trigger_files('L1:GDS-CALIB_STRAIN', 'omicron',
+    ...                                 1400000000):
+    ...     print(url)
+    """
+    listings = core._ListingCache(validate=True, maxdirs=64, track=True)
+    waiter = _waiter()
+    seen = {}  # url -> end time of recent files
+    latest = start = int(start)
+    try:
+        while True:
+            now = int(gps_now())
+            stop = now if end is None else min(now, int(end))
+            lower = max(start, latest - lookback)
+            listings.touched.clear()
+            # new directories may appear, so don't trust recent misses
+            with core._missing.ignore_recent(), \
+                    core._shared_listings(listings):
+                new = [url for url in core.iter_trigger_files(
+                    channel, etg, [(lower, stop)], **kwargs) if
+                    url not in seen]
+            for url in new:
+                try:
+                    fend = float(core._file_segment(url)[1])
+                except ValueError:
+                    fend = lower
+                seen[url] = fend
+                latest = max(latest, fend)
+                yield url
+            if end is not None and now >= end:
+                return
+            # forget files that are now outside the search window
+            lower = max(start, latest - lookback)
+            seen = {url: fend for url, fend in seen.items() if fend > lower}
+            waiter.watch(listings.touched)
+            waiter.wait(interval)
+    finally:
+        waiter.close()
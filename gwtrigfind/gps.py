@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Cardiff University (2024)
+#
+# This file is part of GWTrigFind.
+#
+# GWTrigFind is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWTrigFind is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWTrigFind.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Conversions between GPS time and UTC days
+
+This is a minimal, dependency-free replacement for the parts of
+:mod:`gpstime` used when searching for files in UTC day directories.
+All conversions use integer arithmetic and an embedded table of leap
+seconds, `LEAP_SECONDS`, which must be updated whenever the IERS
+announces a new leap second.
+"""
+
+import time
+from bisect import bisect_right
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+#: the UTC dates (at midnight) at which each leap second since the GPS
+#: epoch took effect
+LEAP_SECONDS = (
+    (1981, 7, 1),
+    (1982, 7, 1),
+    (1983, 7, 1),
+    (1985, 7, 1),
+    (1988, 1, 1),
+    (1990, 1, 1),
+    (1991, 1, 1),
+    (1992, 7, 1),
+    (1993, 7, 1),
+    (1994, 7, 1),
+    (1996, 1, 1),
+    (1997, 7, 1),
+    (1999, 1, 1),
+    (2006, 1, 1),
+    (2009, 1, 1),
+    (2012, 7, 1),
+    (2015, 7, 1),
+    (2017, 1, 1),
+)
+
+#: the Unix time of the GPS epoch (1980-01-06 00:00:00 UTC)
+GPS_EPOCH_UNIX = 315964800
+
+_DAY = 86400
+
+
+def _days_from_civil(year, month, day):
+    """Return the number of days since 1970-01-01 of a proleptic
+    Gregorian date
+    """
+    year -= month <= 2
+    era = year // 400
+    yoe = year - era * 400
+    doy = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
+def _civil_from_days(days):
+    """Return the ``(year, month, day)`` of a number of days since
+    1970-01-01
+    """
+    days += 719468
+    era = days // 146097
+    doe = days - era * 146097
+    yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    mp = (5 * doy + 2) // 153
+    day = doy - (153 * mp + 2) // 5 + 1
+    month = mp + (3 if mp < 10 else -9)
+    return yoe + era * 400 + (month <= 2), month, day
+
+
+# GPS time at which each leap second took effect
+_LEAP_GPS = tuple(
+    _days_from_civil(*date) * _DAY - GPS_EPOCH_UNIX + i for
+    i, date in enumerate(LEAP_SECONDS, start=1)
+)
+
+
+def gps_to_unix(gps):
+    """Convert a GPS time to a Unix time (seconds since 1970-01-01 UTC)
+
+    A leap second (``23:59:60``) is mapped to the preceding second.
+    """
+    return gps + GPS_EPOCH_UNIX - bisect_right(_LEAP_GPS, gps + 1)
+
+
+def unix_to_gps(unix):
+    """Convert a Unix time to a GPS time
+    """
+    gps = unix - GPS_EPOCH_UNIX
+    return gps + bisect_right(
+        _LEAP_GPS, gps + bisect_right(_LEAP_GPS, gps) + 1)
+
+
+def gps_to_date(gps):
+    """Return the UTC ``(year, month, day)`` of a GPS time
+    """
+    return _civil_from_days(int(gps_to_unix(gps) // _DAY))
+
+
+def date_to_gps(year, month, day):
+    """Return the GPS time of midnight UTC at the start of a date
+    """
+    return unix_to_gps(_days_from_civil(year, month, day) * _DAY)
+
+
+def gps_now():
+    """Return the current GPS time
+    """
+    return unix_to_gps(time.time())
+
+
+def _day_template(format):
+    """Convert a `~time.strftime` day format into a `str.format` template
+
+    Only ``%Y``, ``%m``, ``%d``, their unpadded forms ``%-m`` and
+    ``%-d``, and ``%%`` are supported.
+    """
+    out = []
+    i = 0
+    while i < len(format):
+        char = format[i]
+        if char != '%':
+            out.append(char.replace('{', '{{').replace('}', '}}'))
+            i += 1
+            continue
+        code = format[i+1:i+3]
+        if code.startswith('-') and code[1:] in ('m', 'd'):
+            out.append('{1}' if code[1] == 'm' else '{2}')
+            i += 3
+            continue
+        try:
+            out.append({
+                'Y': '{0:04d}',
+                'm': '{1:02d}',
+                'd': '{2:02d}',
+                '%': '%',
+            }[code[:1]])
+        except KeyError:
+            raise ValueError("unsupported day format %r" % format)
+        i += 2
+    return ''.join(out)
+
+
+def utc_days(segments, format='%Y%m%d'):
+    """Return the UTC days that overlap any of a list of GPS segments
+
+    Parameters
+    ----------
+    segments : `list` of `tuple`
+        time-ordered ``(start, end)`` GPS segments, the day containing
+        each ``end`` is included
+
+    format : `str`, optional
+        the `~time.strftime`-style format of each day, supporting
+        ``%Y``, ``%m``, ``%d``, ``%-m`` and ``%-d`` (e.g. ``'%Y_%-m_%-d'``
+        for days without leading zeros)
+
+    Returns
+    -------
+    days : `list` of `str`
+        the formatted days, in order, without duplicates
+
+    Examples
+    --------
+    >>> from gwtrigfind.gps import utc_days
+    >>> utc_days([(1126259462, 1126345862)], '%Y_%m_%d')
+    ['2015_09_14', '2015_09_15']
+    """
+    template = _day_template(format).format
+    days = []
+    last = float('-inf')
+    for start, end in segments:
+        first = max(int(gps_to_unix(start) // _DAY), last + 1)
+        last = max(int(gps_to_unix(end) // _DAY), last)
+        days.extend(template(*_civil_from_days(n)) for
+                    n in range(first, last + 1))
+    return days
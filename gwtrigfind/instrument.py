@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Cardiff University (2024)
+#
+# This file is part of GWTrigFind.
+#
+# GWTrigFind is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWTrigFind is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWTrigFind.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Instrumentation of filesystem access by the trigger finders
+
+Each operation a finder performs is reported to all registered hooks as
+an *event*, attributed to the finder that is running (e.g.
+``'detchar'``, ``'pycbc_live'``). The events are
+
+``'listdir'``
+    a directory was listed
+
+``'glob'``
+    a glob pattern was expanded on the filesystem
+
+``'isdir'``
+    a path was probed to see if it is a directory
+
+``'stat'``
+    a directory was checked for changes since it was last scanned, or
+    a predicted file name was checked
+
+``'manifest'``
+    a directory manifest was looked for (and read)
+
+``'catalog'``
+    a search was answered by the persistent catalog
+
+``'open'``
+    a file was opened and read
+
+``'write'``
+    a batch of output was written
+
+``'examined'``
+    file names (or cache entries) were considered
+
+``'matched'``
+    files were selected
+
+Hooks are registered for the current `contextvars` context (i.e. the
+current thread, and the worker threads of its searches), so that (e.g.)
+concurrent queries answered by the daemon are profiled separately.
+When no hooks are registered, instrumentation costs (almost) nothing.
+
+Examples
+--------
+>>> from gwtrigfind import find_trigger_files, instrument
+>>> with instrument.profile() as prof:
+...     find_trigger_files('L1:GDS-CALIB_STRAIN', 'Omicron',
+...                        1135641617, 1135728017)
+>>> prof.to_dict()
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+_hooks = ContextVar('gwtrigfind_hooks', default=())
+_finder = ContextVar('gwtrigfind_finder', default=None)
+
+
+def add_hook(hook):
+    """Register a callback to receive instrumentation events
+
+    Parameters
+    ----------
+    hook : `callable`
+        a function with signature ``hook(finder, event, count, duration)``,
+        where ``finder`` is the name of the finder (or `None`), ``event``
+        is the name of the event, ``count`` is the number of operations,
+        and ``duration`` is the time they took (seconds)
+
+    The hook only receives the events of searches in the current context.
+    """
+    _hooks.set(_hooks.get() + (hook,))
+
+
+def remove_hook(hook):
+    """Unregister a callback added with :func:`add_hook`
+    """
+    hooks = list(_hooks.get())
+    hooks.remove(hook)
+    _hooks.set(tuple(hooks))
+
+
+def active():
+    """Return `True` if any hooks are registered in the current context
+    """
+    return bool(_hooks.get())
+
+
+def record(event, count=1, duration=0.):
+    """Report an event to all registered hooks
+    """
+    finder = _finder.get()
+    for hook in _hooks.get():
+        hook(finder, event, count, duration)
+
+
+def tally(examined, matched):
+    """Report the number of files examined and matched by a search
+    """
+    if _hooks.get():
+        record('examined', examined)
+        record('matched', matched)
+
+
+def timed(event, func, *args):
+    """Call ``func(*args)``, reporting its duration as an event
+    """
+    if not _hooks.get():
+        return func(*args)
+    start = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        record(event, 1, time.perf_counter() - start)
+
+
+def replay(stats):
+    """Report the events collected by a `Profile` to all registered hooks
+
+    This is used to gather the events of worker processes.
+
+    Parameters
+    ----------
+    stats : `dict`
+        the `Profile.stats` to report
+    """
+    for name, events in stats.items():
+        with finder(None if name == 'other' else name):
+            for event, (count, duration) in events.items():
+                record(event, count, duration)
+
+
+@contextmanager
+def finder(name):
+    """Context in which all events are attributed to the named finder
+    """
+    token = _finder.set(name)
+    try:
+        yield
+    finally:
+        _finder.reset(token)
+
+
+def bind(name, func):
+    """Wrap a function so that its events are attributed to a finder
+
+    This is needed for functions that are run in worker threads, which
+    don't inherit the calling context.
+    """
+    @wraps(func)
+    def wrapped(*args, **kwargs):
+        with finder(name):
+            return func(*args, **kwargs)
+    return wrapped
+
+
+class Profile(object):
+    """Hook that accumulates counts and times of events, per finder
+    """
+    def __init__(self):
+        self.stats = {}
+        self.wall = 0.
+        self._lock = threading.Lock()
+
+    def __call__(self, finder, event, count, duration):
+        with self._lock:
+            stats = self.stats.setdefault(finder or 'other', {}).setdefault(
+                event, [0, 0.])
+            stats[0] += count
+            stats[1] += duration
+
+    def to_dict(self):
+        """Return the profile as a JSON-serialisable `dict`
+        """
+        return {
+            'wall': self.wall,
+            'finders': {
+                finder: {
+                    event: {'count': count, 'time': duration} for
+                    event, (count, duration) in sorted(events.items())
+                } for finder, events in sorted(self.stats.items())
+            },
+        }
+
+
+@contextmanager
+def profile():
+    """Context in which all events are collected into a `Profile`
+    """
+    prof = Profile()
+    token = _hooks.set(_hooks.get() + (prof,))
+    start = time.perf_counter()
+    try:
+        yield prof
+    finally:
+        prof.wall = time.perf_counter() - start
+        _hooks.reset(token)
@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Cardiff University (2024)
+#
+# This file is part of GWTrigFind.
+#
+# GWTrigFind is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWTrigFind is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWTrigFind.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Sidecar manifests of trigger directory contents
+
+A manifest records the T050017 files in one directory, sorted by GPS
+start time, along with the modification time of the directory when the
+manifest was written. When a manifest is fresh (the directory hasn't
+changed since), the finders read it instead of listing the directory,
+and only look at the files that overlap the search.
+
+Manifests are written by ``gwtrigfind index build <root>``, either
+into each directory as ``.gwtrigfind-manifest``, or into a parallel
+tree under ``$GWTRIGFIND_INDEX_DIR`` (for read-only archives).
+
+Searches only look for a manifest before listing a directory if
+``$GWTRIGFIND_INDEX_DIR`` is set, or after :func:`enable_manifests`;
+otherwise a manifest is only read if it shows up in the listing of its
+directory, so directories without one cost nothing extra.
+
+The manifest format is plain text::
+
+    # gwtrigfind manifest 1
+    # mtime <directory mtime in ns>
+    <start> <duration> <name>
+    ...
+    # end <number of files>
+"""
+
+import argparse
+import os
+import sys
+import time
+from array import array
+from bisect import bisect_left
+
+from .catalog import (MTIME_SETTLE, _parse_name)
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+#: name of manifest files
+MANIFEST_NAME = '.gwtrigfind-manifest'
+
+#: name of the environment variable that sets the root of a parallel
+#: index tree
+INDEX_DIR_ENV = 'GWTRIGFIND_INDEX_DIR'
+
+_HEADER = '# gwtrigfind manifest 1'
+
+#: whether searches look for manifests before listing directories,
+#: `None` to do so only if ``$GWTRIGFIND_INDEX_DIR`` is set, see
+#: :func:`enable_manifests`
+_enabled = None
+
+
+def manifest_path(directory, index_dir=None):
+    """Return the path of the manifest for a directory
+
+    Parameters
+    ----------
+    directory : `str`
+        the trigger directory
+
+    index_dir : `str`, optional
+        root of a parallel index tree, defaults to ``$GWTRIGFIND_INDEX_DIR``
+        if set, otherwise (or if ``''``) manifests are stored in each
+        directory
+    """
+    directory = os.path.abspath(directory)
+    if index_dir is None:
+        index_dir = os.environ.get(INDEX_DIR_ENV)
+    if not index_dir:
+        return os.path.join(directory, MANIFEST_NAME)
+    return os.path.join(index_dir, directory.lstrip(os.sep), MANIFEST_NAME)
+
+
+class Manifest(object):
+    """The T050017 files in a directory, sorted by GPS start time
+    """
+    __slots__ = ('starts', 'ends', 'names', 'maxdur')
+
+    def __init__(self, records):
+        records = sorted(records)
+        self.starts = array('d', (r[0] for r in records))
+        self.ends = array('d', (r[0] + r[1] for r in records))
+        self.names = [r[2] for r in records]
+        self.maxdur = max((r[1] for r in records), default=0.)
+
+    def __len__(self):
+        return len(self.names)
+
+    def select(self, start, end):
+        """Return the names of files that overlap ``[start, end)``
+        """
+        ends = self.ends
+        names = self.names
+        first = bisect_left(self.starts, start - self.maxdur)
+        last = bisect_left(self.starts, end)
+        return [names[i] for i in range(first, last) if ends[i] > start]
+
+
+def read_manifest(directory, index_dir=None):
+    """Read the manifest for a directory, if it is fresh
+
+    Returns
+    -------
+    manifest : `Manifest`, `None`
+        the manifest, or `None` if there is no manifest, it can't be
+        read, or it is stale
+    """
+    try:
+        with open(manifest_path(directory, index_dir=index_dir), 'r') as f:
+            lines = f.read().splitlines()
+    except (OSError, UnicodeDecodeError):
+        return None
+    try:
+        header, stamp = lines[:2]
+        trailer = lines[-1]
+        if (header != _HEADER or not stamp.startswith('# mtime ')
+                or trailer != '# end %d' % (len(lines) - 3)):
+            return None  # not a manifest, or partly written
+        mtime = int(stamp[8:])
+        records = []
+        append = records.append
+        for line in lines[2:-1]:
+            a, b, name = line.split(' ', 2)
+            append((float(a), float(b), name))
+    except ValueError:
+        return None
+    try:
+        if os.stat(directory).st_mtime_ns != mtime:
+            return None  # stale
+    except OSError:
+        return None
+    return Manifest(records)
+
+
+def enable_manifests():
+    """Look for a manifest before listing each directory
+
+    This is only worthwhile if most directories searched have a manifest,
+    see :func:`manifests_enabled`.
+    """
+    global _enabled
+    _enabled = True
+
+
+def disable_manifests():
+    """Only read manifests that show up in a directory listing
+    """
+    global _enabled
+    _enabled = False
+
+
+def manifests_enabled():
+    """Return whether searches look for manifests before listing
+
+    This is the case after :func:`enable_manifests`, or by default if
+    ``$GWTRIGFIND_INDEX_DIR`` is set.
+    """
+    if _enabled is None:
+        return bool(os.environ.get(INDEX_DIR_ENV))
+    return _enabled
+
+
+def _create_inplace(directory, index_dir=None):
+    """Create an empty manifest file in a directory, if needed
+
+    Creating a file changes the modification time of the directory, so
+    this must happen (at least `~gwtrigfind.catalog.MTIME_SETTLE` seconds)
+    before the manifest is written.
+
+    Returns `True` if a file was created.
+    """
+    directory = os.path.abspath(directory)
+    path = manifest_path(directory, index_dir=index_dir)
+    if os.path.dirname(path) != directory or os.path.exists(path):
+        return False
+    open(path, 'a').close()
+    return True
+
+
+def write_manifest(directory, index_dir=None):
+    """Write the manifest for a directory
+
+    Directories that were modified less than
+    `~gwtrigfind.catalog.MTIME_SETTLE` seconds ago are skipped, since
+    later changes may not change their modification time. This includes
+    directories in which the manifest file has just been created.
+
+    Returns
+    -------
+    nfiles : `int`, `None`
+        the number of files recorded, or `None` if the directory was
+        skipped
+    """
+    directory = os.path.abspath(directory)
+    path = manifest_path(directory, index_dir=index_dir)
+    inplace = os.path.dirname(path) == directory
+    if inplace:
+        _create_inplace(directory)
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    mtime = os.stat(directory).st_mtime_ns
+    if time.time() - mtime * 1e-9 <= MTIME_SETTLE:
+        return None
+    records = []
+    for name in os.listdir(directory):
+        if name.startswith('.'):
+            continue
+        seg = _parse_name(name)
+        if seg is not None:
+            records.append((seg, name))
+    records.sort()
+    lines = [_HEADER, '# mtime %d' % mtime]
+    lines.extend('%r %r %s' % (a, b, name) for (a, b), name in records)
+    lines.append('# end %d' % len(records))
+    # fill in place, which doesn't change the directory mtime
+    with open(path, 'r+' if inplace else 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+        f.truncate()
+    return len(records)
+
+
+def build(root, index_dir=None):
+    """Write manifests for all directories under ``root``
+
+    Only directories that contain T050017 files are indexed.
+
+    Returns
+    -------
+    results : `list` of `tuple`
+        the path of each directory, and the number of files recorded
+        (`None` if the directory was skipped)
+    """
+    dirs = [
+        directory for directory, _, names in os.walk(root) if
+        any(_parse_name(name) is not None for name in names if
+            not name.startswith('.'))
+    ]
+    created = [_create_inplace(d, index_dir=index_dir) for d in dirs]
+    if any(created):  # let the new directory mtimes settle
+        time.sleep(MTIME_SETTLE + .1)
+    return [(d, write_manifest(d, index_dir=index_dir)) for d in dirs]
+
+
+# -- command line -------------------------------------------------------------
+
+def create_parser():
+    """Create a command-line argument parser for ``gwtrigfind index``
+    """
+    parser = argparse.ArgumentParser(
+        prog='gwtrigfind index',
+        description=__doc__.split('\n', 1)[0],
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    buildp = subparsers.add_parser(
+        'build',
+        help='write manifests for all trigger directories under a root',
+    )
+    buildp.add_argument('root', nargs='+',
+                        help='root directory of trigger archive')
+    buildp.add_argument(
+        '--index-dir',
+        default=None,
+        help=('root of a parallel tree in which to write manifests, '
+              'defaults to $%s if set, otherwise manifests are written '
+              'into each directory' % INDEX_DIR_ENV),
+    )
+    buildp.add_argument('-v', '--verbose', action='store_true',
+                        default=False, help='print each directory indexed')
+    return parser
+
+
+def main(args=None):
+    """Run ``gwtrigfind index``
+    """
+    opts = create_parser().parse_args(args=args)
+    ndir = nskip = 0
+    for root in opts.root:
+        for directory, nfiles in build(root, index_dir=opts.index_dir):
+            if nfiles is None:
+                nskip += 1
+            else:
+                ndir += 1
+            if opts.verbose:
+                print('%s %s' % (
+                    directory, 'skipped' if nfiles is None else nfiles))
+    print('indexed %d directories (%d skipped as recently modified)'
+          % (ndir, nskip), file=sys.stderr)
+    return 0
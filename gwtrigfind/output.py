@@ -0,0 +1,367 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Cardiff University (2024)
+#
+# This file is part of GWTrigFind.
+#
+# GWTrigFind is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWTrigFind is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWTrigFind.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Buffered writers for lists of trigger files
+
+Each writer accepts one file at a time, as its URL along with the
+fields parsed from its T050017 name (see
+:func:`gwtrigfind.filelist._split_url`), and writes its output in
+large batches.
+
+The ``binary`` format is a compact columnar cache, which can be read
+back into a `~gwtrigfind.TriggerFileList` with :func:`read_binary_cache`
+much faster than parsing a LAL cache. The file starts with
+`BINARY_MAGIC` and one byte giving the byte order of all numbers in
+the file (``<`` for little-endian, ``>`` for big-endian), followed by
+any number of blocks, each of which contains (all integers are unsigned
+32-bit)::
+
+    nstrings nfiles nextras
+    <length> <nstrings new strings, NUL-separated, UTF-8>
+    <nfiles start times, float64>
+    <nfiles durations, float64>
+    <nfiles prefix indices> <nfiles observatory indices>
+    <nfiles tag indices> <nfiles extension indices>
+    <nextras block indices>
+    <length> <nextras URLs, NUL-separated, UTF-8>
+
+String indices refer to a table of strings that grows with each block.
+``extras`` are the URLs that can't be rebuilt from the columns (e.g.
+names that don't follow T050017).
+"""
+
+import gzip
+import json
+import struct
+import sys
+from array import array
+from urllib.parse import urlparse
+
+from . import instrument as _instrument
+from .filelist import (NAN, TriggerFileList, _format_number, _matches)
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+#: number of files to buffer before each write
+BATCH_SIZE = 8192
+
+#: the first bytes of a binary cache file
+BINARY_MAGIC = b'GWTRIGFIND-CACHE\x00\x02'
+
+#: byte order marker for each value of `sys.byteorder`
+_BYTE_ORDER = {'little': b'<', 'big': b'>'}
+
+# array typecode of an unsigned 32-bit integer
+for _UINT32 in ('I', 'L'):
+    if array(_UINT32).itemsize == 4:
+        break
+else:  # pragma: no cover
+    raise ImportError("no 32-bit unsigned integer array type")
+
+
+def _structs(order):
+    """Return the block header and string length `struct.Struct` for
+    a byte order marker
+    """
+    order = order.decode('ascii')
+    return struct.Struct(order + 'III'), struct.Struct(order + 'I')
+
+
+def open_output(path, binary=False):
+    """Open a file for writing, compressing with gzip if the name ends
+    with ``.gz``
+    """
+    mode = 'wb' if binary else 'w'
+    if path.endswith('.gz'):
+        return gzip.open(path, mode if binary else 'wt')
+    return open(path, mode)
+
+
+class _Writer(object):
+    """Base class for buffered writers
+
+    Parameters
+    ----------
+    stream : `file`
+        the (open) file to which to write
+    """
+    #: whether `write` needs the fields parsed from each file name
+    parse = False
+
+    #: whether the output stream must be opened in binary mode
+    binary = False
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._buffer = []
+
+    def write(self, url, fields=None):
+        """Add one file to the output
+
+        Parameters
+        ----------
+        url : `str`
+            the URL of the file
+
+        fields : `tuple`, optional
+            the ``(prefix, obs, tag, start, duration, ext)`` parsed from
+            the URL, or `None` if the name can't be parsed
+        """
+        self._buffer.append(self._format(url, fields))
+        if len(self._buffer) >= BATCH_SIZE:
+            self.flush()
+
+    def _format(self, url, fields):
+        raise NotImplementedError
+
+    def flush(self):
+        """Write all buffered output
+        """
+        if self._buffer:
+            _instrument.timed('write', self.stream.write,
+                              ''.join(self._buffer))
+            self._buffer = []
+        self.stream.flush()
+
+    def close(self):
+        """Write all buffered output, and any trailer
+        """
+        self.flush()
+
+
+class UrlWriter(_Writer):
+    """Write one URL per line
+    """
+    def _format(self, url, fields):
+        return url + '\n'
+
+
+class PathWriter(_Writer):
+    """Write one file path per line
+    """
+    def _format(self, url, fields):
+        if url.startswith('file://'):
+            return url[url.index('/', 7):] + '\n'
+        return urlparse(url).path + '\n'
+
+
+class LalCacheWriter(_Writer):
+    """Write a LAL-format cache file
+    """
+    parse = True
+
+    def _format(self, url, fields):
+        if fields is None:
+            return '- - - - %s\n' % url
+        _, obs, tag, start, duration, _ = fields
+        return ' '.join((obs, tag, start, duration, url)) + '\n'
+
+
+def _json_record(url, fields):
+    try:
+        _, obs, tag, start, duration, _ = fields
+        start = _format_number(float(start))
+        duration = _format_number(float(duration))
+    except (TypeError, ValueError):
+        return '{"url": %s}' % json.dumps(url)
+    return '{"url": %s, "observatory": %s, "tag": %s, "start": %s, ' \
+           '"duration": %s}' % (json.dumps(url), json.dumps(obs),
+                                json.dumps(tag), start, duration)
+
+
+class JsonLinesWriter(_Writer):
+    """Write one JSON object per file, one per line
+    """
+    parse = True
+
+    def _format(self, url, fields):
+        return _json_record(url, fields) + '\n'
+
+
+class JsonWriter(_Writer):
+    """Write a JSON array of objects, one per file
+    """
+    parse = True
+
+    def __init__(self, stream):
+        super().__init__(stream)
+        self._sep = '[\n'
+
+    def _format(self, url, fields):
+        out = self._sep + _json_record(url, fields)
+        self._sep = ',\n'
+        return out
+
+    def close(self):
+        self._buffer.append('[]\n' if self._sep == '[\n' else '\n]\n')
+        self.flush()
+
+
+class BinaryCacheWriter(_Writer):
+    """Write a compact, columnar binary cache, see :mod:`gwtrigfind.output`
+    """
+    parse = True
+    binary = True
+
+    def __init__(self, stream):
+        super().__init__(stream)
+        self._index = {}
+        self._new = []
+        self._extras = []
+        self._columns = [array('d'), array('d')] + [
+            array(_UINT32) for _ in range(4)]
+        order = _BYTE_ORDER[sys.byteorder]
+        self._counts, self._length = _structs(order)
+        self.stream.write(BINARY_MAGIC + order)
+
+    def _intern(self, string):
+        try:
+            return self._index[string]
+        except KeyError:
+            idx = self._index[string] = len(self._index)
+            self._new.append(string)
+            return idx
+
+    def write(self, url, fields=None):
+        starts, durations, prefixes, obss, tags, exts = self._columns
+        intern = self._intern
+        try:
+            prefix, obs, tag, start, duration, ext = fields
+            fstart = float(start)
+            fduration = float(duration)
+        except (TypeError, ValueError):
+            prefix = obs = tag = ext = ''
+            fstart = fduration = NAN
+            self._extras.append((len(starts), url))
+        else:
+            if not (_matches(start, fstart)
+                    and _matches(duration, fduration)):
+                self._extras.append((len(starts), url))
+        starts.append(fstart)
+        durations.append(fduration)
+        prefixes.append(intern(prefix))
+        obss.append(intern(obs))
+        tags.append(intern(tag))
+        exts.append(intern(ext))
+        if len(starts) >= BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        columns = self._columns
+        if len(columns[0]):
+            extras = array(_UINT32, (i for i, _ in self._extras))
+            blocks = [
+                self._counts.pack(len(self._new), len(columns[0]),
+                                  len(extras)),
+                _pack_strings(self._new, self._length),
+            ]
+            blocks.extend(col.tobytes() for col in columns + [extras])
+            blocks.append(_pack_strings(
+                (url for _, url in self._extras), self._length))
+            _instrument.timed('write', self.stream.write, b''.join(blocks))
+            self._new = []
+            self._extras = []
+            self._columns = [array(col.typecode) for col in columns]
+        self.stream.flush()
+
+
+def _pack_strings(strings, length):
+    blob = '\0'.join(strings).encode('utf-8')
+    return length.pack(len(blob)) + blob
+
+
+def _read_exact(stream, size):
+    data = stream.read(size)
+    if len(data) != size:
+        raise ValueError("binary cache is truncated")
+    return data
+
+
+def _read_strings(stream, count, length):
+    size, = length.unpack(_read_exact(stream, length.size))
+    if not count:
+        return []
+    return _read_exact(stream, size).decode('utf-8').split('\0')
+
+
+def read_binary_cache(source):
+    """Read a binary cache file written with ``gwtrigfind --format binary``
+
+    Parameters
+    ----------
+    source : `str`, `file`
+        the path of the file (which may be gzip-compressed, if its name
+        ends with ``.gz``), or an open binary file
+
+    Returns
+    -------
+    files : `~gwtrigfind.TriggerFileList`
+        the list of files
+
+    Examples
+    --------
+    >>> from gwtrigfind.output import read_binary_cache
+    >>> files = read_binary_cache('triggers.gwtc')
+    """
+    if isinstance(source, str):
+        opener = gzip.open if source.endswith('.gz') else open
+        with opener(source, 'rb') as stream:
+            return read_binary_cache(stream)
+    if source.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+        raise ValueError("not a gwtrigfind binary cache")
+    order = source.read(1)
+    if order not in _BYTE_ORDER.values():
+        raise ValueError("invalid byte order in binary cache")
+    counts, length = _structs(order)
+    swap = order != _BYTE_ORDER[sys.byteorder]
+    strings = []
+    columns = [array('d'), array('d')] + [array(_UINT32) for _ in range(4)]
+    extras = {}
+    while True:
+        head = source.read(counts.size)
+        if not head:
+            break
+        if len(head) != counts.size:
+            raise ValueError("binary cache is truncated")
+        nstrings, nfiles, nextras = counts.unpack(head)
+        strings.extend(_read_strings(source, nstrings, length))
+        offset = len(columns[0])
+        for col in columns:
+            block = array(col.typecode)
+            block.frombytes(_read_exact(source, nfiles * block.itemsize))
+            if swap:
+                block.byteswap()
+            col.extend(block)
+        index = array(_UINT32)
+        index.frombytes(_read_exact(source, nextras * index.itemsize))
+        if swap:
+            index.byteswap()
+        urls = _read_strings(source, nextras, length)
+        extras.update((offset + i, url) for i, url in zip(index, urls))
+    return TriggerFileList._from_columns(strings, *columns, extras=extras)
+
+
+#: writer class for each output format
+FORMATS = {
+    'url': UrlWriter,
+    'path': PathWriter,
+    'lal': LalCacheWriter,
+    'json': JsonWriter,
+    'jsonl': JsonLinesWriter,
+    'binary': BinaryCacheWriter,
+}
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Cardiff University (2024)
+#
+# This file is part of GWTrigFind.
+#
+# GWTrigFind is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWTrigFind is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWTrigFind.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for gwtrigfind.aio
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import pytest
+
+from . import (aio, core)
+from .test_trigfind import mock_listdir_factory
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+
+@pytest.mark.parametrize('concurrency', [1, 4])
+def test_afind_trigger_files(concurrency):
+    args = ('L1:GDS-CALIB_STRAIN', 'dmt-omega', 1135641617, 1136728017)
+    with mock_listdir_factory('L1-GDS_CALIB_STRAIN_OmegaC-{0}-{1}.xml'):
+        cache = asyncio.run(aio.afind_trigger_files(
+            *args, concurrency=concurrency))
+        assert cache == core.find_trigger_files(*args)
+    assert len(cache) == 109
+
+
+def test_afind_kleinewelle_files(kw_archive):
+    base = kw_archive()
+    cache = asyncio.run(aio.afind_kleinewelle_files(
+        'L1:TEST-CHANNEL', 1135641617, 1135648017, base=base))
+    assert len(cache) == 8
+    assert cache == core.find_kleinewelle_files(
+        'L1:TEST-CHANNEL', 1135641617, 1135648017, base=base)
+
+
+def test_afind_own_executor(tmp_path):
+    # searches don't need the (here, fully occupied) default executor
+    (tmp_path / '11356').mkdir()
+    (tmp_path / '11356' / 'L-KW_TRIGGERS-1135641000-1000.xml').touch()
+    base = str(tmp_path / '{0}')
+
+    async def _main():
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=1))
+        release = threading.Event()
+        busy = loop.run_in_executor(None, release.wait)
+        try:
+            untimed = await asyncio.wait_for(aio.afind_kleinewelle_files(
+                'L1:TEST-CHANNEL', 1135641617, 1135642617, base=base), 5)
+            timed = await asyncio.wait_for(aio.afind_trigger_files(
+                'L1:TEST-CHANNEL', 'kw', 1135641617, 1135642617, base=base,
+                timeout=5), 5)
+        finally:
+            release.set()
+            await busy
+        return untimed, timed
+
+    untimed, timed = asyncio.run(_main())
+    assert len(untimed) == len(timed) == 1
+
+
+def test_afind_trigger_files_timeout(tmp_path, kw_archive):
+    base = kw_archive(1135600000, 1135900000, 100000, duration=1000,
+                      prefix='X-KW_TRIGGERS')
+    release = threading.Event()
+    scan = core._scan_dir
+
+    def _scan_dir(directory, *args):
+        if directory.endswith('11357'):  # simulate a hung NFS mount
+            release.wait()
+        return scan(directory, *args)
+
+    try:
+        with mock.patch.object(core, '_scan_dir', side_effect=_scan_dir):
+            files = asyncio.run(aio.afind_trigger_files(
+                'X1:TEST', 'kw', 1135600000, 1135900000, base=base,
+                timeout=.1, jobs=2))
+            assert len(files) == 2
+            assert files.timedout == [
+                os.path.join(str(tmp_path / '11357'), 'X-KW_TRIGGERS-*-*.xml')]
+
+            timedout = []
+            files = asyncio.run(aio.afind_trigger_files(
+                'X1:TEST', 'kw', 1135600000, 1135900000, base=base,
+                query_timeout=.1, timedout=timedout, concurrency=1))
+            assert len(files) == 1
+            assert files.timedout is timedout
+            assert len(timedout) == 2
+    finally:
+        release.set()
+
+
+def test_afind_errors():
+    with pytest.raises(NotImplementedError):
+        asyncio.run(aio.afind_dmt_omega_files('X1:TEST', 0, 100))
+
+
+def test_afind_finder_keywords(tmp_path):
+    # the per-ETG coroutines accept the same search options
+    (tmp_path / '11356').mkdir()
+    (tmp_path / '11356' / 'L-KW_TRIGGERS-1135680000-40000.xml').touch()
+    base = str(tmp_path / '{0}')
+    timedout = []
+    cache = asyncio.run(aio.afind_kleinewelle_files(
+        'L1:TEST-CHANNEL', 1135710000, 1135711000, base=base, timeout=5,
+        query_timeout=10, timedout=timedout))
+    assert len(cache) == 1
+    assert cache.timedout is timedout
+    assert not timedout
+    assert not asyncio.run(aio.afind_kleinewelle_files(
+        'L1:TEST-CHANNEL', 1135710000, 1135711000, base=base, maxdur=3600))
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Cardiff University (2024)
+#
+# This file is part of GWTrigFind.
+#
+# GWTrigFind is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWTrigFind is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWTrigFind.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for :mod:`gwtrigfind.batch`
+"""
+
+import io
+import json
+from unittest import mock
+
+import pytest
+
+from . import (batch, cli, core)
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+NAMES = ['L-KW_TRIGGERS-{0}-1000.xml'.format(gps) for
+         gps in range(1135640000, 1135650000, 1000)]
+
+QUERIES = [
+    {'channel': 'L1:TEST', 'etg': 'kw', 'gpsstart': 1135641617,
+     'gpsend': 1135643617},
+    {'channel': 'L1:TEST', 'etg': 'kw', 'gpsstart': 1135645617,
+     'gpsend': 1135646617, 'ext': 'xml'},
+    {'channel': 'L1:TEST', 'etg': 'kw', 'gpsstart': 0, 'gpsend': 1,
+     'run': 'bns'},
+]
+
+
+@pytest.mark.parametrize('parallel', [None, 2])
+def test_run_batch(parallel):
+    lines = [json.dumps(query) + '\n' for query in QUERIES]
+    lines.insert(2, '\n')
+    lines.append('not json\n')
+    output = io.StringIO()
+    with mock.patch.object(core, '_scandir_names',
+                           return_value=NAMES) as listdir:
+        assert batch.run_batch(lines, output, parallel=parallel) == 2
+    if parallel is None:  # the shared directory is only listed once
+        assert listdir.call_count == 1
+
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [r['query'] for r in results] == QUERIES + ['not json']
+    assert [len(r['files']) for r in results] == [3, 2, 0, 0]
+    assert results[0]['files'][0].endswith(NAMES[1])
+    assert 'error' not in results[1]
+    assert results[2]['error'] == (
+        "ValueError: 'run' and 'filetag' are only valid for daily-cbc")
+    assert results[3]['error'].startswith('JSONDecodeError')
+
+
+def test_run_batch_streaming():
+    # queries are answered as they are read, not after reading them all
+    read = []
+    written = []
+
+    def _lines():
+        for i in range(50):
+            read.append(i)
+            yield json.dumps(QUERIES[0]) + '\n'
+
+    output = mock.Mock(write=lambda line: written.append(len(read)))
+    with mock.patch.object(core, '_scandir_names', return_value=NAMES):
+        assert batch.run_batch(_lines(), output, parallel=2) == 0
+    assert len(written) == 50
+    assert written[0] <= 5
+
+
+def test_main(tmp_path, capsys):
+    source = tmp_path / 'queries.jsonl'
+    source.write_text(json.dumps(QUERIES[0]) + '\n')
+    output = tmp_path / 'results.jsonl'
+    with mock.patch.object(core, '_scandir_names', return_value=NAMES):
+        assert cli.main(['--batch', str(source), '-o', str(output)]) == 0
+    result, = map(json.loads, output.read_text().splitlines())
+    assert result['query'] == QUERIES[0]
+    assert len(result['files']) == 3
+    assert result['timedout'] == []
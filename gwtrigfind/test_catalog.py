@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Cardiff University (2024)
+#
+# This file is part of GWTrigFind.
+#
+# GWTrigFind is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWTrigFind is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWTrigFind.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for gwtrigfind.catalog
+"""
+
+import os
+
+try:  # python >= 3
+    from unittest import mock
+except ImportError:  # python < 3
+    import mock
+
+import pytest
+
+from . import (catalog, core)
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+
+def _touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'w').close()
+
+
+@pytest.fixture
+def archive(tmp_path, kw_archive):
+    kw_archive(prefix='X1-TEST', root=tmp_path / 'archive')
+    return tmp_path / 'archive'
+
+
+@pytest.fixture
+def active_catalog(tmp_path):
+    cat = catalog.enable_catalog(cachedir=str(tmp_path / 'cache'))
+    # treat all directories as settled
+    with mock.patch.object(catalog, 'MTIME_SETTLE', -1e9):
+        yield cat
+    catalog.disable_catalog()
+
+
+def test_catalog_find(archive, active_catalog):
+    directory = str(archive / '11356')
+    paths = active_catalog.find(
+        directory, 'X1-TEST-*.xml', 1135641500, 1135643000)
+    assert [os.path.basename(p) for p in paths] == [
+        'X1-TEST-1135641000-1000.xml',
+        'X1-TEST-1135642000-1000.xml',
+    ]
+    # non-matching pattern and missing directory
+    assert not active_catalog.find(
+        directory, 'Y1-*.xml', 1135641500, 1135643000)
+    assert not active_catalog.find(
+        str(archive / 'missing'), '*', 0, 2000000000)
+
+
+def test_catalog_refresh(archive, active_catalog):
+    directory = str(archive / '11356')
+    dirid = active_catalog.refresh(directory)
+    # unchanged directories are not re-listed
+    with mock.patch('os.listdir') as listdir:
+        assert active_catalog.refresh(directory) == dirid
+        listdir.assert_not_called()
+    # new files are picked up when the mtime changes
+    new = os.path.join(directory, 'X1-TEST-1135700000-1000.xml')
+    _touch(new)
+    os.utime(directory, ns=(0, os.stat(directory).st_mtime_ns + 10**9))
+    assert active_catalog.find(
+        directory, '*', 1135700000, 1135700001) == [new]
+
+
+def test_find_in_gps_dirs_catalog(archive, active_catalog):
+    globpath = os.path.join(str(archive), '{0}', 'X1-TEST-*-*.xml')
+    cached = core._find_in_gps_dirs(globpath, 1135641500, 1135653000)
+    catalog.disable_catalog()
+    assert sorted(cached) == sorted(core._find_in_gps_dirs(
+        globpath, 1135641500, 1135653000))
+    assert len(cached) == 12
+
+
+def test_catalog_lists_unlocked(archive, active_catalog):
+    # slow (e.g. NFS) listings must not block other threads
+    listdir = os.listdir
+
+    def _listdir(path):
+        assert not active_catalog._lock.locked()
+        return listdir(path)
+
+    with mock.patch('os.listdir', side_effect=_listdir) as mocked:
+        records = active_catalog.records(
+            str(archive / '11356' / 'X1-TEST-*.xml'), 1135641500, 1135643000)
+    assert mocked.call_count == 1
+    assert [r[:2] for r in records] == [
+        (1135641000, 1135642000),
+        (1135642000, 1135643000),
+    ]
+
+
+def test_init_worker(archive, active_catalog):
+    # a (forked) worker process opens its own connection to the catalog
+    try:
+        core._init_worker(active_catalog.path)
+        worker = catalog.get_catalog()
+        assert worker is not active_catalog
+        assert worker.path == active_catalog.path
+        assert len(worker.records(str(archive / '11356' / 'X1-TEST-*.xml'),
+                                  1135641500, 1135643000)) == 2
+        worker.close()
+        core._init_worker(None)
+        assert catalog.get_catalog() is None
+    finally:
+        catalog._catalog = active_catalog
+
+
+def test_find_trigger_files_processes_catalog(tmp_path, kw_archive,
+                                              active_catalog):
+    base = kw_archive(1135680000, 1135720000, 10000,
+                      prefix='X-KW_TRIGGERS', root=tmp_path / 'kw')
+    serial = core.find_trigger_files('X1:TEST', 'kw', 1135681617,
+                                     1135718017, base=base)
+    assert len(serial) == 4
+    assert core.find_trigger_files('X1:TEST', 'kw', 1135681617, 1135718017,
+                                   base=base, processes=2) == serial
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Cardiff University (2024)
+#
+# This file is part of GWTrigFind.
+#
+# GWTrigFind is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWTrigFind is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWTrigFind.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for gwtrigfind.coverage
+"""
+
+import random
+
+import pytest
+
+from ligo.segments import (segment as Segment, segmentlist as SegmentList)
+
+from .coverage import Coverage
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+
+def test_coverage_ordered():
+    cov = Coverage([(0, 10), (10, 20), (15, 18), (30, 40)])
+    assert list(cov) == [(0, 20), (30, 40)]
+    assert cov.livetime == 30
+    assert cov.gaps(-5, 50) == [(-5, 0), (20, 30), (40, 50)]
+    assert cov.gaps(5, 15) == []
+    assert cov.fraction(0, 40) == pytest.approx(.75)
+    assert cov.segmentlist() == SegmentList([Segment(0, 20), Segment(30, 40)])
+
+
+def test_coverage_unordered():
+    rng = random.Random(0)
+    intervals = []
+    for _ in range(500):
+        start = rng.randint(0, 10000)
+        intervals.append((start, start + rng.randint(1, 50)))
+    cov = Coverage(intervals)
+    expected = SegmentList(map(Segment, intervals)).coalesce()
+    assert cov.segmentlist() == expected
+    assert SegmentList(map(Segment, cov.gaps(0, 10050))) == (
+        SegmentList([Segment(0, 10050)]) - expected)
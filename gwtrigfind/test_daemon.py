@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Cardiff University (2024)
+#
+# This file is part of GWTrigFind.
+#
+# GWTrigFind is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWTrigFind is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWTrigFind.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for :mod:`gwtrigfind.daemon`
+"""
+
+import os
+import socket
+import threading
+
+import pytest
+
+from . import (cli, core, daemon)
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = daemon.QueryServer(str(tmp_path / 'gwtrigfind.sock'))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def test_forward(server, capsys, tmp_path):
+    args = ['X1:TEST-CHANNEL', 'kw', '1135641617', '1135648017', '--gaps',
+            '--socket', server.path]
+    assert cli.main(args) == 1
+    out, err = capsys.readouterr()
+    assert out == ''
+    assert err.startswith('Missing segments:\n1135641617.000000 ')
+
+    # the query ran in the daemon, which keeps its listings
+    assert '/gds-x1/dmt/triggers/X-KW_TRIGGERS/X-KW_TRIGGERS-11356' in (
+        server.listings._dirs)
+
+    # errors are reported like the local tool
+    assert daemon.forward(server.path, ['X1:TEST', 'kw', '0']) == 2
+    assert 'must be given together' in capsys.readouterr().err
+
+
+def test_forward_fallback(tmp_path, capsys):
+    path = str(tmp_path / 'missing.sock')
+    assert daemon.forward(path, []) is None
+    assert cli.main([
+        'X1:TEST-CHANNEL', 'kw', '1135641617', '1135648017', '--socket', path,
+    ]) == 0
+
+
+def test_forward_wedged(tmp_path, monkeypatch):
+    # a daemon that accepts connections but never answers
+    path = str(tmp_path / 'wedged.sock')
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(path)
+        sock.listen(1)
+        assert daemon.forward(path, [], timeout=.1) is None
+        monkeypatch.setattr(daemon, 'REPLY_TIMEOUT', .1)
+        assert cli.main([
+            'X1:TEST-CHANNEL', 'kw', '1135641617', '1135648017',
+            '--socket', path,
+        ]) == 0
+
+
+def test_listing_cache_validate(tmp_path):
+    listings = core._ListingCache(validate=True, maxdirs=1)
+    (tmp_path / 'a').touch()
+    assert listings.listdir(str(tmp_path)) == ['a']
+    (tmp_path / 'b').touch()
+    os.utime(str(tmp_path), ns=(0, 1))
+    assert sorted(listings.listdir(str(tmp_path))) == ['a', 'b']
+    # only the most recent listing is kept
+    listings.listdir(str(tmp_path / 'missing'))
+    assert list(listings._dirs) == [str(tmp_path / 'missing')]
+
+
+def test_listing_cache_touched(tmp_path):
+    listings = core._ListingCache(validate=True)
+    listings.listdir(str(tmp_path))
+    assert listings.touched is None
+    listings = core._ListingCache(validate=True, track=True)
+    listings.listdir(str(tmp_path))
+    assert listings.touched == {str(tmp_path)}
+
+
+def test_listing_cache_threads(tmp_path):
+    paths = []
+    for i in range(8):
+        (tmp_path / str(i)).mkdir()
+        paths.append(str(tmp_path / str(i)))
+    listings = core._ListingCache(validate=True, maxdirs=2)
+    errors = []
+
+    def _list():
+        try:
+            for _ in range(200):
+                for path in paths:
+                    listings.listdir(path)
+        except Exception as exc:  # pragma: no cover
+            errors.append(exc)
+
+    threads = [threading.Thread(target=_list) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(listings._dirs) <= 2
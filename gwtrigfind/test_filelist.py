@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Cardiff University (2024)
+#
+# This file is part of GWTrigFind.
+#
+# GWTrigFind is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWTrigFind is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWTrigFind.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for gwtrigfind.filelist
+"""
+
+try:  # python >= 3
+    from unittest import mock
+except ImportError:  # python < 3
+    import mock
+
+import pytest
+
+from ligo.segments import (segment as Segment, segmentlist as SegmentList)
+
+from . import filelist
+from .filelist import TriggerFileList
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+URLS = [
+    'file:///test/11356/L1-TEST-1135640100-100.xml',
+    'file:///test/11356/L1-TEST-1135640000-100.xml',
+    'file:///test/11356/L1-TEST-1135640300-100.xml',
+    'file:///test/H1-Live-1126259148.29-4.hdf',
+    'file:///test/H1-Live-01-4.hdf',
+    'file:///test/not-a-trigger-file.txt',
+]
+
+
+@pytest.fixture(params=[True, False])
+def usenumpy(request):
+    if request.param:
+        if filelist.numpy is None:
+            pytest.skip("numpy is not available")
+        yield
+    else:
+        with mock.patch.object(filelist, 'numpy', None):
+            yield
+
+
+def test_sequence():
+    files = TriggerFileList(URLS)
+    assert len(files) == len(URLS)
+    assert files == URLS
+    assert list(files) == URLS
+    assert files[0] == URLS[0]
+    assert files[-1] == URLS[-1]
+    assert files[1:3] == URLS[1:3]
+    assert isinstance(files[1:3], TriggerFileList)
+    assert URLS[2] in files
+    assert files != URLS[:2]
+    with pytest.raises(IndexError):
+        files[len(URLS)]
+
+
+def test_columns():
+    files = TriggerFileList(URLS[:4])
+    assert list(files.start) == [
+        1135640100, 1135640000, 1135640300, 1126259148.29]
+    assert list(files.duration) == [100, 100, 100, 4]
+    assert files.observatory == ['L1', 'L1', 'L1', 'H1']
+    assert files.tag == ['TEST', 'TEST', 'TEST', 'Live']
+    assert files.lal_cache_entry(0) == (
+        'L1 TEST 1135640100 100 ' + URLS[0])
+
+
+def test_segments(usenumpy):
+    files = TriggerFileList(URLS[:3])
+    assert files.segments() == SegmentList([
+        Segment(1135640100, 1135640200),
+        Segment(1135640000, 1135640100),
+        Segment(1135640300, 1135640400),
+    ])
+    assert files.coverage() == SegmentList([
+        Segment(1135640000, 1135640200),
+        Segment(1135640300, 1135640400),
+    ])
+    assert TriggerFileList().coverage() == SegmentList()
+
+
+def test_crop_sort(usenumpy):
+    files = TriggerFileList(URLS)
+    cropped = files.crop((1135640050, 1135640150))
+    assert cropped == URLS[:2]
+    files.sort()
+    assert files[:4] == [URLS[4], URLS[3], URLS[1], URLS[0]]
+
+
+def test_add():
+    files = TriggerFileList(URLS[:2])
+    assert files + URLS[2:] == URLS
+    assert isinstance(files + URLS[2:], TriggerFileList)
+    assert URLS[2:] + files == URLS[2:] + URLS[:2]
+    assert files + TriggerFileList(URLS[2:]) == URLS
+    assert files == URLS[:2]  # unchanged
+    files += URLS[2:]
+    assert files == URLS
+    with pytest.raises(TypeError):
+        files + 'file:///test/L1-TEST-0-1.xml'
+
+
+def test_from_records():
+    records = [
+        (1135640100, 1135640200, URLS[0]),
+        (1126259148.29, 1126259152.29, URLS[3]),
+        (1, 5, URLS[4]),
+    ]
+    files = TriggerFileList._from_records(records)
+    assert files == [URLS[0], URLS[3], URLS[4]]
+    assert files == TriggerFileList([URLS[0], URLS[3], URLS[4]])
+    assert list(files.start) == [1135640100, 1126259148.29, 1]
+    assert list(files.duration) == [100, 4, 4]
+    assert files.observatory == ['L1', 'H1', 'H1']
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Cardiff University (2024)
+#
+# This file is part of GWTrigFind.
+#
+# GWTrigFind is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWTrigFind is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWTrigFind.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for :mod:`gwtrigfind.follow`
+"""
+
+import itertools
+from unittest import mock
+
+import pytest
+
+from . import follow
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+NOW = 1135650000
+
+
+def _touch(tmp_path, gps):
+    path = tmp_path / str(gps // 100000)
+    path.mkdir(exist_ok=True)
+    (path / 'L-KW_TRIGGERS-{0}-1000.xml'.format(gps)).touch()
+    return 'file://{0}/L-KW_TRIGGERS-{1}-1000.xml'.format(path, gps)
+
+
+@pytest.mark.parametrize('waiter', [follow._waiter, follow._Sleeper])
+def test_follow_trigger_files(tmp_path, waiter):
+    old = [_touch(tmp_path, NOW - 3000), _touch(tmp_path, NOW - 2000)]
+    with mock.patch.object(follow, 'gps_now',
+                           side_effect=itertools.count(NOW, 10)), \
+            mock.patch.object(follow, '_waiter', waiter):
+        files = follow.follow_trigger_files(
+            'L1:TEST-CHANNEL', 'kw', NOW - 5000, NOW + 20, interval=.01,
+            base=str(tmp_path / '{0}'))
+        assert [next(files), next(files)] == old
+        # a new file is written
+        new = _touch(tmp_path, NOW - 1000)
+        assert list(files) == [new]
+
+
+def test_inotify_wait(tmp_path):
+    try:
+        waiter = follow._Inotify()
+    except (AttributeError, OSError, TypeError):
+        pytest.skip("inotify not available")
+    try:
+        waiter.watch([str(tmp_path), str(tmp_path / 'missing')])
+        assert list(waiter._watches) == [str(tmp_path)]
+        (tmp_path / 'new').touch()
+        waiter.wait(10)  # returns immediately
+        waiter.watch([])
+        assert not waiter._watches
+    finally:
+        waiter.close()
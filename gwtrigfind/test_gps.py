@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Cardiff University (2024)
+#
+# This file is part of GWTrigFind.
+#
+# GWTrigFind is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWTrigFind is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWTrigFind.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for :mod:`gwtrigfind.gps`
+"""
+
+import pytest
+
+from . import gps
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+
+@pytest.mark.parametrize('gpstime, date', [
+    (0, (1980, 1, 6)),
+    (1126259462, (2015, 9, 14)),
+    # around the 2017-01-01 leap second
+    (1167264016, (2016, 12, 31)),
+    (1167264017, (2016, 12, 31)),  # 23:59:60
+    (1167264018, (2017, 1, 1)),
+    (1400000000.5, (2024, 5, 17)),
+])
+def test_gps_to_date(gpstime, date):
+    assert gps.gps_to_date(gpstime) == date
+
+
+@pytest.mark.parametrize('date, gpstime', [
+    ((1980, 1, 6), 0),
+    ((2017, 1, 1), 1167264018),
+    ((2024, 2, 29), 1393200018),
+])
+def test_date_to_gps(date, gpstime):
+    assert gps.date_to_gps(*date) == gpstime
+    assert gps.gps_to_date(gpstime) == date
+
+
+def test_utc_days():
+    segments = [(1167177618, 1167264018), (1167264018, 1167300000),
+                (1167400000, 1167400001)]
+    assert gps.utc_days(segments) == [
+        '20161231', '20170101', '20170102']
+    assert gps.utc_days(segments[:1], '%Y_%-m_%-d') == [
+        '2016_12_31', '2017_1_1']
+    with pytest.raises(ValueError):
+        gps.utc_days(segments, '%Y-%j')
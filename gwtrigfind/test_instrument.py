@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Cardiff University (2024)
+#
+# This file is part of GWTrigFind.
+#
+# GWTrigFind is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWTrigFind is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWTrigFind.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for :mod:`gwtrigfind.instrument`
+"""
+
+import json
+import threading
+
+import pytest
+
+from . import (cli, core, instrument)
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+
+@pytest.fixture
+def base(kw_archive):
+    return kw_archive()
+
+
+@pytest.mark.parametrize('jobs', [None, 4])
+def test_profile(base, jobs):
+    with instrument.profile() as prof:
+        cache = core.find_trigger_files(
+            'L1:TEST-CHANNEL', 'kw', 1135641617, 1135648017,
+            base=base, maxdur=1000, jobs=jobs)
+    stats = prof.to_dict()['finders']['kleinewelle']
+    assert stats['listdir']['count'] == 1
+    assert stats['examined']['count'] == 20
+    assert stats['matched']['count'] == len(cache) == 8
+    assert prof.wall >= stats['listdir']['time']
+    # hook is removed afterwards
+    assert prof not in instrument._hooks.get()
+
+
+def test_profile_processes(base):
+    with instrument.profile() as prof:
+        cache = core.find_trigger_files(
+            'L1:TEST-CHANNEL', 'kw', 1135641617, 1135748017,
+            base=base, processes=2)
+    # events in the worker processes are reported to this one
+    stats = prof.to_dict()['finders']['kleinewelle']
+    assert stats['listdir']['count'] >= 1
+    assert stats['matched']['count'] == len(cache) == 19
+
+
+def test_replay():
+    events = []
+
+    def hook(*args):
+        events.append(args)
+
+    instrument.add_hook(hook)
+    try:
+        instrument.replay({'detchar': {'listdir': [2, 1.5]},
+                           'other': {'write': [1, 0.]}})
+    finally:
+        instrument.remove_hook(hook)
+    assert events == [('detchar', 'listdir', 2, 1.5), (None, 'write', 1, 0.)]
+
+
+def test_add_hook():
+    events = []
+
+    def hook(*args):
+        events.append(args)
+
+    instrument.add_hook(hook)
+    try:
+        core._isdir('/does/not/exist')
+    finally:
+        instrument.remove_hook(hook)
+    core._isdir('/does/not/exist')
+    assert len(events) == 1
+    finder, event, count, _ = events[0]
+    assert (finder, event, count) == (None, 'isdir', 1)
+
+
+def test_profile_per_context(base):
+    # concurrent profiles (e.g. daemon queries) only see their own events
+    barrier = threading.Barrier(2)
+    profiles = {}
+
+    def _query(name, end):
+        with instrument.profile() as prof:
+            barrier.wait()
+            core.find_trigger_files('L1:TEST-CHANNEL', 'kw', 1135641617,
+                                    end, base=base, maxdur=1000)
+            barrier.wait()
+        profiles[name] = prof.to_dict()['finders']['kleinewelle']
+
+    threads = [
+        threading.Thread(target=_query, args=('short', 1135642017)),
+        threading.Thread(target=_query, args=('long', 1135648017)),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert profiles['short']['matched']['count'] == 2
+    assert profiles['long']['matched']['count'] == 8
+
+
+def test_cli_profile(capsys):
+    assert cli.main([
+        'L1:TEST-CHANNEL', 'kw', '1135641617', '1135648017', '--profile',
+    ]) == 0
+    err = capsys.readouterr().err
+    report = json.loads(err[err.index('{'):])
+    assert set(report) == {'wall', 'finders'}
+    assert report['finders']['kleinewelle']['listdir']['count'] == 1
+    assert 'print' not in report['finders'].get('cli', {})
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Cardiff University (2024)
+#
+# This file is part of GWTrigFind.
+#
+# GWTrigFind is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWTrigFind is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWTrigFind.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for :mod:`gwtrigfind.manifest`
+"""
+
+import os
+from unittest import mock
+
+import pytest
+
+from . import (cli, core, manifest)
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+NAMES = ['X-KW_TRIGGERS-{0}-1000.xml'.format(t) for t in
+         range(1135640000, 1135650000, 1000)]
+
+
+def _settle(path):
+    # make the directory look old, so it isn't skipped as just modified
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10**10))
+
+
+@pytest.fixture
+def archive(tmp_path, kw_archive):
+    kw_archive(1135640000, 1135650000, prefix='X-KW_TRIGGERS',
+               dirname='X-KW_TRIGGERS-{0}')
+    directory = tmp_path / 'X-KW_TRIGGERS-11356'
+    (directory / 'README').touch()
+    return directory
+
+
+def test_manifest_select():
+    m = manifest.Manifest([(0., 10., 'a'), (10., 100., 'b'), (110., 5., 'c')])
+    assert len(m) == 3
+    assert m.select(105, 112) == ['b', 'c']
+    assert m.select(10, 11) == ['b']
+    assert m.select(115, 200) == []
+
+
+@pytest.mark.parametrize('index_dir', [False, True])
+def test_write_read_manifest(archive, tmp_path, index_dir):
+    index_dir = str(tmp_path / 'index') if index_dir else None
+    path = manifest.manifest_path(str(archive), index_dir=index_dir)
+    assert path.endswith(
+        os.path.join('X-KW_TRIGGERS-11356', '.gwtrigfind-manifest'))
+
+    # directories that were just modified are skipped
+    assert manifest.write_manifest(str(archive), index_dir=index_dir) is None
+    assert manifest.read_manifest(str(archive), index_dir=index_dir) is None
+
+    _settle(str(archive))
+    assert manifest.write_manifest(str(archive), index_dir=index_dir) == 10
+    m = manifest.read_manifest(str(archive), index_dir=index_dir)
+    assert m.names == NAMES
+    assert m.select(1135641500, 1135642500) == NAMES[1:3]
+
+    # a new file makes the manifest stale
+    (archive / 'X-KW_TRIGGERS-1135650000-1000.xml').touch()
+    assert manifest.read_manifest(str(archive), index_dir=index_dir) is None
+
+
+def test_read_manifest_partial(archive):
+    assert manifest.write_manifest(str(archive)) is None
+    _settle(str(archive))
+    assert manifest.write_manifest(str(archive)) == 10
+    path = manifest.manifest_path(str(archive))
+    with open(path, 'r+') as f:
+        content = f.read()
+        f.seek(0)
+        f.write(content[:len(content) // 2])
+        f.truncate()
+    assert manifest.read_manifest(str(archive)) is None
+
+
+def test_find_uses_manifest(archive, tmp_path, capsys):
+    base = str(tmp_path / 'X-KW_TRIGGERS-{0}')
+    with mock.patch.object(manifest, 'MTIME_SETTLE', 0.):
+        assert cli.main(['index', 'build', str(tmp_path)]) == 0
+    assert 'indexed 1 directories' in capsys.readouterr().err
+    assert manifest.read_manifest(str(archive)) is not None
+
+    # by default, the manifest is found in the directory listing
+    with mock.patch.object(manifest, 'Manifest',
+                           wraps=manifest.Manifest) as read:
+        files = core.find_kleinewelle_files('X1:TEST', 1135641500,
+                                            1135642500, base=base,
+                                            maxdur=1000)
+    read.assert_called_once()
+    assert [os.path.basename(f) for f in files] == NAMES[1:3]
+
+    # once enabled, it is read without listing the directory
+    with mock.patch.object(manifest, '_enabled', True), \
+            mock.patch.object(core, '_scandir_names') as listdir:
+        files = core.find_kleinewelle_files('X1:TEST', 1135641500,
+                                            1135642500, base=base,
+                                            maxdur=1000)
+    listdir.assert_not_called()
+    assert [os.path.basename(f) for f in files] == NAMES[1:3]
+
+
+def test_find_skips_manifest(archive, tmp_path, monkeypatch):
+    base = str(tmp_path / 'X-KW_TRIGGERS-{0}')
+    monkeypatch.delenv(manifest.INDEX_DIR_ENV, raising=False)
+    assert not manifest.manifests_enabled()
+    # no manifest is looked for in a directory that doesn't have one
+    with mock.patch.object(core, '_read_manifest') as read:
+        files = core.find_kleinewelle_files('X1:TEST', 1135641500,
+                                            1135642500, base=base)
+    read.assert_not_called()
+    assert [os.path.basename(f) for f in files] == NAMES[1:3]
+    monkeypatch.setenv(manifest.INDEX_DIR_ENV, str(tmp_path / 'index'))
+    assert manifest.manifests_enabled()
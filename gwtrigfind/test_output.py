@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) Cardiff University (2024)
+#
+# This file is part of GWTrigFind.
+#
+# GWTrigFind is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# GWTrigFind is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with GWTrigFind.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for :mod:`gwtrigfind.output`
+"""
+
+import gzip
+import io
+import json
+import struct
+from unittest import mock
+
+import pytest
+
+from . import (cli, output)
+from .filelist import (TriggerFileList, _split_url)
+from .test_filelist import URLS
+
+__author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
+
+
+def _write(fmt, urls, stream=None):
+    stream = stream or io.StringIO()
+    writer = output.FORMATS[fmt](stream)
+    for url in urls:
+        try:
+            fields = _split_url(url)
+        except ValueError:
+            fields = None
+        writer.write(url, fields)
+    writer.close()
+    return stream
+
+
+@pytest.mark.parametrize('fmt, first', [
+    ('url', URLS[0]),
+    ('path', '/test/11356/L1-TEST-1135640100-100.xml'),
+    ('lal', 'L1 TEST 1135640100 100 ' + URLS[0]),
+])
+def test_text_formats(fmt, first):
+    lines = _write(fmt, URLS).getvalue().splitlines()
+    assert len(lines) == len(URLS)
+    assert lines[0] == first
+
+
+@pytest.mark.parametrize('fmt', ['json', 'jsonl'])
+def test_json_formats(fmt):
+    out = _write(fmt, URLS).getvalue()
+    if fmt == 'json':
+        records = json.loads(out)
+    else:
+        records = list(map(json.loads, out.splitlines()))
+    assert [r['url'] for r in records] == URLS
+    assert records[3] == {
+        'url': URLS[3], 'observatory': 'H1', 'tag': 'Live',
+        'start': 1126259148.29, 'duration': 4,
+    }
+    assert records[-1] == {'url': URLS[-1]}
+    assert json.loads(_write('json', []).getvalue()) == []
+
+
+@pytest.mark.parametrize('batch', [2, output.BATCH_SIZE])
+def test_binary_cache(tmp_path, batch):
+    path = str(tmp_path / 'cache.gwtc.gz')
+    with mock.patch.object(output, 'BATCH_SIZE', batch), \
+            output.open_output(path, binary=True) as stream:
+        _write('binary', URLS, stream=stream)
+    files = output.read_binary_cache(path)
+    assert isinstance(files, TriggerFileList)
+    assert files == URLS
+    assert list(files.start)[:4] == list(TriggerFileList(URLS).start)[:4]
+    assert files.coverage() == TriggerFileList(URLS).coverage()
+
+    with gzip.open(path, 'rb') as f:
+        data = f.read()
+    with pytest.raises(ValueError):
+        output.read_binary_cache(io.BytesIO(data[:-3]))
+    with pytest.raises(ValueError):
+        output.read_binary_cache(io.BytesIO(b'not a cache'))
+
+
+@pytest.mark.parametrize('order', ['<', '>'])
+def test_binary_cache_byte_order(order):
+    # a cache written on a host of either byte order can be read back
+    strings = '\0'.join(('file:///test/', 'L1', 'TEST', '.xml')).encode()
+    data = b''.join((
+        output.BINARY_MAGIC,
+        order.encode('ascii'),
+        struct.pack(order + 'III', 4, 1, 0),
+        struct.pack(order + 'I', len(strings)),
+        strings,
+        struct.pack(order + 'dd', 1135640100, 100),
+        struct.pack(order + 'IIII', 0, 1, 2, 3),
+        struct.pack(order + 'I', 0),
+    ))
+    files = output.read_binary_cache(io.BytesIO(data))
+    assert list(files) == ['file:///test/L1-TEST-1135640100-100.xml']
+    with pytest.raises(ValueError):
+        output.read_binary_cache(io.BytesIO(output.BINARY_MAGIC + b'='))
+
+
+def test_cli_format(tmp_path, capsys):
+    args = ['X1:TEST', 'kw', '1135641617', '1135642617']
+    urls = ['file:///test/X-KW_TRIGGERS-%d-1000.xml' % gps for
+            gps in (1135641000, 1135642000)]
+
+    path = str(tmp_path / 'out.jsonl.gz')
+    with mock.patch.object(cli.gwtrigfind, 'iter_trigger_files',
+                           return_value=iter(urls)):
+        assert cli.main(args + ['--format', 'jsonl', '-o', path]) == 0
+    with gzip.open(path, 'rt') as f:
+        assert [json.loads(line)['start'] for line in f] == [
+            1135641000, 1135642000]
+
+    with pytest.raises(SystemExit):
+        cli.main(args + ['--format', 'binary'])
+    assert '--format binary requires --output' in capsys.readouterr().err
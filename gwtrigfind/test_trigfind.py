@@ -21,6 +21,9 @@
 
 import glob
 import os.path
+import subprocess
+import sys
+import threading
 
 try:  # python >= 3
     from unittest import mock
@@ -31,7 +34,8 @@ except ImportError:  # python < 3
 
 import pytest
 
-from . import core
+from . import (cli, core)
+from .gps import gps_now
 
 __author__ = 'Duncan Macleod <duncan.macleod@ligo.org>'
 
@@ -46,27 +50,27 @@ def mock_open(*args, **kargs):
   return f_open
 
 
-def mock_iglob_factory(fileformat):
-    def mock_gps_glob(globstr):
-        parent = os.path.split(globstr)[0]
+def mock_listdir_factory(fileformat):
+    def mock_gps_listdir(directory):
+        path = directory
         while True:
-            globstr = os.path.split(globstr)[0]
             try:
-                gps5 = int(os.path.basename(globstr).rsplit('-')[-1])
+                gps5 = int(os.path.basename(path).rsplit('-')[-1])
             except ValueError:
-                pass
+                path = os.path.split(path)[0]
             else:
                 break
         ngps = len(str(gps5))
         gpsstart = gps5 * 10**ngps
         gpsend = (gps5 + 1) * 10**ngps
         d = int(10 ** ngps // 10)
-        t = gpsstart
-        while t < gpsend:
-            f = os.path.join(parent, fileformat.format(t, d))
-            t += d
-            yield f
-    return mock_gps_glob
+        return [fileformat.format(t, d) for t in range(gpsstart, gpsend, d)]
+    return mock.patch('gwtrigfind.core._scandir_names', mock_gps_listdir)
+
+
+def mock_glob_literal():
+    # 'expand' wildcards in directory names by returning them as-is
+    return mock.patch('glob.glob', lambda x: [x])
 
 
 # -- tests --------------------------------------------------------------------
@@ -95,25 +99,23 @@ def test_format_channel_name():
 
 def test_find_trigger_files():
     # quick check that this resolves the ETG correctly
-    iglob = mock_iglob_factory('L1-OMEGA_TRIGGERS_DOWNSELECT-{0}-{1}.xml')
-    with mock.patch('glob.iglob', iglob):
+    with mock_listdir_factory('L1-GDS_CALIB_STRAIN_OmegaC-{0}-{1}.xml'):
         cache = core.find_trigger_files(
             'L1:GDS-CALIB_STRAIN', 'dmt-omega', 1135641617, 1135728017)
         assert len(cache) == 9
         assert cache[0] == (
             'file:///gds-l1/dmt/triggers/L-HOFT_Omega/11356/'
-            'L1-OMEGA_TRIGGERS_DOWNSELECT-1135640000-10000.xml')
+            'L1-GDS_CALIB_STRAIN_OmegaC-1135640000-10000.xml')
 
 
 def test_find_dmt_omega_files():
-    iglob = mock_iglob_factory('L1-OMEGA_TRIGGERS_DOWNSELECT-{0}-{1}.xml')
-    with mock.patch('glob.iglob', iglob):
+    with mock_listdir_factory('L1-GDS_CALIB_STRAIN_OmegaC-{0}-{1}.xml'):
         cache = core.find_dmt_omega_files(
             'L1:GDS-CALIB_STRAIN', 1135641617, 1135728017)
         assert len(cache) == 9
         assert cache[0] == (
             'file:///gds-l1/dmt/triggers/L-HOFT_Omega/11356/'
-            'L1-OMEGA_TRIGGERS_DOWNSELECT-1135640000-10000.xml')
+            'L1-GDS_CALIB_STRAIN_OmegaC-1135640000-10000.xml')
         # check wrapper method works
         assert cache == core.find_trigger_files(
             'L1:GDS-CALIB_STRAIN', 'dmt-omega', 1135641617, 1135728017)
@@ -124,8 +126,7 @@ def test_find_dmt_omega_files():
 
 
 def test_find_kleinewelle_files():
-    iglob = mock_iglob_factory('L-KW_TRIGGERS-{0}-{1}.xml')
-    with mock.patch('glob.iglob', iglob):
+    with mock_listdir_factory('L-KW_TRIGGERS-{0}-{1}.xml'):
         cache = core.find_kleinewelle_files(
             'L1:TEST-CHANNEL', 1135641617, 1135728017)
         assert len(cache) == 9
@@ -137,8 +138,7 @@ def test_find_kleinewelle_files():
             'L1:TEST-CHANNEL', 'kleinewelle', 1135641617, 1135728017)
 
     # test h(t)
-    iglob = mock_iglob_factory('L-KW_HOFT-{0}-{1}.xml')
-    with mock.patch('glob.iglob', iglob):
+    with mock_listdir_factory('L-KW_HOFT-{0}-{1}.xml'):
         cache = core.find_kleinewelle_files(
             'L1:GDS-CALIB_STRAIN', 1135641617, 1135728017)
         assert len(cache) == 9
@@ -148,26 +148,28 @@ def test_find_kleinewelle_files():
 
 
 def test_find_detchar_files():
-    iglob = mock_iglob_factory('L1-GDS_CALIB_STRAIN_OMICRON-{0}-{1}.xml')
-    with mock.patch('glob.iglob', iglob):
-        with mock.patch('glob.glob', bool):
+    with mock_listdir_factory('L1-GDS_CALIB_STRAIN_Omicron-{0}-{1}.h5'):
+        with mock_glob_literal():
             cache = core.find_detchar_files(
                 'L1:GDS-CALIB_STRAIN', 1135641617, 1135728017,
                 etg='omicron')
             assert len(cache) == 9
             assert cache[0] == (
                 'file:///home/detchar/triggers/*/L1/GDS-CALIB_STRAIN_Omicron/'
-                '11356/L1-GDS_CALIB_STRAIN_OMICRON-1135640000-10000.xml')
+                '11356/L1-GDS_CALIB_STRAIN_Omicron-1135640000-10000.h5')
+
+            # check wrapper method works
+            assert cache == core.find_trigger_files(
+                'L1:GDS-CALIB_STRAIN', 'omicron', 1135641617, 1135728017)
+
+    with mock_listdir_factory('L1-GDS_CALIB_STRAIN_OMICRON-{0}-{1}.h5'):
+        with mock_glob_literal():
             cache2 = core.find_detchar_files(
                 'L1:GDS-CALIB_STRAIN', 1146873617, 1146873617+1,
                 etg='omicron')
             assert cache2[0] == (
                 'file:///home/detchar/triggers/L1/GDS_CALIB_STRAIN_OMICRON/'
-                '11468/L1-GDS_CALIB_STRAIN_OMICRON-1146870000-10000.xml')
-
-            # check wrapper method works
-            assert cache == core.find_trigger_files(
-                'L1:GDS-CALIB_STRAIN', 'omicron', 1135641617, 1135728017)
+                '11468/L1-GDS_CALIB_STRAIN_OMICRON-1146870000-10000.h5')
 
     # test error for channel that has never been processed
     with pytest.raises(ValueError):
@@ -183,7 +185,8 @@ def test_find_pycbc_live_files():
         'H1-Live-1126259388.29-4.hdf',
     ]
 
-    with mock.patch('glob.glob', lambda x: test_glob):
+    with mock.patch('gwtrigfind.core._scandir_names', lambda x: test_glob), \
+            mock.patch('os.path.isdir', return_value=True):
         c = core.find_pycbc_live_files(None, 1135641617, 1135728017)
         assert len(c) == 0
 
@@ -203,7 +206,11 @@ def test_find_snax_files():
         'H1-SNAX_FEATURES-1425848280-20.h5',
     ]
 
-    with mock.patch('glob.iglob', lambda x: test_glob):
+    def listdir(directory):
+        return test_glob if directory.endswith('14258') else []
+
+    with mock.patch('gwtrigfind.core._scandir_names',
+                    listdir), mock_glob_literal():
         c = core.find_snax_files(
                 "H1:CAL-DELTA_EXTERNAL_DQ", 1125848220, 1125848300
                 )
@@ -219,26 +226,56 @@ def test_find_snax_files():
                 "H1:CAL-DELTA_EXTERNAL_DQ", 'snax', 1425848220, 1425848300)
 
 
-def test_find_daily_cbc_files():
-    # mock the reader, and make sure we get the right cache
-    with mock.patch(OPEN, mock_open(read_data="""
+def test_find_daily_cbc_files(tmp_path):
+    cachedir = tmp_path / 'bns_gds' / '198001' / '19800106' / 'cache'
+    cachedir.mkdir(parents=True)
+    cachefile = cachedir / 'L1-INSPIRAL_30MILLISEC_CLUSTERED.cache'
+    cachefile.write_text("""
+H1 INSPIRAL 100 50 /test/H1-INSPIRAL-100-50.xml.gz
 H1 INSPIRAL 0 50 /test/H1-INSPIRAL-0-50.xml.gz
 H1 INSPIRAL 50 50 /test/H1-INSPIRAL-50-50.xml.gz
-H1 INSPIRAL 100 50 /test/H1-INSPIRAL-100-50.xml.gz
-"""[1:])):
+"""[1:])
+    with mock.patch.object(core, 'DEFAULT_DAILY_CBC_BASE', str(tmp_path)):
         cache = core.find_daily_cbc_files('L1:GDS-CALIB_STRAIN', 0, 100)
         assert cache == core.find_trigger_files(
             'L1:GDS-CALIB_STRAIN', 'daily-cbc', 0, 100)
-    assert len(cache) == 2
-    assert cache[0] == 'file:///test/H1-INSPIRAL-0-50.xml.gz'
+        assert len(cache) == 2
+        assert cache[0] == 'file:///test/H1-INSPIRAL-0-50.xml.gz'
+
+        # repeated queries reuse the parsed cache
+        with mock.patch(OPEN) as open_:
+            assert core.find_daily_cbc_files(
+                'L1:GDS-CALIB_STRAIN', [(10, 20), (120, 130)],
+            ) == [
+                'file:///test/H1-INSPIRAL-0-50.xml.gz',
+                'file:///test/H1-INSPIRAL-100-50.xml.gz',
+            ]
+        open_.assert_not_called()
 
     # without mock, check that we just get an empty cache
     assert not core.find_daily_cbc_files('X1:GDS-CALIB_STRAIN', 0, 100)
 
 
+def test_daily_cbc_index_select(tmp_path):
+    cachefile = tmp_path / 'test.cache'
+    cachefile.write_text(''.join(
+        'X1 TEST {0} {1} /test/X1-TEST-{0}-{1}.xml\n'.format(start, dur) for
+        start, dur in [(0, 100), (10, 10), (50, 10), (200, 10)]
+    ))
+    index = core._DailyCacheIndex(str(cachefile))
+    assert index.maxdur == 100
+    assert index.select([(55, 60), (70, 80), (205, 300)]) == [
+        (0, 100, 'file:///test/X1-TEST-0-100.xml'),
+        (50, 60, 'file:///test/X1-TEST-50-10.xml'),
+        (200, 210, 'file:///test/X1-TEST-200-10.xml'),
+    ]
+    assert index.select([]) == []
+
+
 def test_find_omega_online_files():
-    iglob = mock_iglob_factory('G1-OMEGA_TRIGGERS_DOWNSELECT-{0}-{1}.txt')
-    with mock.patch('glob.iglob', iglob):
+    with mock_listdir_factory(
+        'G1-OMEGA_TRIGGERS_DOWNSELECT-{0}-{1}.txt',
+    ), mock_glob_literal():
         cache = core.find_omega_online_files(
             'G1:DER_DATA_H', 1135641617, 1135728017)
         assert len(cache) == 9
@@ -260,3 +297,459 @@ def test_find_trigger_urls():
         # simplest test is to throw an error from find_detchar_files
         with pytest.raises(ValueError):
             core.find_trigger_urls('X1:DOES-NOT_EXIST:1', 'fake-etg', 0, 100)
+
+
+def test_listing_cache_glob(tmp_path):
+    for name in ('a/1/X-A-0-1.xml', 'a/2/X-A-1-1.xml', 'b/1/X-B-0-1.txt',
+                 'a/1/.hidden.xml'):
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+    listings = core._ListingCache()
+    for pattern in ('*/*/*.xml', 'a/1/X-A-0-1.xml', 'a/*', 'c/*/*'):
+        pattern = os.path.join(str(tmp_path), pattern)
+        assert sorted(listings.glob(pattern)) == sorted(glob.glob(pattern))
+
+
+def test_find_trigger_files_many(kw_archive):
+    base = kw_archive(dirname='L-KW_TRIGGERS-{0}')
+    queries = [
+        ('L1:TEST-CHANNEL_1', 'kw', {'base': base}),
+        ('L1:TEST-CHANNEL_2', 'kw', {'base': base}),
+    ]
+    with mock.patch('os.scandir', side_effect=os.scandir) as listdir:
+        caches = core.find_trigger_files_many(
+            queries, 1135641617, 1135648017)
+    # each directory (and the one before) is listed once for both channels
+    assert listdir.call_count == 2
+    assert list(caches) == [
+        ('L1:TEST-CHANNEL_1', 'kw', (('base', base),)),
+        ('L1:TEST-CHANNEL_2', 'kw', (('base', base),)),
+    ]
+    for cache in caches.values():
+        assert sorted(cache) == sorted(core.find_kleinewelle_files(
+            'L1:TEST-CHANNEL', 1135641617, 1135648017, base=base))
+        assert len(cache) == 8
+
+
+def test_shared_listings_context():
+    seen = []
+
+    def _search(item):
+        seen.append(core._listings.get())
+        return []
+
+    with core._shared_listings() as listings:
+        # worker threads of a search share the listings
+        list(core._map(_search, range(2), jobs=2))
+        # but unrelated threads don't
+        thread = threading.Thread(target=_search, args=(None,))
+        thread.start()
+        thread.join()
+    assert seen == [listings, listings, None]
+    assert core._listings.get() is None
+
+
+@pytest.mark.parametrize('jobs', [None, 1, 4])
+def test_find_in_gps_dirs_jobs(jobs):
+    with mock_listdir_factory('L1-GDS_CALIB_STRAIN_OMICRON-{0}-{1}.xml'):
+        cache = core._find_in_gps_dirs(
+            '/test/{0}/L1-GDS_CALIB_STRAIN_OMICRON-*-*.xml',
+            1135641617, 1136728017, jobs=jobs)
+    assert len(cache) == 109
+    assert cache == sorted(cache)
+    assert cache[0] == (
+        'file:///test/11356/L1-GDS_CALIB_STRAIN_OMICRON-1135640000-10000.xml')
+
+
+def test_iter_trigger_files():
+    with mock_listdir_factory(
+        'L1-GDS_CALIB_STRAIN_Omicron-{0}-{1}.h5',
+    ), mock_glob_literal():
+        it = core.iter_trigger_files(
+            'L1:GDS-CALIB_STRAIN', 'omicron', 1135641617, 1135728017)
+        assert next(it) == (
+            'file:///home/detchar/triggers/*/L1/GDS-CALIB_STRAIN_Omicron/'
+            '11356/L1-GDS_CALIB_STRAIN_Omicron-1135640000-10000.h5')
+        assert len(list(it)) == 8
+
+
+def test_iter_unique():
+    a, b, c, d = [(i, i + 1, url) for i, url in enumerate('abcd')]
+    chunks = [[a, b], [b, c], [c], [c, d], [a]]
+    assert list(core._iter_unique(chunks)) == [a, b, c, d, a]
+
+
+def test_find_trigger_files_segments(kw_archive):
+    base = kw_archive(1135600000, 1135900000)
+    segments = [(1135800500, 1135801000), (1135641617, 1135643000),
+                (1135642500, 1135643500)]
+    with mock.patch('os.scandir', side_effect=os.scandir) as listdir:
+        cache = core.find_trigger_files('L1:TEST-CHANNEL', 'kw', segments,
+                                        base=base, maxdur=1000)
+    # only directories overlapping a segment are listed, and the one
+    # before, if a file could reach the start of a segment from it
+    assert listdir.call_count == 3
+    assert [core._file_segment(url)[0] for url in cache] == [
+        1135641000, 1135642000, 1135643000, 1135800000]
+    # an empty segment list finds nothing
+    assert not core.find_trigger_files('L1:TEST-CHANNEL', 'kw', [],
+                                       base=base)
+
+
+def test_find_trigger_files_wildcard_base(tmp_path):
+    # a wildcard base without a GPS directory is searched as given
+    directory = tmp_path / 'epoch1'
+    directory.mkdir()
+    (directory / 'L-KW_TRIGGERS-1135641000-1000.xml').touch()
+    cache = core.find_trigger_files('L1:TEST-CHANNEL', 'kw', 1135641617,
+                                    1135643617,
+                                    base=str(tmp_path / 'epoch*'))
+    assert cache == [core._as_url(
+        str(directory / 'L-KW_TRIGGERS-1135641000-1000.xml'))]
+
+
+def test_find_trigger_files_maxdur(tmp_path):
+    base = os.path.join(str(tmp_path), '{0}')
+    path = tmp_path / '11356'
+    path.mkdir()
+    (path / 'L-KW_TRIGGERS-1135680000-40000.xml').touch()
+    # a long file in the preceding directory is found for a custom base
+    cache = core.find_trigger_files('L1:TEST-CHANNEL', 'kw', 1135710000,
+                                    1135711000, base=base)
+    assert [os.path.basename(url) for url in cache] == [
+        'L-KW_TRIGGERS-1135680000-40000.xml']
+    # unless the caller says that files are shorter than that
+    assert not core.find_trigger_files('L1:TEST-CHANNEL', 'kw', 1135710000,
+                                       1135711000, base=base, maxdur=3600)
+
+
+@pytest.mark.parametrize('finder, base, maxdur, result', [
+    ('kleinewelle', None, None, core.MAX_FILE_DURATION['kleinewelle']),
+    ('kleinewelle', '/custom', None, None),
+    ('kleinewelle', '/custom', 100, 100),
+    ('omega_online', None, None, None),
+])
+def test_max_file_duration(finder, base, maxdur, result):
+    assert core._max_file_duration(finder, maxdur, base=base) == result
+
+
+def test_select():
+    records = [(20, 30, 'c'), (0, 10, 'a'), (10, 20, 'b'), (40, 50, 'd')]
+    assert core._select(records, [(5, 10), (35, 45)]) == [
+        (0, 10, 'a'), (40, 50, 'd')]
+    assert core._select(records, [(10, 40)]) == [(10, 20, 'b'), (20, 30, 'c')]
+    assert core._select(records, []) == []
+
+
+@pytest.mark.parametrize('segments, maxdur, dirs', [
+    ([(1135641617, 1135648017)], None, [11355, 11356]),
+    ([(1135641617, 1135648017)], 3600, [11356]),
+    ([(1135601617, 1135700000)], 3600, [11355, 11356]),
+    ([(1135641617, 1135700000), (1135800005, 1135800010)], 1,
+     [11356, 11358]),
+])
+def test_gps_dirs(segments, maxdur, dirs):
+    assert core._gps_dirs(segments, maxdur=maxdur) == dirs
+
+
+def test_plan_gps_dirs_resolves_wildcards(tmp_path):
+    for epoch in ('ER1', 'O1'):
+        (tmp_path / epoch / '11356').mkdir(parents=True)
+    globpath = os.path.join(str(tmp_path), '*', '{0}', 'X-*-*.xml')
+    core._bases.clear()
+    with mock.patch('glob.glob', side_effect=glob.glob) as glob_:
+        _, items = core._plan_gps_dirs(globpath, [(1135641617, 1135648017)])
+        core._plan_gps_dirs(globpath, [(1135741617, 1135748017)])
+    glob_.assert_called_once()  # resolution is cached
+    assert items == [tuple(
+        os.path.join(str(tmp_path), epoch, n, 'X-*-*.xml') for
+        epoch in ('ER1', 'O1')
+    ) for n in ('11355', '11356')]
+
+
+def test_explain_trigger_files():
+    plan = core.explain_trigger_files(
+        'L1:GDS-CALIB_STRAIN', 'kw', 1135641617, 1135728017)
+    assert plan == {
+        'finder': 'kleinewelle',
+        'segments': [(1135641617, 1135728017)],
+        'paths': [
+            '/gds-l1/dmt/triggers/L-KW_HOFT/L-KW_HOFT-{0}/'
+            'L-KW_HOFT-*-*.xml'.format(n) for n in (11356, 11357)
+        ],
+    }
+
+
+def test_split_segments():
+    assert core._split_segments([(50, 150), (250, 260), (290, 310)], 100) == [
+        [(50, 100)], [(100, 150)], [(250, 260), (290, 300)], [(300, 310)],
+    ]
+
+
+def test_find_trigger_files_processes(kw_archive):
+    # files that cross the GPS5 boundaries must be found once
+    base = kw_archive(1135640000, 1135960000, 40000, prefix='X-KW_TRIGGERS')
+    serial = core.find_trigger_files('X1:TEST', 'kw', 1135641617, 1135948017,
+                                     base=base)
+    assert len(serial) == 8
+    assert core.find_trigger_files('X1:TEST', 'kw', 1135641617, 1135948017,
+                                   base=base, processes=3) == serial
+
+
+def test_missing_paths_threads():
+    missing = core._MissingPaths()
+    errors = []
+
+    def _use(n):
+        try:
+            for i in range(2000):
+                path = '/missing/%d' % (i % 50)
+                missing.add(path)
+                path in missing
+                if i % 500 == n:
+                    missing.clear()
+        except Exception as exc:  # pragma: no cover
+            errors.append(exc)
+
+    with mock.patch.object(core, 'NEGATIVE_CACHE_SIZE', 10), \
+            mock.patch.object(core, 'NEGATIVE_CACHE_TTL', 0):
+        threads = [threading.Thread(target=_use, args=(n,)) for
+                   n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert not errors
+
+
+def test_missing_paths(tmp_path):
+    with mock.patch.object(core, 'DEFAULT_DAILY_CBC_BASE', str(tmp_path)), \
+            mock.patch.object(core, '_get_daily_cbc_index',
+                              side_effect=FileNotFoundError) as get:
+        # historical data are only looked for once
+        core.find_daily_cbc_files('L1:GDS-CALIB_STRAIN', 0, 100)
+        core.find_daily_cbc_files('L1:GDS-CALIB_STRAIN', 0, 100)
+        assert get.call_count == 1
+
+        # recent data are looked for again after the TTL
+        now = int(gps_now())
+        with mock.patch.object(core, 'NEGATIVE_CACHE_TTL', -1):
+            core.find_daily_cbc_files('L1:GDS-CALIB_STRAIN', now, now + 1)
+            core.find_daily_cbc_files('L1:GDS-CALIB_STRAIN', now, now + 1)
+        assert get.call_count == 3
+        core.find_daily_cbc_files('L1:GDS-CALIB_STRAIN', now, now + 1)
+        core.find_daily_cbc_files('L1:GDS-CALIB_STRAIN', now, now + 1)
+        assert get.call_count == 4
+        with core._missing.ignore_recent():
+            core.find_daily_cbc_files('L1:GDS-CALIB_STRAIN', now, now + 1)
+        assert get.call_count == 5
+        # only for searches in that context
+        core.find_daily_cbc_files('L1:GDS-CALIB_STRAIN', now, now + 1)
+        assert get.call_count == 5
+
+    # missing directories are not listed again
+    with mock.patch.object(core, '_read_dir_names',
+                           wraps=core._read_dir_names) as read:
+        assert core._listdir(str(tmp_path / 'missing')) == []
+        assert core._listdir(str(tmp_path / 'missing')) == []
+    assert read.call_count == 1
+
+
+def test_result_cache(tmp_path, kw_archive):
+    base = kw_archive(1135640000, 1135650000)
+    directory = tmp_path / '11356'
+    os.utime(directory, (0, 0))  # settled
+
+    def find(start, end):
+        return core.find_trigger_files('L1:TEST', 'kw', start, end,
+                                       base=base, maxdur=1000)
+
+    assert core._results is None  # disabled by default
+    core.enable_result_cache()
+    try:
+        with mock.patch.object(core, '_read_dir_names',
+                               wraps=core._read_dir_names) as read:
+            # overlapping searches only list the directory once
+            assert len(find(1135641617, 1135643617)) == 3
+            assert len(find(1135642617, 1135644617)) == 3
+            assert read.call_count == 1
+
+            # until it changes
+            (directory / 'L-KW_TRIGGERS-1135650000-1000.xml').touch()
+            os.utime(directory, (1, 1))
+            assert len(find(1135648617, 1135650617)) == 3
+            assert read.call_count == 2
+
+            # shared listings don't use the cache, and record each
+            # directory they list
+            listings = core._ListingCache(validate=True, track=True)
+            with mock.patch('os.stat', wraps=os.stat) as stat, \
+                    core._shared_listings(listings):
+                assert len(find(1135648617, 1135650617)) == 3
+            assert read.call_count == 3
+            assert str(directory) in listings.touched
+            assert stat.call_count == 1  # the listing is validated once
+    finally:
+        core.disable_result_cache()
+
+    # or the cache is disabled
+    with mock.patch.object(core, '_read_dir_names',
+                           wraps=core._read_dir_names) as read:
+        assert len(find(1135648617, 1135650617)) == 3
+    assert read.call_count == 1
+
+
+def test_find_trigger_files_timeout(tmp_path, kw_archive, capsys):
+    base = kw_archive(1135600000, 1135900000, 100000, duration=1000,
+                      prefix='X-KW_TRIGGERS')
+    hung = str(tmp_path / '11357')
+    release = threading.Event()
+    scan = core._scan_dir
+
+    def _scan_dir(directory, *args):
+        if directory.endswith('11357'):  # simulate a hung NFS mount
+            release.wait()
+        return scan(directory, *args)
+
+    try:
+        with mock.patch.object(core, '_scan_dir', side_effect=_scan_dir):
+            # per-directory timeout returns the rest
+            files = core.find_trigger_files(
+                'X1:TEST', 'kw', 1135600000, 1135900000, base=base,
+                timeout=.1, jobs=2)
+            assert len(files) == 2
+            assert files.partial
+            assert files.timedout == [
+                os.path.join(hung, 'X-KW_TRIGGERS-*-*.xml')]
+
+            # query timeout skips everything not yet done
+            files = core.find_trigger_files(
+                'X1:TEST', 'kw', 1135600000, 1135900000, base=base,
+                query_timeout=.1)
+            assert len(files) == 1
+            assert len(files.timedout) == 2
+
+            # the command-line reports unknown coverage
+            assert cli.main([
+                'X1:TEST', 'kw', '1135600000', '1135900000', '--gaps',
+                '--timeout', '.1', '-o', str(tmp_path / 'out.txt'),
+            ]) == 1
+    finally:
+        release.set()
+    err = capsys.readouterr().err
+    assert 'Unknown coverage (timed out):' in err
+    assert 'X-KW_TRIGGERS-11357/X-KW_TRIGGERS-*-*.xml' in err
+    # the span that timed out is not reported as missing
+    missing = err.split('Missing segments:')[1].split('Unknown')[0]
+    assert missing.split() == [
+        '1135600000.000000', '1135700000.000000',
+        '1135800000.000000', '1135900000.000000',
+    ]
+    assert 'Coverage: 0.000000' in err
+
+
+@pytest.mark.parametrize('path, span', [
+    ('/base/X-KW_TRIGGERS-11357/X-KW_TRIGGERS-*-*.xml',
+     (1135700000, 1135800000)),
+    ('/home/detchar/triggers/L1/TEST_OMICRON/11357/L1-*.h5',
+     (1135700000, 1135800000)),
+    ('/home/pycbc.live/triggers/data/2016_01_01', (1135641617, 1135728017)),
+    ('/home/pycbc.live/triggers/data/2016_1_1', (1135641617, 1135728017)),
+    ('/daily_cbc/bns/201601/20160101/cache/H1-INSPIRAL.cache',
+     (1135641617, 1135728017)),
+    ('/somewhere/else/*.xml', None),
+])
+def test_path_span(path, span):
+    assert core._path_span(path) == span
+
+
+def test_find_trigger_file_at(tmp_path, kw_archive):
+    # leave a gap
+    base = kw_archive(1135640000, 1135650000, skip=(1135645000,))
+    directory = tmp_path / '11356'
+
+    def find(gps):
+        return core.find_trigger_file_at('L1:TEST', 'kw', gps, base=base)
+
+    with mock.patch.object(core, '_read_dir_names',
+                           wraps=core._read_dir_names) as read:
+        # the first lookup lists the directory, and learns the cadence
+        url = find(1135641617.5)
+        assert url == core._as_url(
+            str(directory / 'L-KW_TRIGGERS-1135641000-1000.xml'))
+        assert read.call_count == 1
+        assert core._cadences[os.path.join(base, 'L-KW_TRIGGERS-*-*.xml')] == (
+            'L-KW_TRIGGERS', '.xml', 1000, 0)
+
+        # later lookups predict the file name
+        with mock.patch('os.path.isfile', wraps=os.path.isfile) as isfile:
+            assert find(1135648000).endswith(
+                'L-KW_TRIGGERS-1135648000-1000.xml')
+        assert isfile.call_count == 1
+        assert read.call_count == 1
+
+        # a wrong prediction falls back to a listing
+        assert find(1135645500) is None
+
+
+def test_predict_file_at_detchar(tmp_path):
+    # detchar patterns have a character class for the GPS start time
+    directory = tmp_path / '11356'
+    directory.mkdir()
+    for gps in range(1135640000, 1135650000, 1000):
+        (directory / 'L1-GDS_CALIB_STRAIN_OMICRON-{0}-1000.h5'.format(
+            gps)).touch()
+    pattern = 'L1-GDS_CALIB_STRAIN_OMICRON-%s-*.h5' % ('[0-9]' * 10)
+    path = str(directory / pattern)
+    records = core._scan_dir(str(directory), pattern, 1135641617, 1135643617)
+    # records aren't sorted by the scanner
+    core._learn_cadence([path], sorted(records, reverse=True))
+    key = str(tmp_path / '{0}' / pattern)
+    assert core._cadence_key(path) == key
+    assert core._cadences[key] == (
+        'L1-GDS_CALIB_STRAIN_OMICRON', '.h5', 1000, 0)
+    # the same pattern in another archive has no cadence
+    assert core._predict_file_at(
+        [(str(tmp_path / 'other' / '11356' / pattern),)],
+        1135648000.5) is None
+    expected = directory / 'L1-GDS_CALIB_STRAIN_OMICRON-1135648000-1000.h5'
+    with mock.patch('os.path.isfile', wraps=os.path.isfile) as isfile:
+        assert core._predict_file_at([(path,)], 1135648000.5) == (
+            core._as_url(str(expected)))
+    assert isfile.call_count == 1
+
+    # a prediction that no longer matches the pattern isn't used
+    other = str(directory / pattern.replace('.h5', '.root'))
+    core._cadences[core._cadence_key(other)] = core._cadences[key]
+    assert core._predict_file_at([(other,)], 1135648000.5) is None
+
+
+def test_lazy_imports():
+    # importing the command-line tool doesn't load any finders
+    modules = subprocess.check_output([
+        sys.executable, '-c',
+        'import sys, gwtrigfind.cli; print(" ".join(sys.modules))',
+    ], text=True).split()
+    for name in ('gwtrigfind.core', 'gwtrigfind.aio', 'ligo.segments',
+                 'numpy', 'sqlite3', 'concurrent.futures'):
+        assert name not in modules
+
+    # but all of the public names are still available
+    import gwtrigfind
+    assert gwtrigfind.find_trigger_files is core.find_trigger_files
+    assert gwtrigfind.afind_trigger_files.__module__ == 'gwtrigfind.aio'
+    with pytest.raises(AttributeError):
+        gwtrigfind.does_not_exist
+
+    # star-imports give the whole public API
+    namespace = {}
+    exec('from gwtrigfind import *', namespace)
+    assert namespace['find_trigger_files'] is core.find_trigger_files
+    assert 'enable_catalog' in namespace
+    assert 'os' not in namespace
+    public = {name for name, value in vars(core).items() if
+              not name.startswith('_') and
+              getattr(value, '__module__', None) in (
+                  'gwtrigfind.core', 'gwtrigfind.filelist')}
+    assert public <= set(gwtrigfind.__all__)